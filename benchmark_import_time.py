@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the cold start of the web entry point
+
+Imports the module (web.app by default) in fresh interpreters with
+python -X importtime, takes the median of several runs per module and prints
+the slowest imports. Each run is appended to a JSON Lines history file and
+compared with the previous entry, so regressions show up over time.
+
+Usage:
+    python benchmark_import_time.py
+    python benchmark_import_time.py --module web.app --module src.orchestrator --runs 7
+    python benchmark_import_time.py --no-history
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HISTORY = os.path.join(PROJECT_ROOT, 'data', 'benchmarks', 'import_time_history.jsonl')
+
+# Imports that must stay off the cold-start path of web.app
+WATCHED_PACKAGES = ('openpyxl', 'src.orchestrator')
+
+
+def measure_once(module):
+    """
+    Import module in a fresh interpreter
+
+    Returns:
+        Dict of imported package -> (self microseconds, cumulative microseconds)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure(module, runs):
+    """Median self and cumulative import time per package over runs"""
+    samples = [measure_once(module) for _ in range(runs)]
+    packages = set().union(*samples)
+    return {
+        name: (
+            statistics.median(sample[name][0] for sample in samples if name in sample),
+            statistics.median(sample[name][1] for sample in samples if name in sample)
+        )
+        for name in packages
+    }
+
+
+def git_commit():
+    """Current commit hash, or '' outside a git checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return ''
+
+
+def load_previous(history_path, module):
+    """Latest history entry for module, or None"""
+    previous = None
+    try:
+        with open(history_path, 'r') as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry.get('module') == module:
+                    previous = entry
+    except (OSError, ValueError):
+        return None
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', action='append', help='Module to import (repeatable, default web.app)')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per module (median is kept)')
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to show and record')
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSON Lines history file')
+    parser.add_argument('--no-history', action='store_true', help='Do not read or append the history')
+    args = parser.parse_args()
+
+    for module in args.module or ['web.app']:
+        timings = measure(module, args.runs)
+        total_us = timings.get(module, (0, 0))[1]
+        slowest = sorted(timings.items(), key=lambda item: -item[1][1])[:args.top]
+        watched = sorted(name for name in timings if name.split('.')[0] in WATCHED_PACKAGES or name in WATCHED_PACKAGES)
+
+        print('=' * 60)
+        print(f"Import time of {module}: {total_us / 1000:.1f} ms (median of {args.runs} runs)")
+        print('=' * 60)
+        print(f"{'cumulative ms':>14} {'self ms':>8}  package")
+        for name, (self_us, cumulative_us) in slowest:
+            print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+        if watched:
+            print(f"\nWarning: cold start imports {', '.join(watched[:5])}{' ...' if len(watched) > 5 else ''}")
+
+        if args.no_history:
+            continue
+
+        previous = load_previous(args.history, module)
+        if previous:
+            change = total_us - previous['total_us']
+            print(f"\nPrevious ({previous['commit'] or 'unknown'}, {previous['timestamp']}): "
+                  f"{previous['total_us'] / 1000:.1f} ms ({change / 1000:+.1f} ms)")
+
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, 'a') as f:
+            f.write(json.dumps({
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'module': module,
+                'runs': args.runs,
+                'total_us': total_us,
+                'module_count': len(timings),
+                'watched_imports': watched,
+                'slowest': [
+                    {'package': name, 'self_us': self_us, 'cumulative_us': cumulative_us}
+                    for name, (self_us, cumulative_us) in slowest
+                ]
+            }) + '\n')
+        print(f"Recorded in {args.history}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Run Checkpoint - Durable progress of billing evaluation for resumable runs
+"""
+
+from typing import Callable, Dict, List
+from .models import Encounter, BillingResult
+from .mock_ebs import MockEBS
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RunCheckpoint:
+    """
+    Append-only checkpoint of billing results for one input file
+
+    After every evaluated chunk a JSON line is appended and fsynced holding the
+    chunk's results, the running offset (rows evaluated so far), the running
+    billed count and the Mock EBS call count. A resumed run re-parses the
+    input, reuses the checkpointed result of every encounter key it finds and
+    only evaluates the rest. A truncated last line (crash while writing) is
+    ignored.
+
+    Usage:
+        checkpoint = RunCheckpoint(path, chunk_size=5000)
+        checkpoint.open(mock_ebs, resume=True)
+        results = checkpoint.wrap(mock_ebs.batch_evaluate, mock_ebs)(encounters)
+        checkpoint.complete()
+    """
+
+    def __init__(self, checkpoint_path: str, chunk_size: int):
+        """Initialize checkpoint stored at checkpoint_path"""
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+        self.offset = 0
+        self.billed = 0
+        self.restored: Dict[str, BillingResult] = {}
+        self.restored_used = 0
+
+    def open(self, mock_ebs: MockEBS, resume: bool) -> None:
+        """
+        Load an existing checkpoint when resuming, otherwise start a new one
+
+        The Mock EBS call count is restored so claim IDs issued after the
+        resume continue the interrupted run's sequence.
+        """
+        if resume and os.path.exists(self.checkpoint_path):
+            call_count = 0
+            with open(self.checkpoint_path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Ignoring truncated checkpoint line in {self.checkpoint_path}")
+                        break
+                    for key, success, reason, claim_id in entry["results"]:
+                        self.restored[key] = BillingResult(key, bool(success), reason, claim_id)
+                    self.offset = entry["offset"]
+                    self.billed = entry["billed"]
+                    call_count = entry["call_count"]
+            mock_ebs.call_count = max(mock_ebs.call_count, call_count)
+            logger.info(f"Resuming from checkpoint: {self.offset} rows already evaluated")
+            return
+
+        # Starting over: drop results of any earlier interrupted run
+        self.complete()
+
+    def wrap(self, batch_evaluate: Callable[[List[Encounter]], List[BillingResult]],
+             mock_ebs: MockEBS) -> Callable[[List[Encounter]], List[BillingResult]]:
+        """Return a batch evaluator that reuses checkpointed results and checkpoints new ones"""
+        def evaluate(encounters: List[Encounter]) -> List[BillingResult]:
+            results = []
+            pending = []
+            for encounter in encounters:
+                result = self.restored.get(encounter.generate_key())
+                if result is None:
+                    pending.append(encounter)
+                else:
+                    self.restored_used += 1
+                results.append(result)
+
+            evaluated = []
+            for start in range(0, len(pending), self.chunk_size):
+                chunk_results = batch_evaluate(pending[start:start + self.chunk_size])
+                self._append(chunk_results, mock_ebs.call_count)
+                evaluated.extend(chunk_results)
+
+            evaluated = iter(evaluated)
+            return [result if result is not None else next(evaluated) for result in results]
+
+        return evaluate
+
+    def complete(self) -> None:
+        """Remove the checkpoint after a successful run"""
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+    def _append(self, results: List[BillingResult], call_count: int) -> None:
+        """Durably append one chunk of results"""
+        self.offset += len(results)
+        self.billed += sum(1 for r in results if r.success)
+        entry = {
+            "offset": self.offset,
+            "billed": self.billed,
+            "call_count": call_count,
+            "results": [[r.encounter_key, int(r.success), r.reason, r.claim_id] for r in results]
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint_path)), exist_ok=True)
+        with open(self.checkpoint_path, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,164 @@
+"""
+Command Line Interface - Runs reconciliations without the web server
+
+Usage:
+    python -m src.cli run data/input/sample_mixed.xlsx
+    python -m src.cli run data/input/sample_mixed.xlsx --dry-run --json
+    python -m src.cli enqueue data/input/sample_mixed.xlsx
+    python -m src.cli worker --processes 4
+    python -m src.cli jobs
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from .config import configure_logging, load_config
+from .orchestrator import ReconciliationOrchestrator
+from .job_queue import JobQueue
+from .worker import ReconciliationWorker, run_worker_pool
+
+
+def _print_summary(summary, output_files: dict) -> None:
+    """Print a human-readable execution summary"""
+    print("=" * 60)
+    print("Reconciliation Summary" + (" (dry run)" if summary.dry_run else ""))
+    print("=" * 60)
+    print(f"Total Encounters: {summary.total_encounters}")
+    print(f"Billed: {summary.billed_count} ({summary.success_rate:.1f}%)")
+    print(f"Not Billed: {summary.not_billed_count}")
+    print("\nMaster Missing Updates:")
+    print(f"  Added: {summary.master_missing_added}")
+    print(f"  Updated: {summary.master_missing_updated}")
+    print(f"  Removed: {summary.master_missing_removed}")
+    if output_files and any(output_files.values()):
+        print("\nOutput Files:")
+        print(f"  General Reconciliation: {output_files.get('general_reconciliation', '')}")
+        print(f"  Master Missing: {output_files.get('master_missing', '')}")
+    print(f"\nExecution time: {summary.duration_seconds:.2f} seconds")
+    print("=" * 60)
+
+
+def cmd_run(args) -> int:
+    """Run a reconciliation for one input file"""
+    orchestrator = ReconciliationOrchestrator(args.config)
+    summary, output_files = orchestrator.run(
+        args.input_file,
+        streaming=True if args.streaming else None,
+        force=args.force,
+        dry_run=args.dry_run,
+        partition_by_date=True if args.per_date else None,
+        resume=args.resume
+    )
+
+    if args.json:
+        print(json.dumps({"summary": summary.to_dict(), "output_files": output_files}, indent=2))
+    else:
+        _print_summary(summary, output_files)
+    return 0 if summary.total_encounters else 1
+
+
+def _open_queue(config_path: str) -> JobQueue:
+    """Open the job queue configured in jobQueue (paths relative to the config file)"""
+    try:
+        queue_config = load_config(config_path).get("jobQueue", {})
+    except FileNotFoundError:
+        queue_config = {}
+    db_path = queue_config.get("databasePath", "data/queue/jobs.sqlite3")
+    if not os.path.isabs(db_path):
+        db_path = os.path.join(os.path.dirname(os.path.abspath(config_path)), db_path)
+    return JobQueue(db_path, queue_config.get("leaseSeconds", 60), queue_config.get("maxAttempts", 3))
+
+
+def _poll_interval(config_path: str) -> float:
+    """Return jobQueue.pollIntervalSeconds from the config file"""
+    try:
+        return load_config(config_path).get("jobQueue", {}).get("pollIntervalSeconds", 1.0)
+    except FileNotFoundError:
+        return 1.0
+
+
+def cmd_enqueue(args) -> int:
+    """Queue input files for the workers"""
+    queue = _open_queue(args.config)
+    options = {"streaming": args.streaming, "force": args.force, "dry_run": args.dry_run}
+    for input_file in args.input_files:
+        print(queue.enqueue(os.path.abspath(input_file), {k: v for k, v in options.items() if v}))
+    return 0
+
+
+def cmd_worker(args) -> int:
+    """Run reconciliation workers against the job queue"""
+    queue = _open_queue(args.config)
+    poll_interval = _poll_interval(args.config)
+    if args.processes > 1:
+        run_worker_pool(queue, args.config, args.processes, poll_interval, args.exit_when_empty)
+    else:
+        ReconciliationWorker(queue, args.config, poll_interval=poll_interval).run(
+            max_jobs=args.max_jobs, exit_when_empty=args.exit_when_empty
+        )
+    return 0
+
+
+def cmd_jobs(args) -> int:
+    """List jobs and queue counts"""
+    queue = _open_queue(args.config)
+    for job in queue.list(status=args.status, limit=args.limit):
+        error = f"  {job['error']}" if job["error"] else ""
+        print(f"{job['id']}  {job['status']:<9}  attempts={job['attempts']}  {job['input_file']}{error}")
+    print(json.dumps(queue.counts()))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser"""
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="ICE Reconciliation")
+    parser.add_argument("--config", default="config.json", help="Path to config.json")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Reconcile an ICE export file")
+    run_parser.add_argument("input_file", help="Path to ICE export Excel file")
+    run_parser.add_argument("--dry-run", action="store_true",
+                            help="Compute the summary only; write no workbooks and do not update the ledger")
+    run_parser.add_argument("--streaming", action="store_true", help="Process the file in bounded-memory chunks")
+    run_parser.add_argument("--per-date", "--parallel", dest="per_date", action="store_true",
+                            help="Partition the run by date of service, writing per-date files when "
+                                 "processing.partitionByDate.perDateOutputs is set (--parallel is deprecated)")
+    run_parser.add_argument("--resume", action="store_true",
+                            help="Continue an interrupted run of the same input from its checkpoint")
+    run_parser.add_argument("--force", action="store_true", help="Ignore cached results and re-evaluate every row")
+    run_parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    run_parser.set_defaults(func=cmd_run)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Queue ICE export files for the workers")
+    enqueue_parser.add_argument("input_files", nargs="+", help="Paths to ICE export Excel files")
+    enqueue_parser.add_argument("--dry-run", action="store_true", help="Compute the summary only")
+    enqueue_parser.add_argument("--streaming", action="store_true", help="Process in bounded-memory chunks")
+    enqueue_parser.add_argument("--force", action="store_true", help="Ignore cached results")
+    enqueue_parser.set_defaults(func=cmd_enqueue)
+
+    worker_parser = subparsers.add_parser("worker", help="Process queued jobs")
+    worker_parser.add_argument("--processes", type=int, default=1, help="Number of worker processes")
+    worker_parser.add_argument("--max-jobs", type=int, help="Stop after this many jobs (single process)")
+    worker_parser.add_argument("--exit-when-empty", action="store_true",
+                               help="Stop when the queue is drained instead of polling")
+    worker_parser.set_defaults(func=cmd_worker)
+
+    jobs_parser = subparsers.add_parser("jobs", help="List queued and finished jobs")
+    jobs_parser.add_argument("--status", choices=["queued", "running", "succeeded", "failed"])
+    jobs_parser.add_argument("--limit", type=int, default=20)
+    jobs_parser.set_defaults(func=cmd_jobs)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    """CLI entry point"""
+    args = build_parser().parse_args(argv)
+    configure_logging(args.config)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Configuration - Cached config.json loading and logging setup for entry points
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_cache = {}  # absolute path -> ((mtime_ns, size), parsed config)
+_cache_lock = threading.Lock()
+
+
+def load_config(config_path: str) -> dict:
+    """
+    Load a JSON configuration file, parsing it only once per process
+
+    The parsed file is cached on its path, mtime and size, so an edited file
+    is picked up on the next call. Every caller gets its own copy.
+
+    Raises:
+        FileNotFoundError: The file does not exist
+        ValueError: The file is not valid JSON
+    """
+    path = os.path.abspath(config_path)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        entry = _cache.get(path)
+    if entry is None or entry[0] != version:
+        with open(path, 'r') as f:
+            config = json.load(f)
+        entry = (version, config)
+        with _cache_lock:
+            _cache[path] = entry
+    return copy.deepcopy(entry[1])
+
+
+def configure_logging(config_path: str = None, level: str = None) -> None:
+    """
+    Set up root logging for a process entry point (CLI, web server, worker)
+
+    The level is taken from level, else logging.level in the config file,
+    else INFO. Library modules only create loggers; they never configure them.
+    """
+    if level is None and config_path:
+        try:
+            level = load_config(config_path).get("logging", {}).get("level")
+        except (OSError, ValueError):
+            level = None
+    logging.basicConfig(level=getattr(logging, str(level or "INFO").upper(), logging.INFO), format=LOG_FORMAT)
@@ -0,0 +1,85 @@
+"""
+File Lock - Advisory inter-process lock backed by a lock file
+"""
+
+import os
+import time
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+class LockTimeout(Exception):
+    """Raised when a file lock cannot be acquired in time"""
+    pass
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a lock file
+
+    Works across processes (and across threads, since each acquisition opens
+    its own file handle). Usage:
+
+        with FileLock("/path/to/.lock", timeout=30):
+            ...
+    """
+
+    def __init__(self, lock_path: str, timeout: float = 30.0, poll_interval: float = 0.05):
+        """Initialize lock for lock_path"""
+        self.lock_path = lock_path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+
+    def acquire(self) -> None:
+        """Block until the lock is held or the timeout expires"""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            try:
+                self._try_lock(fd)
+                self._fd = fd
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise LockTimeout(f"Timed out waiting for lock: {self.lock_path}")
+                time.sleep(self.poll_interval)
+
+    def release(self) -> None:
+        """Release the lock"""
+        if self._fd is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    @staticmethod
+    def _try_lock(fd: int) -> None:
+        """Attempt a non-blocking exclusive lock, raising OSError if held elsewhere"""
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
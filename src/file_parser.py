@@ -2,8 +2,7 @@
 Excel File Parser - Reads ICE export files and parses to Encounter objects
 """
 
-from openpyxl import load_workbook
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 from .models import Encounter
 import logging
 
@@ -45,9 +44,37 @@ class ExcelFileParser:
         errors = []
         
         try:
-            # Load workbook
-            wb = load_workbook(file_path, read_only=True, data_only=True)
+            for chunk_encounters, chunk_errors in self.iter_chunks(file_path):
+                encounters.extend(chunk_encounters)
+                errors.extend(chunk_errors)
             
+            logger.info(f"Parsed {len(encounters)} encounters with {len(errors)} errors")
+            
+        except Exception as e:
+            logger.error(f"Error reading Excel file: {e}")
+            errors.append(ParseError(0, "File", str(e)))
+        
+        return encounters, errors
+    
+    def iter_chunks(self, file_path: str, chunk_size: int = None) -> Iterator[Tuple[List[Encounter], List[ParseError]]]:
+        """
+        Stream the file as chunks of parsed encounters
+        
+        Rows are read lazily from the read-only workbook, so at most one chunk
+        of encounters is held in memory at a time.
+        
+        Args:
+            file_path: Path to ICE export Excel file
+            chunk_size: Maximum encounters per chunk (None for a single chunk)
+        
+        Yields:
+            Tuples of (encounters, errors) for each chunk
+        """
+        # Load workbook (openpyxl is imported on first use to keep module import cheap)
+        from openpyxl import load_workbook
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        
+        try:
             # Get sheet (try by name, fallback to first sheet)
             if self.sheet_name in wb.sheetnames:
                 ws = wb[self.sheet_name]
@@ -55,40 +82,43 @@ class ExcelFileParser:
                 ws = wb.active
             
             # Get header row
-            rows = list(ws.iter_rows(values_only=True))
-            if not rows:
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
                 logger.error("Excel file is empty")
-                return encounters, errors
-            
-            header = rows[0]
+                return
             
             # Validate required columns
             missing_cols = self.validate_columns(header)
             if missing_cols:
                 error_msg = f"Missing required columns: {', '.join(missing_cols)}"
                 logger.error(error_msg)
-                errors.append(ParseError(1, "Header", error_msg))
-                return encounters, errors
+                yield [], [ParseError(1, "Header", error_msg)]
+                return
             
             # Create column index mapping
             col_map = {col: idx for idx, col in enumerate(header)}
             
             # Parse data rows
-            for row_num, row in enumerate(rows[1:], start=2):
+            encounters = []
+            errors = []
+            for row_num, row in enumerate(rows, start=2):
                 try:
                     encounter = self.parse_row(row, col_map)
                     encounters.append(encounter)
                 except Exception as e:
                     logger.warning(f"Error parsing row {row_num}: {e}")
                     errors.append(ParseError(row_num, "Row", str(e)))
+                
+                if chunk_size and len(encounters) >= chunk_size:
+                    yield encounters, errors
+                    encounters = []
+                    errors = []
             
-            logger.info(f"Parsed {len(encounters)} encounters with {len(errors)} errors")
-            
-        except Exception as e:
-            logger.error(f"Error reading Excel file: {e}")
-            errors.append(ParseError(0, "File", str(e)))
-        
-        return encounters, errors
+            if encounters or errors:
+                yield encounters, errors
+        finally:
+            wb.close()
     
     def validate_columns(self, header: tuple) -> List[str]:
         """
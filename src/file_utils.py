@@ -0,0 +1,120 @@
+"""
+File Utilities - Small helpers shared by components that persist state to disk
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def _read_umask() -> int:
+    """Current process umask (read once at import, while no other thread can race on it)"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _read_umask()
+
+
+def match_permissions(temp_path: str, target_path: str) -> None:
+    """
+    Give a temporary file the permissions its target has, or would get if created
+
+    tempfile.mkstemp creates files with mode 0600, which os.replace keeps; a
+    replaced output must stay readable by whoever could read the original.
+    """
+    try:
+        mode = os.stat(target_path).st_mode & 0o7777
+    except OSError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(temp_path, mode)
+
+
+def file_sha256(file_path) -> str:
+    """
+    Compute the SHA-256 hex digest of a file without loading it into memory
+
+    Args:
+        file_path: Path to the file, or a seekable binary file object
+            (read from its start)
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    if hasattr(file_path, 'read'):
+        file_path.seek(0)
+        for chunk in iter(lambda: file_path.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def atomic_write_json(file_path: str, data, indent: int = 2) -> None:
+    """
+    Write JSON so readers never observe a partially written file
+
+    The data is written to a temporary file in the target directory and then
+    moved into place with os.replace, which is atomic on POSIX and Windows.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        match_permissions(temp_path, file_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def atomic_save_workbook(wb, file_path: str, fallback_path: str = None) -> str:
+    """
+    Save an openpyxl workbook so readers never observe a partially written file
+
+    Concurrent runs writing the same output path each save to their own
+    temporary file; the last one to finish replaces the file as a whole.
+
+    With fallback_path, a workbook that cannot be placed at file_path (e.g. a
+    read-only folder) is moved to fallback_path instead. The workbook is
+    saved only once either way, as write-only workbooks require.
+
+    Returns:
+        The path the workbook was saved to
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    try:
+        fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".xlsx", dir=directory)
+    except OSError:
+        if fallback_path is None:
+            raise
+        wb.save(fallback_path)
+        return fallback_path
+    os.close(fd)
+    saved = False
+    try:
+        wb.save(temp_path)
+        saved = True
+        match_permissions(temp_path, file_path)
+        os.replace(temp_path, file_path)
+        return file_path
+    except OSError:
+        if fallback_path is None or not saved:
+            raise
+        shutil.move(temp_path, fallback_path)
+        return fallback_path
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,224 @@
+"""
+Job Queue - Durable SQLite-backed queue of reconciliation jobs
+"""
+
+from contextlib import contextmanager
+from typing import List, Optional
+import json
+import os
+import sqlite3
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    input_file TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobQueue:
+    """
+    Reconciliation job queue stored in a SQLite database
+
+    Workers claim jobs under a lease that they renew with heartbeats. A job
+    whose lease expires (its worker crashed or hung) is handed to the next
+    worker that asks, until max_attempts is reached. Claims run in an
+    IMMEDIATE transaction, so concurrent workers - in other processes, or on
+    other hosts sharing the database file - never claim the same job.
+
+    The database uses SQLite's default rollback journal rather than WAL, since
+    WAL requires shared memory and does not work on network filesystems.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 60.0, max_attempts: int = 3):
+        """Initialize queue stored at db_path, creating the schema if needed"""
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def enqueue(self, input_file: str, options: dict = None, max_attempts: int = None) -> str:
+        """
+        Add a job to the queue
+
+        Args:
+            input_file: Path to ICE export Excel file
+            options: Keyword arguments for ReconciliationOrchestrator.run
+            max_attempts: Attempts before the job is failed (defaults to the queue's)
+
+        Returns:
+            Job ID
+        """
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, input_file, options, status, max_attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, input_file, json.dumps(options or {}), QUEUED,
+                 max_attempts or self.max_attempts, now, now)
+            )
+        logger.info(f"Enqueued job {job_id}: {input_file}")
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[dict]:
+        """
+        Lease the oldest runnable job to worker_id
+
+        Runnable jobs are queued jobs and running jobs whose lease has
+        expired. Expired jobs that have used up their attempts are failed
+        instead of being handed out again.
+
+        Returns:
+            Job dictionary, or None if no job is runnable
+        """
+        now = time.time()
+        with self._connection() as conn:
+            # Take the write lock before reading so two workers cannot pick the same job
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (FAILED, "Lease expired after the final attempt", now, RUNNING, now)
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                return None
+
+            if row["status"] == RUNNING:
+                logger.warning(f"Lease of job {row['id']} held by {row['lease_owner']} expired, retrying")
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, updated_at = ? WHERE id = ?",
+                (RUNNING, worker_id, now + self.lease_seconds, now, row["id"])
+            )
+
+        return self.get(row["id"])
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """
+        Renew a lease
+
+        Returns:
+            False if the worker no longer holds the lease
+        """
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = ?",
+                (now + self.lease_seconds, now, job_id, worker_id, RUNNING)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        """
+        Record a successful job
+
+        Returns:
+            False if the lease was lost in the meantime (result discarded)
+        """
+        return self._finish(job_id, worker_id, SUCCEEDED, json.dumps(result), None)
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """
+        Record a failed attempt, requeueing the job if attempts remain
+
+        Returns:
+            False if the lease was lost in the meantime
+        """
+        job = self.get(job_id)
+        status = QUEUED if job and job["attempts"] < job["max_attempts"] else FAILED
+        return self._finish(job_id, worker_id, status, None, error)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return a job, or None if it does not exist"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status: str = None, limit: int = 100) -> List[dict]:
+        """Return the most recent jobs, optionally filtered by status"""
+        query = "SELECT * FROM jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connection() as conn:
+            return [self._to_dict(row) for row in conn.execute(query, params)]
+
+    def counts(self) -> dict:
+        """Return the number of jobs per status"""
+        counts = dict.fromkeys((QUEUED, RUNNING, SUCCEEDED, FAILED), 0)
+        with self._connection() as conn:
+            for status, count in conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+                counts[status] = count
+        return counts
+
+    def _finish(self, job_id: str, worker_id: str, status: str, result: Optional[str],
+                error: Optional[str]) -> bool:
+        """Move a leased job to its next status if worker_id still holds the lease"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ? AND lease_owner = ? AND status = ?",
+                (status, result, error, time.time(), job_id, worker_id, RUNNING)
+            )
+        if cursor.rowcount != 1:
+            logger.warning(f"Worker {worker_id} lost the lease of job {job_id}, result discarded")
+            return False
+        return True
+
+    @contextmanager
+    def _connection(self):
+        """
+        Open a connection for one operation and commit it (rolled back on error)
+
+        A connection per operation keeps the queue safe across threads and
+        forked worker processes.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        """Convert a jobs row to a dictionary with decoded JSON columns"""
+        job = dict(row)
+        job["options"] = json.loads(job["options"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
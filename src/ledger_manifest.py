@@ -0,0 +1,103 @@
+"""
+Ledger Manifest - Small JSON index describing the latest Master Missing file
+"""
+
+from typing import Optional
+from datetime import datetime
+from .file_utils import atomic_write_json
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LedgerManifest:
+    """
+    Index of the most recent Master Missing ledger
+
+    The manifest lets the manager locate the latest ledger with a single small
+    read instead of listing and stat-ing every dated file in the output folder.
+
+    Manifest fields:
+    - latest_path: Absolute path of the latest Master Missing file
+    - record_count: Number of records written to that file
+    - content_hash: SHA-256 of the file contents
+    - run_date: Execution date of the run that wrote the file
+    - size / mtime: File stat at write time, used to detect stale entries
+    """
+
+    def __init__(self, manifest_path: str):
+        """Initialize manifest with the path of its JSON file"""
+        self.manifest_path = manifest_path
+
+    def read(self) -> Optional[dict]:
+        """
+        Read the manifest
+
+        Returns:
+            Manifest dictionary, or None if missing or unreadable
+        """
+        try:
+            with open(self.manifest_path, 'r') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable ledger manifest {self.manifest_path}: {e}")
+            return None
+
+        if not isinstance(entry, dict) or not entry.get("latest_path"):
+            return None
+        return entry
+
+    def write(self, latest_path: str, record_count: int, content_hash: str,
+              run_date: str) -> Optional[dict]:
+        """
+        Atomically record a newly written ledger file
+
+        Returns:
+            The manifest entry written, or None if the manifest could not be saved
+        """
+        stat = os.stat(latest_path)
+        entry = {
+            "latest_path": os.path.abspath(latest_path),
+            "record_count": record_count,
+            "content_hash": content_hash,
+            "run_date": run_date,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "updated_at": datetime.now().isoformat()
+        }
+
+        try:
+            atomic_write_json(self.manifest_path, entry)
+        except (OSError, PermissionError) as e:
+            # Read-only filesystems fall back to directory scans
+            logger.warning(f"Cannot write ledger manifest {self.manifest_path}: {e}")
+            return None
+
+        logger.debug(f"Updated ledger manifest: {entry['latest_path']}")
+        return entry
+
+    def latest_path(self) -> Optional[str]:
+        """
+        Return the latest ledger path if the manifest is present and fresh
+
+        A manifest is stale when its file no longer exists or the file's size or
+        modification time differ from what was recorded (i.e. it was replaced
+        outside the manager).
+        """
+        entry = self.read()
+        if entry is None:
+            return None
+        return entry["latest_path"] if self.is_fresh(entry) else None
+
+    @staticmethod
+    def is_fresh(entry: dict) -> bool:
+        """Check that a manifest entry still matches the file on disk"""
+        try:
+            stat = os.stat(entry["latest_path"])
+        except (OSError, KeyError):
+            return False
+        return stat.st_size == entry.get("size") and stat.st_mtime == entry.get("mtime")
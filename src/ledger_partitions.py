@@ -0,0 +1,142 @@
+"""
+Ledger Partitions - Stores the Master Missing ledger split by date-of-service month
+"""
+
+from dataclasses import asdict
+from typing import Dict, Iterable, List
+from .models import Encounter, MasterMissingRecord
+from .file_utils import atomic_write_json
+import json
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+UNDATED_PARTITION = "undated"
+_MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}")
+
+
+class LedgerPartitionStore:
+    """
+    Partitioned storage for Master Missing records
+
+    Each partition holds the records for one date-of-service month and is kept
+    in its own JSON file ({folder}/{YYYY-MM}.json). Records whose date of
+    service cannot be normalized go to the "undated" partition. Because the
+    encounter key includes the date of service, a given key always maps to the
+    same partition.
+    """
+
+    def __init__(self, folder_path: str):
+        """Initialize store rooted at folder_path"""
+        self.folder_path = folder_path
+
+    @staticmethod
+    def partition_for(date_of_service: str) -> str:
+        """Return the partition name (YYYY-MM) for a date of service"""
+        normalized = Encounter._normalize_date(date_of_service)
+        match = _MONTH_PATTERN.match(normalized)
+        return match.group(0) if match else UNDATED_PARTITION
+
+    def partitions_for(self, dates_of_service: Iterable[str]) -> List[str]:
+        """Return the sorted, distinct partitions that dates of service map to"""
+        return sorted({self.partition_for(dos) for dos in dates_of_service})
+
+    def list_partitions(self) -> List[str]:
+        """List all partitions present on disk"""
+        if not os.path.isdir(self.folder_path):
+            return []
+        return sorted(
+            f[:-len(".json")] for f in os.listdir(self.folder_path)
+            if f.endswith(".json") and not f.startswith(".")
+        )
+
+    def load(self, partitions: Iterable[str]) -> Dict[str, MasterMissingRecord]:
+        """
+        Load the records of the given partitions
+
+        Returns:
+            Dictionary mapping encounter_key to MasterMissingRecord
+        """
+        records = {}
+        for partition in partitions:
+            path = self._partition_path(partition)
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                for item in data.get("records", []):
+                    record = MasterMissingRecord(**item)
+                    records[record.encounter_key] = record
+            except Exception as e:
+                logger.error(f"Error loading ledger partition {partition}: {e}")
+                raise
+        return records
+
+    def load_all(self) -> Dict[str, MasterMissingRecord]:
+        """Load every partition (full ledger)"""
+        return self.load(self.list_partitions())
+
+    def write(self, records: Dict[str, MasterMissingRecord], partitions: Iterable[str]) -> List[str]:
+        """
+        Rewrite the given partitions from records
+
+        Only records belonging to the listed partitions are written; a partition
+        left without records is removed.
+
+        Returns:
+            List of partitions written
+        """
+        partitions = sorted(set(partitions))
+        if not partitions:
+            return []
+
+        os.makedirs(self.folder_path, exist_ok=True)
+
+        grouped = {partition: [] for partition in partitions}
+        for record in records.values():
+            partition = self.partition_for(record.date_of_service)
+            if partition in grouped:
+                grouped[partition].append(record)
+
+        for partition, partition_records in grouped.items():
+            path = self._partition_path(partition)
+            if not partition_records:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            partition_records.sort(key=lambda r: (r.date_of_service, r.encounter_key))
+            atomic_write_json(path, {
+                "partition": partition,
+                "records": [asdict(r) for r in partition_records]
+            })
+
+        logger.info(f"Wrote ledger partitions: {', '.join(partitions)}")
+        return partitions
+
+    @classmethod
+    def changed_partitions(cls, previous: Dict[str, MasterMissingRecord],
+                           updated: Dict[str, MasterMissingRecord]) -> List[str]:
+        """Return the partitions whose records differ between previous and updated"""
+        changed = set()
+        for key in previous.keys() | updated.keys():
+            before = previous.get(key)
+            after = updated.get(key)
+            if before != after:
+                changed.add(cls.partition_for((after or before).date_of_service))
+        return sorted(changed)
+
+    def size_of(self, partitions: Iterable[str]) -> int:
+        """Return the total on-disk size in bytes of the given partitions"""
+        total = 0
+        for partition in partitions:
+            path = self._partition_path(partition)
+            if os.path.exists(path):
+                total += os.path.getsize(path)
+        return total
+
+    def _partition_path(self, partition: str) -> str:
+        """Return the file path of a partition"""
+        return os.path.join(self.folder_path, f"{partition}.json")
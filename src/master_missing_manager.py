@@ -2,17 +2,32 @@
 Master Missing Manager - Manages the historical Master Missing file
 """
 
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill
-from typing import Dict, List
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from dataclasses import replace
 from .models import Encounter, BillingResult, MasterMissingRecord
+from .ledger_manifest import LedgerManifest
+from .ledger_partitions import LedgerPartitionStore
+from .file_utils import file_sha256, atomic_write_json, atomic_save_workbook
+from .file_lock import FileLock
+from .metrics import NullMetrics
+from contextlib import contextmanager
 from datetime import datetime
+import json
 import os
+import tempfile
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class LedgerChange(NamedTuple):
+    """Change to apply to the ledger for one processed encounter"""
+    encounter_key: str
+    date_of_service: str
+    record: Optional[MasterMissingRecord]  # None if billed (remove)
+
+
 class MasterMissingManager:
     """Manages Master Missing file (historical ledger of incomplete encounters)"""
     
@@ -21,27 +36,59 @@ class MasterMissingManager:
         self.config = config or {}
         self.folder_path = self.config.get("folderPath", "data/output")
         self.file_pattern = self.config.get("fileNamePattern", "Master Missing to {date}.xlsx")
+        self.manifest = LedgerManifest(os.path.join(
+            self.folder_path,
+            self.config.get("manifestFileName", ".master_missing_manifest.json")
+        ))
+        
+        # Resident copy of the latest ledger, reused across runs in long-lived processes
+        self.resident_cache_enabled = self.config.get("residentCache", True)
+        self._cache = None
+        self._cache_lock = threading.Lock()
+        
+        # Optional date-of-service month partitioned storage
+        self.partitioned = self.config.get("partitioned", False)
+        self.partition_store = LedgerPartitionStore(
+            self.config.get("partitionFolderPath", os.path.join(self.folder_path, "ledger"))
+        )
+        self.seed_marker_path = os.path.join(self.partition_store.folder_path, ".seeded.json")
+        
+        # Optimistic concurrency: version stamp checked and bumped under a file lock
+        self.version_path = os.path.join(self.folder_path, ".master_missing.version")
+        self.lock_path = os.path.join(self.folder_path, ".master_missing.lock")
+        self.lock_timeout = self.config.get("lockTimeoutSeconds", 60)
+        self.max_merge_retries = self.config.get("maxMergeRetries", 3)
     
-    def load_previous_file(self, file_path: str = None) -> Dict[str, MasterMissingRecord]:
+    def load_previous_file(self, file_path: str = None, stage=None) -> Dict[str, MasterMissingRecord]:
         """
         Load previous Master Missing file
         
         Args:
             file_path: Specific file path, or None to find latest
+            stage: Optional StageMetrics to record bytes read from disk
         
         Returns:
             Dictionary mapping encounter_key to MasterMissingRecord
         """
-        if not file_path:
+        located = not file_path
+        if located:
             file_path = self._find_latest_master_missing_file()
         
         if not file_path or not os.path.exists(file_path):
             logger.info("No previous Master Missing file found, starting fresh")
             return {}
         
+        cached_records = self._get_cached_records(file_path)
+        if cached_records is not None:
+            logger.info(f"Using resident Master Missing ledger ({len(cached_records)} records)")
+            return cached_records
+        
         records = {}
         
         try:
+            if stage is not None:
+                stage.bytes_read += os.path.getsize(file_path)
+            from openpyxl import load_workbook
             wb = load_workbook(file_path, read_only=True, data_only=True)
             ws = wb.active
             
@@ -62,6 +109,14 @@ class MasterMissingManager:
             
             logger.info(f"Loaded {len(records)} records from previous Master Missing file")
             
+            # Rebuild the manifest if the file was located by a directory scan
+            content_hash = None
+            if located:
+                content_hash = self._refresh_manifest(file_path, len(records))
+            
+            if self.resident_cache_enabled:
+                self._store_cache(file_path, records, content_hash or file_sha256(file_path))
+            
         except Exception as e:
             logger.error(f"Error loading Master Missing file: {e}")
         
@@ -81,48 +136,220 @@ class MasterMissingManager:
         Returns:
             Updated dictionary of Master Missing records
         """
-        updated_records = previous_records.copy()
+        delta = self.build_delta(encounters, billing_results, execution_date)
+        return self.apply_delta(previous_records, delta)
+    
+    def build_delta(self, encounters: List[Encounter], billing_results: List[BillingResult],
+                    execution_date: str) -> List[LedgerChange]:
+        """
+        Turn billing results into ledger changes, in encounter order
         
+        A failed encounter yields a change carrying its candidate record; a
+        billed encounter yields a change with record=None (remove if present).
+        Deltas for consecutive chunks can be concatenated.
+        """
         # Create billing results map
         billing_map = {result.encounter_key: result for result in billing_results}
         
-        added = 0
-        updated = 0
-        removed = 0
-        
+        delta = []
         for encounter in encounters:
             key = encounter.generate_key()
             result = billing_map.get(key)
             
             if result and result.success:
+                delta.append(LedgerChange(key, encounter.date_of_service, None))
+            else:
+                reason = result.reason if result else "Unknown Error"
+                record = MasterMissingRecord.from_encounter(encounter, reason, execution_date)
+                delta.append(LedgerChange(key, encounter.date_of_service, record))
+        
+        return delta
+    
+    def apply_delta(self, previous_records: Dict[str, MasterMissingRecord],
+                    delta: List[LedgerChange]):
+        """
+        Apply ledger changes to previous records
+        
+        Returns:
+            Tuple of (updated records, {"added", "updated", "removed"} counts)
+        """
+        updated_records = previous_records.copy()
+        
+        added = 0
+        updated = 0
+        removed = 0
+        
+        for key, _, record in delta:
+            if record is None:
                 # Billing succeeded - remove from Master Missing if exists
                 if key in updated_records:
+                    logger.debug(f"Removed from Master Missing: {updated_records[key].patient_name}")
                     del updated_records[key]
                     removed += 1
-                    logger.debug(f"Removed from Master Missing: {encounter.patient_name}")
+            elif key in updated_records:
+                # Billing failed - update existing record (replace rather than
+                # mutate, since previous records may be shared with the resident cache)
+                updated_records[key] = replace(
+                    updated_records[key],
+                    last_attempt_to_process=record.last_attempt_to_process,
+                    reason_for_not_billed=record.reason_for_not_billed
+                )
+                updated += 1
+                logger.debug(f"Updated Master Missing: {record.patient_name}")
             else:
-                # Billing failed - add or update Master Missing record
-                reason = result.reason if result else "Unknown Error"
-                
-                if key in updated_records:
-                    # Update existing record
-                    updated_records[key].last_attempt_to_process = execution_date
-                    updated_records[key].reason_for_not_billed = reason
-                    updated += 1
-                    logger.debug(f"Updated Master Missing: {encounter.patient_name}")
-                else:
-                    # Add new record
-                    record = MasterMissingRecord.from_encounter(encounter, reason, execution_date)
-                    updated_records[key] = record
-                    added += 1
-                    logger.debug(f"Added to Master Missing: {encounter.patient_name}")
+                # Billing failed - add new record
+                updated_records[key] = record
+                added += 1
+                logger.debug(f"Added to Master Missing: {record.patient_name}")
         
         logger.info(f"Master Missing updates: Added={added}, Updated={updated}, Removed={removed}")
         
         return updated_records, {"added": added, "updated": updated, "removed": removed}
     
+    def apply_results(self, delta: List[LedgerChange], execution_date: str, output_path: str,
+                      metrics=None):
+        """
+        Load, update and write the ledger safely alongside concurrent runs
+        
+        The previous ledger is loaded and merged without holding the lock. The
+        write is a compare-and-swap: under the ledger lock the version stamp is
+        compared with the one seen at load time, and if another run has written
+        in the meantime the current results are re-merged onto the latest
+        ledger instead of overwriting it. After max_merge_retries conflicts the
+        final merge is done entirely under the lock, so the call never fails
+        because of contention.
+        
+        Args:
+            delta: Ledger changes of the current run (see build_delta)
+            execution_date: Execution date
+            output_path: Master Missing workbook path (single-workbook mode)
+            metrics: Optional RunMetrics receiving ledger_load/ledger_write stages
+        
+        Returns:
+            Tuple of (updated records, stats) where stats holds added/updated/
+            removed counts plus "file", "version" and "retries"
+        """
+        metrics = metrics or NullMetrics()
+        if self.partitioned:
+            self.seed_partitions()
+        
+        for attempt in range(self.max_merge_retries + 1):
+            base_version = self.current_version()
+            previous, updated, stats = self._merge(delta, metrics)
+            
+            with self._ledger_lock():
+                current_version = self.current_version()
+                if current_version != base_version:
+                    logger.warning(f"Master Missing ledger changed during run (version {base_version} -> "
+                                   f"{current_version}), re-merging results (attempt {attempt + 1})")
+                    continue
+                return updated, self._commit(previous, updated, stats, execution_date, output_path,
+                                             attempt, metrics)
+        
+        # Persistent contention: merge and write while holding the lock
+        with self._ledger_lock():
+            previous, updated, stats = self._merge(delta, metrics)
+            return updated, self._commit(previous, updated, stats, execution_date, output_path,
+                                         self.max_merge_retries + 1, metrics)
+    
+    def preview_results(self, delta: List[LedgerChange], metrics=None) -> dict:
+        """
+        Compute the ledger changes a run would make without writing anything
+        
+        Returns:
+            Stats like apply_results (file is empty and retries 0)
+        """
+        version = self.current_version()
+        _, _, stats = self._merge(delta, metrics or NullMetrics())
+        stats.update({"file": "", "version": version, "retries": 0})
+        return stats
+    
+    def current_version(self) -> int:
+        """Return the ledger version stamp (0 if the ledger has never been written)"""
+        try:
+            with open(self.version_path, 'r') as f:
+                return int(json.load(f).get("version", 0))
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable ledger version file {self.version_path}: {e}")
+            return 0
+    
+    def _merge(self, delta: List[LedgerChange], metrics):
+        """Load the relevant ledger records and apply the current changes to them"""
+        with metrics.stage("ledger_load") as stage:
+            if self.partitioned and self.partitions_seeded():
+                previous = self.load_partitions((change.date_of_service for change in delta), stage=stage)
+            elif self.partitioned:
+                # Dry run before the first partitioned write: read the workbook ledger instead
+                partitions = set(self.partition_store.partitions_for(change.date_of_service for change in delta))
+                previous = {
+                    key: record for key, record in self.load_previous_file(stage=stage).items()
+                    if self.partition_store.partition_for(record.date_of_service) in partitions
+                }
+            else:
+                previous = self.load_previous_file(stage=stage)
+            stage.rows_out += len(previous)
+        
+        with metrics.stage("ledger_merge") as stage:
+            updated, stats = self.apply_delta(previous, delta)
+            stage.rows_in += len(delta)
+            stage.rows_out += len(updated)
+        return previous, updated, stats
+    
+    def _commit(self, previous: Dict[str, MasterMissingRecord], updated: Dict[str, MasterMissingRecord],
+                stats: dict, execution_date: str, output_path: str, retries: int, metrics) -> dict:
+        """Write the merged ledger and bump the version stamp (caller holds the lock)"""
+        with metrics.stage("ledger_write") as stage:
+            stage.rows_in += len(updated)
+            if self.partitioned:
+                written = self.write_partitions(previous, updated)
+                stage.rows_out += sum(
+                    1 for r in updated.values()
+                    if self.partition_store.partition_for(r.date_of_service) in written
+                )
+                stage.bytes_written += self.partition_store.size_of(written)
+                stats["file"] = ""
+            else:
+                stats["file"] = self.write_file(updated, output_path, execution_date)
+                stage.rows_out += len(updated)
+                stage.bytes_written += os.path.getsize(stats["file"])
+        
+        stats["version"] = self._bump_version()
+        stats["retries"] = retries
+        return stats
+    
+    def _bump_version(self) -> int:
+        """Increment and persist the ledger version stamp"""
+        version = self.current_version() + 1
+        try:
+            atomic_write_json(self.version_path, {
+                "version": version,
+                "updated_at": datetime.now().isoformat()
+            })
+        except (OSError, PermissionError) as e:
+            logger.warning(f"Cannot write ledger version file {self.version_path}: {e}")
+        return version
+    
+    @contextmanager
+    def _ledger_lock(self):
+        """Hold the inter-process ledger lock (skipped on read-only filesystems)"""
+        try:
+            os.makedirs(self.folder_path, exist_ok=True)
+            lock = FileLock(self.lock_path, timeout=self.lock_timeout)
+            lock.acquire()
+        except (OSError, PermissionError) as e:
+            logger.warning(f"Cannot create ledger lock {self.lock_path}: {e}. Writing without lock.")
+            yield
+            return
+        
+        try:
+            yield
+        finally:
+            lock.release()
+    
     def write_file(self, records: Dict[str, MasterMissingRecord], 
-                   output_path: str, execution_date: str = None) -> None:
+                   output_path: str, execution_date: str = None) -> str:
         """
         Write Master Missing file
         
@@ -134,7 +361,113 @@ class MasterMissingManager:
         if not execution_date:
             execution_date = datetime.now().strftime("%m-%d-%Y")
         
+        actual_output_path = self._save_workbook(records, output_path)
+        
+        # Record the new ledger in the manifest so the next run can find it directly
+        content_hash = file_sha256(actual_output_path)
+        self.manifest.write(actual_output_path, len(records), content_hash, execution_date)
+        
+        # Keep the resident copy in step with what was just written
+        if self.resident_cache_enabled:
+            self._store_cache(actual_output_path, self._as_loaded(records), content_hash)
+        
+        # Return the actual path where file was saved
+        return actual_output_path
+    
+    def load_partitions(self, dates_of_service: Iterable[str], stage=None) -> Dict[str, MasterMissingRecord]:
+        """
+        Load only the ledger partitions the given dates of service map to
+        
+        Args:
+            dates_of_service: Dates of service of the current encounters
+            stage: Optional StageMetrics to record bytes read from disk
+        
+        Returns:
+            Dictionary mapping encounter_key to MasterMissingRecord
+        """
+        partitions = self.partition_store.partitions_for(dates_of_service)
+        if stage is not None:
+            stage.bytes_read += self.partition_store.size_of(partitions)
+        records = self.partition_store.load(partitions)
+        logger.info(f"Loaded {len(records)} records from ledger partitions: {', '.join(partitions)}")
+        return records
+    
+    def partitions_seeded(self) -> bool:
+        """Whether the partition store has taken over from the workbook ledger"""
+        return os.path.exists(self.seed_marker_path) or bool(self.partition_store.list_partitions())
+    
+    def seed_partitions(self) -> int:
+        """
+        Import the latest Master Missing workbook into an empty partition store
+        
+        Runs once per store, the first time partitioned mode writes: the
+        workbook the manifest (or a folder scan) points to is split into
+        partitions and a marker is left in the partition folder, so a ledger
+        emptied later by billed encounters is not imported again.
+        
+        Returns:
+            Number of records imported
+        """
+        if self.partitions_seeded():
+            return 0
+        
+        with self._ledger_lock():
+            if self.partitions_seeded():
+                return 0
+            
+            source = self._find_latest_master_missing_file()
+            records = self.load_previous_file(source) if source else {}
+            if records:
+                self.partition_store.write(records, self.partition_store.partitions_for(
+                    r.date_of_service for r in records.values()
+                ))
+                self._bump_version()
+                logger.info(f"Imported {len(records)} records from {source} into ledger partitions")
+            
+            os.makedirs(self.partition_store.folder_path, exist_ok=True)
+            atomic_write_json(self.seed_marker_path, {
+                "source": os.path.abspath(source) if source else "",
+                "records": len(records),
+                "seeded_at": datetime.now().isoformat()
+            })
+        return len(records)
+    
+    def write_partitions(self, previous_records: Dict[str, MasterMissingRecord],
+                         updated_records: Dict[str, MasterMissingRecord]) -> List[str]:
+        """
+        Rewrite only the ledger partitions whose records changed
+        
+        Returns:
+            List of partitions written
+        """
+        changed = self.partition_store.changed_partitions(previous_records, updated_records)
+        if not changed:
+            logger.info("No ledger partitions changed")
+            return []
+        return self.partition_store.write(updated_records, changed)
+    
+    def export_full_ledger(self, output_path: str) -> str:
+        """
+        Export the full partitioned ledger as a Master Missing workbook
+        
+        Returns:
+            Actual path where the export was saved
+        """
+        records = self.partition_store.load_all()
+        actual_output_path = self._save_workbook(records, output_path)
+        logger.info(f"Exported full Master Missing ledger: {actual_output_path}")
+        return actual_output_path
+    
+    def _save_workbook(self, records: Dict[str, MasterMissingRecord], output_path: str) -> str:
+        """
+        Write records to a Master Missing workbook
+        
+        Returns:
+            Actual path where the workbook was saved (may be /tmp if read-only)
+        """
         # Create workbook
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, PatternFill
         wb = Workbook()
         ws = wb.active
         ws.title = "Data"
@@ -185,15 +518,14 @@ class MasterMissingManager:
             adjusted_width = min(max_length + 2, 50)
             ws.column_dimensions[column_letter].width = adjusted_width
         
-        # Save file (use /tmp if original path is read-only)
+        # Save file atomically so concurrent readers never see a partial workbook
+        # (use /tmp if original path is read-only)
         actual_output_path = output_path
         try:
-            wb.save(output_path)
+            atomic_save_workbook(wb, output_path)
         except (OSError, PermissionError):
             # If we can't write to the original path (read-only filesystem),
             # save to /tmp instead
-            import tempfile
-            import os
             temp_dir = tempfile.gettempdir()
             filename = os.path.basename(output_path)
             temp_path = os.path.join(temp_dir, filename)
@@ -204,11 +536,21 @@ class MasterMissingManager:
         
         logger.info(f"Saved Master Missing file: {actual_output_path} ({len(records)} records)")
         
-        # Return the actual path where file was saved
         return actual_output_path
     
     def _find_latest_master_missing_file(self) -> str:
-        """Find the most recent Master Missing file in the folder"""
+        """
+        Find the most recent Master Missing file
+        
+        Uses the ledger manifest when it is present and fresh, and only falls
+        back to scanning the folder by modification time otherwise.
+        """
+        latest_path = self.manifest.latest_path()
+        if latest_path:
+            return latest_path
+        
+        logger.info("Ledger manifest missing or stale, scanning Master Missing folder")
+        
         if not os.path.exists(self.folder_path):
             return None
         
@@ -228,6 +570,90 @@ class MasterMissingManager:
         
         return os.path.join(self.folder_path, master_files[0])
     
+    def _refresh_manifest(self, file_path: str, record_count: int) -> str:
+        """
+        Write the manifest for a ledger file it does not currently describe
+        
+        Returns:
+            Content hash of the ledger file
+        """
+        entry = self.manifest.read()
+        if (entry and entry["latest_path"] == os.path.abspath(file_path)
+                and self.manifest.is_fresh(entry)):
+            return entry.get("content_hash")
+        
+        content_hash = file_sha256(file_path)
+        run_date = datetime.fromtimestamp(os.path.getmtime(file_path)).strftime("%m-%d-%Y")
+        self.manifest.write(file_path, record_count, content_hash, run_date)
+        return content_hash
+    
+    def _get_cached_records(self, file_path: str) -> Optional[Dict[str, MasterMissingRecord]]:
+        """
+        Return the resident ledger if it still matches the file on disk
+        
+        The cache is invalidated when the file's size or modification time
+        change, or when the manifest reports a different content hash for it.
+        
+        Returns:
+            Shallow copy of the cached records, or None on a cache miss
+        """
+        with self._cache_lock:
+            cache = self._cache
+        
+        if cache is None or cache["path"] != os.path.abspath(file_path):
+            return None
+        
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            stat = None
+        
+        entry = self.manifest.read()
+        hash_changed = (
+            entry is not None
+            and entry["latest_path"] == cache["path"]
+            and entry.get("content_hash") != cache["content_hash"]
+        )
+        
+        if (stat is None or hash_changed
+                or stat.st_size != cache["size"] or stat.st_mtime != cache["mtime"]):
+            logger.info("Resident Master Missing ledger is stale, reloading from disk")
+            self.clear_cache()
+            return None
+        
+        return dict(cache["records"])
+    
+    def _store_cache(self, file_path: str, records: Dict[str, MasterMissingRecord],
+                     content_hash: str) -> None:
+        """Replace the resident ledger with records read from or written to file_path"""
+        stat = os.stat(file_path)
+        with self._cache_lock:
+            self._cache = {
+                "path": os.path.abspath(file_path),
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "content_hash": content_hash,
+                "records": dict(records)
+            }
+    
+    def clear_cache(self) -> None:
+        """Drop the resident ledger so the next load reads from disk"""
+        with self._cache_lock:
+            self._cache = None
+    
+    def _as_loaded(self, records: Dict[str, MasterMissingRecord]) -> Dict[str, MasterMissingRecord]:
+        """
+        Return records keyed exactly as load_previous_file would read them back
+        
+        The written file does not carry the encounter key, so keys are rebuilt
+        from the ledger columns in file order.
+        """
+        loaded = {}
+        for record in sorted(records.values(), key=lambda r: r.date_of_service):
+            key = self._ledger_key(record)
+            loaded[key] = replace(record, encounter_key=key)
+        return loaded
+    
     def _parse_master_missing_row(self, row: tuple, col_map: dict) -> MasterMissingRecord:
         """Parse a row from Master Missing file"""
         def get_value(col_name: str) -> str:
@@ -237,15 +663,32 @@ class MasterMissingManager:
                 return str(value) if value is not None else ""
             return ""
         
-        # Create a temporary encounter to generate the key
-        from .models import Encounter
-        temp_encounter = Encounter(
+        record = MasterMissingRecord(
             patient_name=get_value("Patient Name"),
             dob=get_value("DOB"),
             date_of_service=get_value("Date of Service"),
             type_of_care=get_value("Type of Care"),
             type_of_visit=get_value("Type of Visit"),
             facility=get_value("Facility"),
+            last_attempt_to_process=get_value("Last Attempt to Process"),
+            billed=get_value("Billed"),
+            reason_for_not_billed=get_value("Reason for not billed")
+        )
+        record.encounter_key = self._ledger_key(record)
+        
+        return record
+    
+    @staticmethod
+    def _ledger_key(record: MasterMissingRecord) -> str:
+        """Generate the encounter key for a ledger record from its stored columns"""
+        # Create a temporary encounter to generate the key
+        temp_encounter = Encounter(
+            patient_name=record.patient_name,
+            dob=record.dob,
+            date_of_service=record.date_of_service,
+            type_of_care=record.type_of_care,
+            type_of_visit=record.type_of_visit,
+            facility=record.facility,
             room="",  # Not in Master Missing
             assessment="",  # Not in Master Missing
             cpt="",  # Not in Master Missing
@@ -261,17 +704,4 @@ class MasterMissingManager:
             export_date=""
         )
         
-        record = MasterMissingRecord(
-            patient_name=get_value("Patient Name"),
-            dob=get_value("DOB"),
-            date_of_service=get_value("Date of Service"),
-            type_of_care=get_value("Type of Care"),
-            type_of_visit=get_value("Type of Visit"),
-            facility=get_value("Facility"),
-            last_attempt_to_process=get_value("Last Attempt to Process"),
-            billed=get_value("Billed"),
-            reason_for_not_billed=get_value("Reason for not billed"),
-            encounter_key=temp_encounter.generate_key()
-        )
-        
-        return record
+        return temp_encounter.generate_key()
@@ -0,0 +1,268 @@
+"""
+Metrics - Per-stage instrumentation for reconciliation runs
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List
+from .models import key_hash_count
+import threading
+import time
+import tracemalloc
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets (seconds) for stage and run durations
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# tracemalloc is process-wide: concurrent runs share one trace, stopped by the last to finish
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+
+
+@dataclass
+class StageMetrics:
+    """Metrics for one stage of a run (accumulated if the stage runs per chunk)"""
+    name: str
+    duration_seconds: float = 0.0
+    rows_in: int = 0
+    rows_out: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    hash_count: int = 0
+    peak_memory_bytes: int = 0
+    calls: int = 0
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return asdict(self)
+
+
+class RunMetrics:
+    """
+    Collects stage metrics for a single run
+
+    Usage:
+        metrics = RunMetrics(trace_memory=True)
+        with metrics.stage("parse") as stage:
+            ...
+            stage.rows_out += len(encounters)
+
+    Entering the same stage again (e.g. once per chunk) accumulates into the
+    same StageMetrics. When trace_memory is set, tracemalloc is started for
+    the duration of the run and each stage records its peak traced memory
+    (with concurrent runs the peak covers every run in the process).
+    An optional listener is called with the stage's accumulated metrics every
+    time a stage exits, which drives progress reporting.
+    """
+
+    def __init__(self, trace_memory: bool = False, listener: Callable[[StageMetrics], None] = None):
+        """Initialize an empty metrics collection"""
+        self.trace_memory = trace_memory
+        self.listener = listener
+        self.stages: Dict[str, StageMetrics] = {}
+        self._started_tracing = False
+
+    def start(self) -> None:
+        """Start memory tracing if requested and not already active"""
+        global _tracing_runs
+        if not self.trace_memory or self._started_tracing:
+            return
+        with _tracing_lock:
+            if _tracing_runs == 0 and tracemalloc.is_tracing():
+                return  # Traced by someone else (e.g. a profiler); leave it alone
+            if _tracing_runs == 0:
+                tracemalloc.start()
+            _tracing_runs += 1
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        """Stop memory tracing once no run that started it is still active"""
+        global _tracing_runs
+        if not self._started_tracing:
+            return
+        with _tracing_lock:
+            _tracing_runs -= 1
+            if _tracing_runs == 0:
+                tracemalloc.stop()
+            self._started_tracing = False
+
+    def stage_metrics(self, name: str) -> StageMetrics:
+        """Return the accumulated metrics of a stage, creating it if needed"""
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageMetrics(name)
+        return stage
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage and record its hash count and peak memory"""
+        stage = self.stage_metrics(name)
+
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing and _tracing_runs <= 1:
+            # Resetting the shared peak would cut short another run's stage
+            tracemalloc.reset_peak()
+        hashes_before = key_hash_count()
+        started = time.perf_counter()
+
+        try:
+            yield stage
+        finally:
+            stage.duration_seconds += time.perf_counter() - started
+            stage.hash_count += key_hash_count() - hashes_before
+            stage.calls += 1
+            if tracing:
+                stage.peak_memory_bytes = max(stage.peak_memory_bytes, tracemalloc.get_traced_memory()[1])
+            if self.listener:
+                try:
+                    self.listener(stage)
+                except Exception as e:
+                    logger.warning(f"Stage listener failed for {name}: {e}")
+
+    @property
+    def peak_memory_bytes(self) -> int:
+        """Highest peak traced memory across all stages"""
+        return max((s.peak_memory_bytes for s in self.stages.values()), default=0)
+
+    def to_list(self) -> List[dict]:
+        """Return stage metrics as a list of dictionaries, in execution order"""
+        return [stage.to_dict() for stage in self.stages.values()]
+
+
+class NullMetrics:
+    """Metrics sink used when a caller does not collect metrics"""
+
+    @contextmanager
+    def stage(self, name: str):
+        yield StageMetrics(name)
+
+
+class _Histogram:
+    """Cumulative histogram in Prometheus layout"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Process-wide aggregation of run metrics, rendered in Prometheus text format
+
+    Stage durations and run durations are histograms across runs; rows, bytes
+    and hash counts are counters; peak memory is a gauge of the latest run.
+    Callers can add their own gauges, counters and duration histograms
+    (e.g. admission queue depth, rejections and wait time).
+    """
+
+    COUNTER_FIELDS = ("rows_in", "rows_out", "bytes_read", "bytes_written", "hash_count")
+
+    def __init__(self, prefix: str = "ice_reconciliation"):
+        """Initialize empty registry"""
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._run_duration = _Histogram(DURATION_BUCKETS)
+        self._stage_durations: Dict[str, _Histogram] = {}
+        self._stage_counters: Dict[str, Dict[str, int]] = {}
+        self._stage_peak_memory: Dict[str, int] = {}
+        self._gauges: Dict[str, float] = {}
+        self._counters: Dict[str, float] = {}
+        self._histograms: Dict[str, _Histogram] = {}
+
+    def observe_run(self, summary) -> None:
+        """Record the stage metrics of a completed run (an ExecutionSummary)"""
+        with self._lock:
+            self._runs += 1
+            self._run_duration.observe(summary.duration_seconds)
+            for stage in summary.stages:
+                name = stage["name"]
+                self._stage_durations.setdefault(name, _Histogram(DURATION_BUCKETS)).observe(stage["duration_seconds"])
+                counters = self._stage_counters.setdefault(name, dict.fromkeys(self.COUNTER_FIELDS, 0))
+                for field_name in self.COUNTER_FIELDS:
+                    counters[field_name] += stage[field_name]
+                self._stage_peak_memory[name] = stage["peak_memory_bytes"]
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set an additional gauge (e.g. queue depth)"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        """Increase an additional counter (rendered with a _total suffix)"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a duration in an additional histogram (e.g. queue wait time)"""
+        with self._lock:
+            self._histograms.setdefault(name, _Histogram(DURATION_BUCKETS)).observe(seconds)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        p = self.prefix
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {p}_runs_total Completed reconciliation runs")
+            lines.append(f"# TYPE {p}_runs_total counter")
+            lines.append(f"{p}_runs_total {self._runs}")
+
+            lines.append(f"# HELP {p}_run_duration_seconds Reconciliation run duration")
+            lines.append(f"# TYPE {p}_run_duration_seconds histogram")
+            lines.extend(self._histogram_lines(f"{p}_run_duration_seconds", self._run_duration, ""))
+
+            lines.append(f"# HELP {p}_stage_duration_seconds Reconciliation stage duration")
+            lines.append(f"# TYPE {p}_stage_duration_seconds histogram")
+            for name, histogram in sorted(self._stage_durations.items()):
+                lines.extend(self._histogram_lines(f"{p}_stage_duration_seconds", histogram, f'stage="{name}"'))
+
+            for field_name in self.COUNTER_FIELDS:
+                metric = f"{p}_stage_{field_name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for name, counters in sorted(self._stage_counters.items()):
+                    lines.append(f'{metric}{{stage="{name}"}} {counters[field_name]}')
+
+            metric = f"{p}_stage_peak_memory_bytes"
+            lines.append(f"# HELP {metric} Peak traced memory of the stage in the latest run")
+            lines.append(f"# TYPE {metric} gauge")
+            for name, value in sorted(self._stage_peak_memory.items()):
+                lines.append(f'{metric}{{stage="{name}"}} {value}')
+
+            for name, value in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {p}_{name} gauge")
+                lines.append(f"{p}_{name} {value}")
+
+            for name, value in sorted(self._counters.items()):
+                lines.append(f"# TYPE {p}_{name}_total counter")
+                lines.append(f"{p}_{name}_total {value}")
+
+            for name, histogram in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {p}_{name} histogram")
+                lines.extend(self._histogram_lines(f"{p}_{name}", histogram, ""))
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(metric: str, histogram: _Histogram, labels: str) -> List[str]:
+        """Render one histogram's bucket, sum and count lines"""
+        sep = "," if labels else ""
+        lines = [
+            f'{metric}_bucket{{{labels}{sep}le="{bound}"}} {count}'
+            for bound, count in zip(histogram.buckets, histogram.counts)
+        ]
+        lines.append(f'{metric}_bucket{{{labels}{sep}le="+Inf"}} {histogram.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{metric}_sum{suffix} {histogram.total}")
+        lines.append(f"{metric}_count{suffix} {histogram.count}")
+        return lines
@@ -5,13 +5,31 @@ Mock EBS Integration - Simulates billing evaluation business rules
 from typing import List
 from .models import Encounter, BillingResult
 
+# Business rules, checked in order: an encounter missing the field is not
+# billed for the reason. Built once at import and shared by every run.
+BILLING_RULES = (
+    ("assessment", "Missing DX"),  # Diagnosis code
+    ("cpt", "Missing CPT"),
+    ("facility", "Invalid Facility"),
+    ("servicing_provider", "Provider Mismatch"),
+    ("supervising_provider", "Provider Mismatch"),
+)
+
 
 class MockEBS:
     """
     Mock EBS class that simulates billing evaluation
     Returns billing results based on business rules without actual EBS integration
+    
+    The rules are stateless; an instance only holds the claim counter of one
+    run. ReconciliationOrchestrator creates one per run, so concurrent runs
+    number their claims independently and never share a counter.
     """
     
+    # Bump whenever BILLING_RULES change, so cached run results
+    # produced under the old rules are not reused
+    RULES_VERSION = "1"
+    
     def __init__(self):
         """Initialize mock EBS"""
         self.call_count = 0
@@ -30,54 +48,28 @@ class MockEBS:
         self.call_count += 1
         encounter_key = encounter.generate_key()
         
-        # Check for missing diagnosis code (Assessment)
-        if not encounter.assessment or encounter.assessment.strip() == "":
-            return BillingResult(
-                encounter_key=encounter_key,
-                success=False,
-                reason="Missing DX"
-            )
-        
-        # Check for missing CPT code
-        if not encounter.cpt or encounter.cpt.strip() == "":
-            return BillingResult(
-                encounter_key=encounter_key,
-                success=False,
-                reason="Missing CPT"
-            )
-        
-        # Check for invalid/empty facility
-        if not encounter.facility or encounter.facility.strip() == "":
-            return BillingResult(
-                encounter_key=encounter_key,
-                success=False,
-                reason="Invalid Facility"
-            )
-        
-        # Check for missing servicing provider
-        if not encounter.servicing_provider or encounter.servicing_provider.strip() == "":
-            return BillingResult(
-                encounter_key=encounter_key,
-                success=False,
-                reason="Provider Mismatch"
-            )
-        
-        # Check for missing supervising provider
-        if not encounter.supervising_provider or encounter.supervising_provider.strip() == "":
-            return BillingResult(
-                encounter_key=encounter_key,
-                success=False,
-                reason="Provider Mismatch"
-            )
+        for field_name, reason in BILLING_RULES:
+            value = getattr(encounter, field_name)
+            if not value or not value.strip():
+                return BillingResult(
+                    encounter_key=encounter_key,
+                    success=False,
+                    reason=reason
+                )
         
         # All checks passed - billing successful
         return BillingResult(
             encounter_key=encounter_key,
             success=True,
             reason="",
-            claim_id=f"CLAIM-{self.call_count:06d}"
+            claim_id=self.format_claim_id(self.call_count)
         )
     
+    @staticmethod
+    def format_claim_id(call_number: int) -> str:
+        """Format the claim ID issued by the given evaluation call"""
+        return f"CLAIM-{call_number:06d}"
+    
     def batch_evaluate(self, encounters: List[Encounter]) -> List[BillingResult]:
         """
         Evaluate multiple encounters in batch
@@ -2,10 +2,19 @@
 Data models for ICE Reconciliation System
 """
 
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields, asdict
 from datetime import datetime
 from typing import Optional
 import hashlib
+import threading
+
+# Per-thread count of encounter key hashes, read by the metrics collector
+_hash_stats = threading.local()
+
+
+def key_hash_count() -> int:
+    """Return the number of encounter keys hashed so far on this thread"""
+    return getattr(_hash_stats, "count", 0)
 
 
 @dataclass
@@ -61,7 +70,17 @@ class Encounter:
         )
     
     def generate_key(self) -> str:
-        """Generate unique encounter key using SHA-256 hash"""
+        """
+        Generate unique encounter key using SHA-256 hash
+        
+        The key is computed once per encounter and memoized, since billing,
+        the reconciliation output and the ledger delta all look it up.
+        Encounters are treated as immutable once parsed.
+        """
+        key = self.__dict__.get("_key")
+        if key is not None:
+            return key
+        
         # Normalize components
         patient = self._normalize_string(self.patient_name)
         dob = self._normalize_date(self.dob)
@@ -73,7 +92,14 @@ class Encounter:
         key_string = f"{patient}_{dob}_{dos}_{facility}_{cpt}"
         
         # Generate SHA-256 hash
-        return hashlib.sha256(key_string.encode()).hexdigest()
+        _hash_stats.count = key_hash_count() + 1
+        key = self.__dict__["_key"] = hashlib.sha256(key_string.encode()).hexdigest()
+        return key
+    
+    def row_fingerprint(self) -> str:
+        """Return a short hash of every field, used to detect changed rows between exports"""
+        row_string = "\x1f".join(str(getattr(self, f.name)) for f in fields(self))
+        return hashlib.blake2b(row_string.encode(), digest_size=8).hexdigest()
     
     @staticmethod
     def _normalize_string(value: Optional[str]) -> str:
@@ -191,11 +217,29 @@ class ExecutionSummary:
     success_rate: float = 0.0
     execution_date: str = ""
     input_file: str = ""
+    input_sha256: str = ""
     general_reconciliation_file: str = ""
     master_missing_file: str = ""
     master_missing_added: int = 0
     master_missing_updated: int = 0
     master_missing_removed: int = 0
+    master_missing_version: int = 0
+    master_missing_retries: int = 0
+    streaming: bool = False
+    chunk_size: int = 0
+    peak_memory_bytes: int = 0
+    duration_seconds: float = 0.0
+    cache_hit: bool = False
+    dry_run: bool = False
+    date_partitions: int = 0  # Distinct dates of service of a run partitioned by date
+    resumed_rows: int = 0  # Billing results reused from an interrupted run's checkpoint
+    general_reconciliation_by_date: dict = field(default_factory=dict)  # Date of service -> file
+    rows_new: int = 0
+    rows_changed: int = 0
+    rows_unchanged: int = 0
+    rows_vanished: int = 0
+    evaluation_speedup: float = 0.0  # Rows in the export per row actually evaluated
+    stages: list = field(default_factory=list)  # Per-stage metrics (see metrics.StageMetrics)
     
     def to_dict(self):
         """Convert to dictionary"""
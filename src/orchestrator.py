@@ -2,25 +2,33 @@
 Reconciliation Orchestrator - Coordinates the complete reconciliation workflow
 """
 
+import hashlib
 import json
 import os
+import re
 from datetime import datetime
-from typing import Tuple
+from typing import BinaryIO, Callable, Tuple, Union
 import logging
 
 from .models import ExecutionSummary
 from .file_parser import ExcelFileParser
 from .mock_ebs import MockEBS
-from .reconciliation_generator import GeneralReconciliationGenerator
+from .reconciliation_generator import GeneralReconciliationGenerator, PreviewBuffer
+from .result_rows import ResultRowWriter
 from .master_missing_manager import MasterMissingManager
+from .metrics import RunMetrics, NullMetrics
+from .run_cache import RunResultCache
+from .row_index import RowIndex, RowDiff
+from .partitioning import PartitionedEvaluator
+from .checkpoint import RunCheckpoint
+from .file_utils import file_sha256
+from .config import load_config
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging is configured by the entry points (CLI, web app, workers; see config.configure_logging)
 logger = logging.getLogger(__name__)
 
+DEFAULT_CHUNK_SIZE = 5000
+
 
 class ReconciliationOrchestrator:
     """
@@ -42,8 +50,9 @@ class ReconciliationOrchestrator:
         self.config = self._load_config(config_path)
         
         # Initialize components
+        # Components are shared by concurrent runs and hold configuration only;
+        # per-run state (the Mock EBS claim counter, metrics, checkpoints) is created in run()
         self.parser = ExcelFileParser(self.config.get("input", {}))
-        self.mock_ebs = MockEBS()
         self.reconciliation_gen = GeneralReconciliationGenerator(self.config.get("output", {}))
         
         # Initialize master missing manager with absolute path
@@ -51,6 +60,10 @@ class ReconciliationOrchestrator:
         master_missing_config["folderPath"] = self._resolve_path(
             master_missing_config.get("folderPath", "data/output")
         )
+        if master_missing_config.get("partitionFolderPath"):
+            master_missing_config["partitionFolderPath"] = self._resolve_path(
+                master_missing_config["partitionFolderPath"]
+            )
         self.master_missing_mgr = MasterMissingManager(master_missing_config)
         
         # Create output directories if they don't exist (may fail in read-only environments like Vercel)
@@ -62,17 +75,79 @@ class ReconciliationOrchestrator:
             # This is OK - we'll use /tmp for output files instead
             logger.warning(f"Cannot create output directory {output_folder}: {e}. Will use /tmp for outputs.")
             # Don't fail - we'll handle this in file writing
+        
+        # Run result cache (skips re-processing identical input against an unchanged ledger)
+        run_cache_config = self.config.get("runCache", {})
+        self.run_cache = None
+        if run_cache_config.get("enabled", True):
+            self.run_cache = RunResultCache(self._resolve_path(
+                run_cache_config.get("folderPath", os.path.join(output_folder, ".run_cache"))
+            ))
+        self.config_hash = hashlib.sha256(json.dumps(
+            {"config": self.config, "rules": MockEBS.RULES_VERSION}, sort_keys=True
+        ).encode()).hexdigest()
+        
+        # Date-of-service partitioning (processing.parallel is the deprecated name of the section)
+        processing_config = self.config.get("processing", {})
+        self.partition_config = processing_config.get("partitionByDate")
+        if self.partition_config is None and "parallel" in processing_config:
+            logger.warning("processing.parallel is deprecated, rename it to processing.partitionByDate")
+            self.partition_config = processing_config["parallel"]
+        self.partition_config = self.partition_config or {}
+        
+        # Row fingerprint index of the previous export (only changed rows are re-evaluated)
+        self.row_index = None
+        if self.config.get("processing", {}).get("deltaIngestion", False):
+            self.row_index = RowIndex(os.path.join(output_folder, ".row_index.sqlite3"))
     
-    def run(self, input_file_path: str) -> Tuple[ExecutionSummary, dict]:
+    def run(self, input_file_path: Union[str, BinaryIO], streaming: bool = None, force: bool = False,
+            dry_run: bool = False, partition_by_date: bool = None,
+            resume: bool = False, progress: Callable[[dict], None] = None,
+            preview: PreviewBuffer = None,
+            row_store: ResultRowWriter = None,
+            input_sha256: str = None) -> Tuple[ExecutionSummary, dict]:
         """
         Execute complete reconciliation workflow
         
         Args:
-            input_file_path: Path to ICE export Excel file
+            input_file_path: Path to ICE export Excel file, or a seekable
+                binary file object holding it (e.g. a spooled upload; its
+                name attribute is reported as the input file)
+            streaming: Process the file in bounded-memory chunks (defaults to
+                processing.streaming in config)
+            force: Recompute even if an identical run is cached, and evaluate
+                every row instead of carrying forward unchanged rows
+            dry_run: Summary only - parse, evaluate and compute the ledger
+                changes in memory without writing any workbook or the ledger
+            partition_by_date: Partition the run by date of service, counting
+                the dates and writing per-date files when
+                processing.partitionByDate.perDateOutputs is set (defaults to
+                processing.partitionByDate.enabled in config)
+            resume: Reuse the billing results checkpointed by an interrupted
+                run of the same input (processing.checkpoint.enabled)
+            progress: Called with a stage's accumulated metrics (StageMetrics
+                dict: name, rows_in, rows_out, ...) each time a stage, or a
+                chunk of it, completes
+            preview: Filled with the first General Reconciliation rows and
+                not-billed samples as they are generated (left empty when the
+                run is served from the run cache)
+            row_store: Receives every General Reconciliation row as it is
+                generated (also in dry runs; left empty on a run cache hit).
+                The caller closes it.
+            input_sha256: SHA-256 of the input if already known (e.g. hashed
+                while it was uploaded), saving a pass over the file
         
         Returns:
             Tuple of (ExecutionSummary, output_files_dict)
         """
+        processing_config = self.config.get("processing", {})
+        checkpoint_config = processing_config.get("checkpoint", {})
+        chunk_size = processing_config.get("chunkSize", DEFAULT_CHUNK_SIZE)
+        if streaming is None:
+            streaming = processing_config.get("streaming", False)
+        if partition_by_date is None:
+            partition_by_date = self.partition_config.get("enabled", False)
+        
         logger.info("="*60)
         logger.info("Starting ICE Reconciliation Process")
         logger.info("="*60)
@@ -83,13 +158,64 @@ class ReconciliationOrchestrator:
         # Initialize summary
         summary = ExecutionSummary(
             execution_date=execution_date,
-            input_file=input_file_path
+            input_file=self._input_name(input_file_path),
+            dry_run=dry_run
         )
         
+        # Streaming runs always report peak memory; batch runs only when configured
+        metrics = RunMetrics(
+            trace_memory=streaming or self.config.get("metrics", {}).get("traceMemory", False),
+            listener=(lambda stage: progress(stage.to_dict())) if progress else None
+        )
+        metrics.start()
+        mock_ebs = MockEBS()
+        evaluator = None
+        checkpoint = None
+        row_diff = None
+        checkpointing = checkpoint_config.get("enabled", False) and not dry_run
+        
         try:
+            if (self.run_cache or checkpointing) and not dry_run:
+                with metrics.stage("fingerprint") as stage:
+                    stage.bytes_read = self._file_size(input_file_path)
+                    summary.input_sha256 = input_sha256 or file_sha256(input_file_path)
+                    cached = None
+                    if self.run_cache and not force:
+                        cached = self.run_cache.get(self._run_fingerprint(
+                            summary.input_sha256, self.master_missing_mgr.current_version(), execution_date
+                        ))
+                if cached:
+                    logger.info(f"Input unchanged since last run ({summary.input_sha256[:12]}), returning cached results")
+                    return self._cached_result(cached, summary.input_file, start_time, metrics)
+            
+            if self.row_index:
+                row_diff = RowDiff(self.row_index.begin(self.config_hash, fresh=force))
+            
+            if partition_by_date:
+                evaluator = PartitionedEvaluator(mock_ebs)
+            
+            if checkpointing:
+                checkpoint = RunCheckpoint(
+                    self._checkpoint_path(summary.input_sha256, checkpoint_config),
+                    checkpoint_config.get("chunkSize", chunk_size)
+                )
+                checkpoint.open(mock_ebs, resume)
+            
+            if streaming:
+                if evaluator and self.partition_config.get("perDateOutputs", False):
+                    logger.warning("Per-date output files are not written in streaming mode")
+                return self._run_streaming(
+                    input_file_path, summary, start_time, metrics, mock_ebs,
+                    chunk_size, row_diff, evaluator, checkpoint, preview, row_store
+                )
+            
             # Step 1: Parse input file
-            logger.info(f"Step 1: Parsing input file: {input_file_path}")
-            encounters, parse_errors = self.parser.parse_file(input_file_path)
+            logger.info(f"Step 1: Parsing input file: {summary.input_file}")
+            with metrics.stage("parse") as stage:
+                stage.bytes_read = self._file_size(input_file_path)
+                encounters, parse_errors = self.parser.parse_file(self._rewind(input_file_path))
+                stage.rows_in = len(encounters) + len(parse_errors)
+                stage.rows_out = len(encounters)
             
             if parse_errors:
                 logger.warning(f"Found {len(parse_errors)} parsing errors")
@@ -105,7 +231,10 @@ class ReconciliationOrchestrator:
             
             # Step 2: Evaluate billing (Mock EBS)
             logger.info(f"Step 2: Evaluating billing for {len(encounters)} encounters")
-            billing_results = self.mock_ebs.batch_evaluate(encounters)
+            with metrics.stage("billing") as stage:
+                billing_results = self._evaluate(encounters, mock_ebs, row_diff, evaluator, checkpoint)
+                stage.rows_in = len(encounters)
+                stage.rows_out = len(billing_results)
             
             # Count results
             summary.billed_count = sum(1 for r in billing_results if r.success)
@@ -115,71 +244,364 @@ class ReconciliationOrchestrator:
             logger.info(f"Billing Results: {summary.billed_count} billed, {summary.not_billed_count} not billed ({summary.success_rate:.1f}% success)")
             
             # Step 3: Generate General Reconciliation file
-            logger.info("Step 3: Generating General Reconciliation file")
-            
-            reconciliation_filename = f"General Reconciliation {execution_date}.xlsx"
-            output_folder = self._resolve_path(self.config.get("output", {}).get("folderPath", "data/output"))
-            reconciliation_path = os.path.join(output_folder, reconciliation_filename)
-            
-            # Generate file and get actual path (may be /tmp if read-only)
-            actual_reconciliation_path = self.reconciliation_gen.generate(encounters, billing_results, reconciliation_path, execution_date)
-            summary.general_reconciliation_file = actual_reconciliation_path
-            logger.info(f"Created: {actual_reconciliation_path}")
+            if dry_run:
+                logger.info("Step 3: Dry run, skipping General Reconciliation file")
+                for sink in (preview, row_store):
+                    if sink is not None:
+                        sink.fill(encounters, billing_results)
+            else:
+                logger.info("Step 3: Generating General Reconciliation file")
+                
+                reconciliation_path = self._reconciliation_path(execution_date)
+                
+                # Generate file and get actual path (may be /tmp if read-only)
+                with metrics.stage("reconciliation_write") as stage:
+                    actual_reconciliation_path = self.reconciliation_gen.generate(
+                        encounters, billing_results, reconciliation_path, execution_date, preview, row_store
+                    )
+                    stage.rows_in = stage.rows_out = len(encounters)
+                    stage.bytes_written = self._file_size(actual_reconciliation_path)
+                summary.general_reconciliation_file = actual_reconciliation_path
+                logger.info(f"Created: {actual_reconciliation_path}")
+                
+                if evaluator and self.partition_config.get("perDateOutputs", False):
+                    with metrics.stage("reconciliation_write_by_date") as stage:
+                        summary.general_reconciliation_by_date = self._write_per_date(
+                            evaluator, encounters, billing_results, execution_date
+                        )
+                        stage.rows_in = stage.rows_out = len(encounters)
+                        stage.bytes_written = sum(map(self._file_size, summary.general_reconciliation_by_date.values()))
             
             # Step 4: Update Master Missing file
             logger.info("Step 4: Updating Master Missing file")
             
-            # Load previous Master Missing
-            previous_master_missing = self.master_missing_mgr.load_previous_file()
-            logger.info(f"Loaded {len(previous_master_missing)} previous Master Missing records")
+            with metrics.stage("ledger_delta") as stage:
+                delta = self.master_missing_mgr.build_delta(encounters, billing_results, execution_date)
+                stage.rows_in = len(encounters)
+                stage.rows_out = len(delta)
+            self._update_master_missing(delta, summary, metrics)
+            self._finish_row_diff(row_diff, summary)
+            if checkpoint:
+                checkpoint.complete()
             
-            # Update with current results
-            updated_master_missing, stats = self.master_missing_mgr.update_with_results(
-                previous_master_missing,
-                encounters,
-                billing_results,
-                execution_date
-            )
+            # Step 5: Generate execution summary
+            return self._complete(summary, start_time)
             
-            summary.master_missing_added = stats["added"]
-            summary.master_missing_updated = stats["updated"]
-            summary.master_missing_removed = stats["removed"]
+        except Exception as e:
+            logger.error(f"Error during reconciliation: {e}", exc_info=True)
+            raise
+        finally:
+            if checkpoint:
+                summary.resumed_rows = checkpoint.restored_used
+            if evaluator:
+                summary.date_partitions = evaluator.partition_count
+            if row_diff:
+                row_diff.close()
+            metrics.stop()
+            summary.stages = metrics.to_list()
+            if metrics.trace_memory:
+                summary.peak_memory_bytes = metrics.peak_memory_bytes
+    
+    def _run_streaming(self, input_file_path: Union[str, BinaryIO], summary: ExecutionSummary,
+                       start_time: datetime, metrics: RunMetrics, mock_ebs: MockEBS,
+                       chunk_size: int, row_diff: RowDiff = None,
+                       evaluator: PartitionedEvaluator = None,
+                       checkpoint: RunCheckpoint = None,
+                       preview: PreviewBuffer = None,
+                       row_store: ResultRowWriter = None) -> Tuple[ExecutionSummary, dict]:
+        """
+        Execute the workflow as a bounded-memory pipeline
+        
+        Fixed-size chunks flow through parse -> evaluate -> write Data rows ->
+        ledger delta. Only the Summary sheet aggregates and the ledger delta
+        accumulate across chunks; peak traced memory is reported in the summary.
+        """
+        execution_date = summary.execution_date
+        summary.streaming = True
+        summary.chunk_size = chunk_size
+        
+        logger.info(f"Streaming input file in chunks of {chunk_size}: {summary.input_file}")
+        
+        writer = None if summary.dry_run else self.reconciliation_gen.open_stream(
+            self._reconciliation_path(execution_date), preview, row_store
+        )
+        chunks = self.parser.iter_chunks(self._rewind(input_file_path), chunk_size)
+        delta = []
+        parse_error_count = 0
+        chunk_count = 0
+        metrics.stage_metrics("parse").bytes_read = self._file_size(input_file_path)
+        
+        while True:
+            with metrics.stage("parse") as stage:
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    stage.rows_in += len(chunk[0]) + len(chunk[1])
+                    stage.rows_out += len(chunk[0])
+            if chunk is None:
+                break
             
-            # Write updated Master Missing file
-            master_missing_filename = f"Master Missing to {execution_date}.xlsx"
-            master_missing_folder = self._resolve_path(self.config.get("masterMissing", {}).get("folderPath", "data/output"))
-            master_missing_path = os.path.join(master_missing_folder, master_missing_filename)
+            encounters, parse_errors = chunk
+            chunk_count += 1
+            for error in parse_errors[:max(0, 5 - parse_error_count)]:  # Show first 5
+                logger.warning(f"  {error}")
+            parse_error_count += len(parse_errors)
             
-            # Write file and get actual path (may be /tmp if read-only)
-            actual_master_missing_path = self.master_missing_mgr.write_file(updated_master_missing, master_missing_path, execution_date)
-            summary.master_missing_file = actual_master_missing_path
-            logger.info(f"Created: {actual_master_missing_path}")
-            logger.info(f"Master Missing: {len(updated_master_missing)} total records (Added: {stats['added']}, Updated: {stats['updated']}, Removed: {stats['removed']})")
+            if not encounters:
+                continue
             
-            # Step 5: Generate execution summary
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
-            
-            logger.info("="*60)
-            logger.info("Reconciliation Process Complete")
-            logger.info(f"Total encounters: {summary.total_encounters}")
-            logger.info(f"Billed: {summary.billed_count} ({summary.success_rate:.1f}%)")
-            logger.info(f"Not billed: {summary.not_billed_count}")
-            logger.info(f"Execution time: {duration:.2f} seconds")
-            logger.info("="*60)
-            
-            # Use actual paths (may be /tmp if read-only filesystem)
-            output_files = {
-                "general_reconciliation": summary.general_reconciliation_file,
-                "master_missing": summary.master_missing_file
-            }
-            logger.info(f"Returning output files with actual paths: {output_files}")
+            with metrics.stage("billing") as stage:
+                billing_results = self._evaluate(encounters, mock_ebs, row_diff, evaluator, checkpoint)
+                stage.rows_in += len(encounters)
+                stage.rows_out += len(billing_results)
             
-            return summary, output_files
+            if writer:
+                with metrics.stage("reconciliation_write") as stage:
+                    writer.write_rows(encounters, billing_results)
+                    stage.rows_in += len(encounters)
+                    stage.rows_out += len(encounters)
+            else:
+                for sink in (preview, row_store):
+                    if sink is not None:
+                        sink.fill(encounters, billing_results)
             
-        except Exception as e:
-            logger.error(f"Error during reconciliation: {e}", exc_info=True)
-            raise
+            with metrics.stage("ledger_delta") as stage:
+                chunk_delta = self.master_missing_mgr.build_delta(encounters, billing_results, execution_date)
+                delta.extend(chunk_delta)
+                stage.rows_in += len(encounters)
+                stage.rows_out += len(chunk_delta)
+            
+            summary.total_encounters += len(encounters)
+            summary.billed_count += sum(1 for r in billing_results if r.success)
+            logger.info(f"Chunk {chunk_count}: {summary.total_encounters} encounters processed")
+        
+        if parse_error_count:
+            logger.warning(f"Found {parse_error_count} parsing errors")
+        
+        if not summary.total_encounters:
+            logger.error("No encounters to process")
+            return summary, {}
+        
+        summary.not_billed_count = summary.total_encounters - summary.billed_count
+        summary.success_rate = summary.billed_count / summary.total_encounters * 100
+        logger.info(f"Billing Results: {summary.billed_count} billed, {summary.not_billed_count} not billed ({summary.success_rate:.1f}% success)")
+        
+        if writer:
+            with metrics.stage("reconciliation_write") as stage:
+                summary.general_reconciliation_file = writer.close()
+                stage.bytes_written = self._file_size(summary.general_reconciliation_file)
+            logger.info(f"Created: {summary.general_reconciliation_file}")
+        
+        self._update_master_missing(delta, summary, metrics)
+        self._finish_row_diff(row_diff, summary)
+        if checkpoint:
+            checkpoint.complete()
+        
+        logger.info(f"Peak traced memory: {metrics.peak_memory_bytes / (1024 * 1024):.1f} MB")
+        
+        return self._complete(summary, start_time)
+    
+    def _evaluate(self, encounters: list, mock_ebs: MockEBS, row_diff: RowDiff = None,
+                  evaluator: PartitionedEvaluator = None, checkpoint: RunCheckpoint = None) -> list:
+        """
+        Evaluate billing
+        
+        Results of unchanged rows are carried forward when delta ingestion is
+        on, and the dates of service evaluated are counted when the run is
+        partitioned. With checkpointing, results
+        restored from an interrupted run are reused and every evaluated chunk
+        is checkpointed.
+        """
+        batch_evaluate = evaluator.batch_evaluate if evaluator else mock_ebs.batch_evaluate
+        if checkpoint:
+            batch_evaluate = checkpoint.wrap(batch_evaluate, mock_ebs)
+        if row_diff is None:
+            return batch_evaluate(encounters)
+        return row_diff.evaluate(encounters, batch_evaluate)
+    
+    def _write_per_date(self, evaluator: PartitionedEvaluator, encounters: list,
+                        billing_results: list, execution_date: str) -> dict:
+        """Write a General Reconciliation file per date of service alongside the combined one"""
+        base_path = self._reconciliation_path(execution_date)[:-len(".xlsx")]
+        output_paths = {
+            dos: f"{base_path} DOS {re.sub(r'[^0-9A-Za-z-]', '_', dos) or 'undated'}.xlsx"
+            for dos in evaluator.partition(encounters)
+        }
+        paths = evaluator.write_per_date(
+            encounters, billing_results, output_paths, self.config.get("output", {}), execution_date
+        )
+        logger.info(f"Created {len(paths)} per-date General Reconciliation files")
+        return paths
+    
+    def _finish_row_diff(self, row_diff: RowDiff, summary: ExecutionSummary) -> None:
+        """Report the row-level diff and store the current rows as the next run's index"""
+        if row_diff is None:
+            return
+        
+        summary.rows_new = row_diff.new_count
+        summary.rows_changed = row_diff.changed_count
+        summary.rows_unchanged = row_diff.unchanged_count
+        summary.rows_vanished = row_diff.vanished_count
+        summary.evaluation_speedup = summary.total_encounters / max(row_diff.evaluated_count, 1)
+        
+        logger.info(f"Row diff: {summary.rows_new} new, {summary.rows_changed} changed, "
+                    f"{summary.rows_unchanged} unchanged, {summary.rows_vanished} vanished "
+                    f"({summary.evaluation_speedup:.1f}x fewer evaluations)")
+        
+        if not summary.dry_run:
+            row_diff.commit()
+    
+    def _complete(self, summary: ExecutionSummary, start_time: datetime) -> Tuple[ExecutionSummary, dict]:
+        """Log the execution summary and return it with the output file paths"""
+        end_time = datetime.now()
+        duration = (end_time - start_time).total_seconds()
+        summary.duration_seconds = duration
+        
+        logger.info("="*60)
+        logger.info("Reconciliation Process Complete")
+        logger.info(f"Total encounters: {summary.total_encounters}")
+        logger.info(f"Billed: {summary.billed_count} ({summary.success_rate:.1f}%)")
+        logger.info(f"Not billed: {summary.not_billed_count}")
+        logger.info(f"Execution time: {duration:.2f} seconds")
+        logger.info("="*60)
+        
+        # Use actual paths (may be /tmp if read-only filesystem)
+        output_files = {
+            "general_reconciliation": summary.general_reconciliation_file,
+            "master_missing": summary.master_missing_file
+        }
+        if summary.general_reconciliation_by_date:
+            output_files["general_reconciliation_by_date"] = summary.general_reconciliation_by_date
+        logger.info(f"Returning output files with actual paths: {output_files}")
+        
+        if self.run_cache and summary.input_sha256:
+            self.run_cache.put(
+                self._run_fingerprint(summary.input_sha256, summary.master_missing_version, summary.execution_date),
+                summary,
+                output_files
+            )
+        
+        return summary, output_files
+    
+    def _run_fingerprint(self, input_sha256: str, ledger_version: int, execution_date: str) -> str:
+        """Return the run cache key for an input against a ledger version"""
+        return RunResultCache.fingerprint(input_sha256, ledger_version, self.config_hash, execution_date)
+    
+    @staticmethod
+    def _cached_result(cached: Tuple[ExecutionSummary, dict], input_file_path: str,
+                       start_time: datetime, metrics: RunMetrics) -> Tuple[ExecutionSummary, dict]:
+        """
+        Return a cached run as the result of this run
+        
+        Counts and output paths come from the cached run; input file, duration
+        and stage metrics describe this (skipped) run.
+        """
+        summary, output_files = cached
+        summary.cache_hit = True
+        summary.input_file = input_file_path
+        summary.stages = metrics.to_list()
+        summary.duration_seconds = (datetime.now() - start_time).total_seconds()
+        return summary, output_files
+    
+    def export_master_missing(self, execution_date: str = None) -> str:
+        """
+        Export the full partitioned Master Missing ledger on demand
+        
+        Returns:
+            Actual path of the exported workbook
+        """
+        if not execution_date:
+            execution_date = datetime.now().strftime("%m-%d-%Y")
+        return self.master_missing_mgr.export_full_ledger(self._master_missing_path(execution_date))
+    
+    def _update_master_missing(self, delta: list, summary: ExecutionSummary, metrics=None) -> None:
+        """
+        Apply the run's ledger delta to the Master Missing ledger
+        
+        The manager serializes concurrent writers and re-merges on conflict.
+        In a dry run the changes are only computed and counted.
+        In partitioned mode only the partitions the current encounters map to
+        are loaded and rewritten (the first such run imports the existing
+        workbook ledger), and the full workbook export is written only when
+        masterMissing.exportOnRun is enabled - otherwise
+        summary.master_missing_file stays empty (see export_master_missing).
+        """
+        execution_date = summary.execution_date
+        if summary.dry_run:
+            stats = self.master_missing_mgr.preview_results(delta, metrics)
+            summary.master_missing_added = stats["added"]
+            summary.master_missing_updated = stats["updated"]
+            summary.master_missing_removed = stats["removed"]
+            summary.master_missing_version = stats["version"]
+            logger.info(f"Master Missing (dry run, not written): Added: {stats['added']}, Updated: {stats['updated']}, Removed: {stats['removed']}")
+            return
+        
+        updated_master_missing, stats = self.master_missing_mgr.apply_results(
+            delta,
+            execution_date,
+            self._master_missing_path(execution_date),
+            metrics
+        )
+        
+        if self.master_missing_mgr.partitioned and self.config.get("masterMissing", {}).get("exportOnRun", False):
+            with (metrics or NullMetrics()).stage("ledger_export") as stage:
+                stats["file"] = self.export_master_missing(execution_date)
+                stage.bytes_written = self._file_size(stats["file"])
+        
+        if stats["file"]:
+            logger.info(f"Created: {stats['file']}")
+        
+        summary.master_missing_added = stats["added"]
+        summary.master_missing_updated = stats["updated"]
+        summary.master_missing_removed = stats["removed"]
+        summary.master_missing_file = stats["file"]
+        summary.master_missing_version = stats["version"]
+        summary.master_missing_retries = stats["retries"]
+        logger.info(f"Master Missing: {len(updated_master_missing)} total records (Added: {stats['added']}, Updated: {stats['updated']}, Removed: {stats['removed']})")
+    
+    def _checkpoint_path(self, input_sha256: str, checkpoint_config: dict) -> str:
+        """Return the checkpoint file of an input under the current configuration"""
+        output_folder = self._resolve_path(self.config.get("output", {}).get("folderPath", "data/output"))
+        folder = self._resolve_path(checkpoint_config.get("folderPath", os.path.join(output_folder, ".checkpoints")))
+        return os.path.join(folder, f"{input_sha256[:32]}-{self.config_hash[:12]}.jsonl")
+    
+    def _reconciliation_path(self, execution_date: str) -> str:
+        """Return the General Reconciliation workbook path for an execution date"""
+        reconciliation_filename = f"General Reconciliation {execution_date}.xlsx"
+        output_folder = self._resolve_path(self.config.get("output", {}).get("folderPath", "data/output"))
+        return os.path.join(output_folder, reconciliation_filename)
+    
+    def _master_missing_path(self, execution_date: str) -> str:
+        """Return the Master Missing workbook path for an execution date"""
+        master_missing_filename = f"Master Missing to {execution_date}.xlsx"
+        master_missing_folder = self._resolve_path(self.config.get("masterMissing", {}).get("folderPath", "data/output"))
+        return os.path.join(master_missing_folder, master_missing_filename)
+    
+    @staticmethod
+    def _file_size(path: Union[str, BinaryIO]) -> int:
+        """Return the size of a file or file object, or 0 if it cannot be read"""
+        try:
+            if hasattr(path, "seek"):
+                position = path.tell()
+                size = path.seek(0, os.SEEK_END)
+                path.seek(position)
+                return size
+            return os.path.getsize(path)
+        except (OSError, TypeError, ValueError):
+            return 0
+    
+    @staticmethod
+    def _input_name(input_file: Union[str, BinaryIO]) -> str:
+        """Name of the input reported in the summary"""
+        if isinstance(input_file, str):
+            return input_file
+        return str(getattr(input_file, "name", "") or "upload")
+    
+    @staticmethod
+    def _rewind(input_file: Union[str, BinaryIO]) -> Union[str, BinaryIO]:
+        """Seek a file object input back to its start before it is parsed"""
+        if hasattr(input_file, "seek"):
+            input_file.seek(0)
+        return input_file
     
     def _resolve_path(self, path: str) -> str:
         """Resolve relative path to absolute path based on base directory"""
@@ -188,10 +610,9 @@ class ReconciliationOrchestrator:
         return os.path.join(self.base_dir, path)
     
     def _load_config(self, config_path: str) -> dict:
-        """Load configuration from JSON file"""
+        """Load configuration from JSON file (parsed once per process, see config.load_config)"""
         try:
-            with open(config_path, 'r') as f:
-                config = json.load(f)
+            config = load_config(config_path)
             logger.info(f"Loaded configuration from {config_path}")
             return config
         except FileNotFoundError:
@@ -2,15 +2,114 @@
 General Reconciliation Generator - Creates General Reconciliation Excel file
 """
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill
-from typing import List
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from .models import Encounter, BillingResult, ReconciliationData
+from .file_utils import atomic_save_workbook
 from datetime import datetime
+import os
+import tempfile
 import logging
 
+# openpyxl is imported where workbooks are built, so importing this module stays cheap
+if TYPE_CHECKING:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
 logger = logging.getLogger(__name__)
 
+DATA_HEADERS = [
+    "Patient Name", "DOB", "Date of Service", "Type of Care", "Type of Visit",
+    "Facility", "Room", "Assessment", "CPT", "Chief Complaint", 
+    "Visit Type", "Servicing Provider", "Supervising Provider", 
+    "Time", "Code Status", "Observation", "Encounter Status", 
+    "Status Aux", "Export Date", "Billed", "Reason for not billed"
+]
+
+SUMMARY_HEADERS = ["Date", "Facility", "Provider", "Type of Care", "PRM Billing", "CPTs"]
+
+_BILLED_INDEX = DATA_HEADERS.index("Billed")
+_REASON_INDEX = DATA_HEADERS.index("Reason for not billed")
+
+
+class PreviewBuffer:
+    """
+    Bounded preview of the Data sheet, filled while the rows are written
+    
+    Keeps the first max_rows rows plus, for every not-billed reason (up to
+    max_reasons), a count of all its rows and the first samples_per_reason of
+    them, so the results page never has to read the workbook back.
+    """
+    
+    def __init__(self, max_rows: int = 20, samples_per_reason: int = 3, max_reasons: int = 20):
+        """Initialize empty buffer"""
+        self.max_rows = max_rows
+        self.samples_per_reason = samples_per_reason
+        self.max_reasons = max_reasons
+        self.rows = []
+        self.reasons = {}  # reason -> {"count": int, "rows": [row, ...]}
+    
+    def offer(self, billed: bool, reason: str) -> Tuple[bool, Optional[list]]:
+        """
+        Count a row's outcome and decide where it is kept
+        
+        Every not-billed row is counted against its reason, whether or not it
+        is also one of the first max_rows rows.
+        
+        Returns:
+            Tuple of (kept among the first rows, list of its reason's samples
+            to append it to or None)
+        """
+        in_head = len(self.rows) < self.max_rows
+        if billed:
+            return in_head, None
+        stratum = self.reasons.get(reason)
+        if stratum is None:
+            if len(self.reasons) >= self.max_reasons:
+                return in_head, None
+            stratum = self.reasons[reason] = {"count": 0, "rows": []}
+        stratum["count"] += 1
+        return in_head, stratum["rows"] if len(stratum["rows"]) < self.samples_per_reason else None
+    
+    def add(self, row: list) -> None:
+        """Offer a Data sheet row (DATA_HEADERS order)"""
+        in_head, samples = self.offer(row[_BILLED_INDEX] == "Yes", row[_REASON_INDEX])
+        self._keep(row, in_head, samples)
+    
+    def fill(self, encounters: List[Encounter], billing_results: List[BillingResult]) -> None:
+        """Offer encounters without writing them, building only the rows that are kept"""
+        billing_map = {result.encounter_key: result for result in billing_results}
+        for encounter in encounters:
+            result = billing_map.get(encounter.generate_key())
+            billed = bool(result and result.success)
+            reason = result.reason if result and not result.success else ""
+            in_head, samples = self.offer(billed, reason)
+            if in_head or samples is not None:
+                self._keep(GeneralReconciliationGenerator._data_row(encounter, billing_map), in_head, samples)
+    
+    def _keep(self, row: list, in_head: bool, samples: Optional[list]) -> None:
+        """Store a row among the first rows and/or its reason's samples"""
+        if in_head:
+            self.rows.append(row)
+        if samples is not None:
+            samples.append(row)
+    
+    def preview_rows(self) -> List[dict]:
+        """First rows as dictionaries keyed by Data sheet header"""
+        return [dict(zip(DATA_HEADERS, row)) for row in self.rows]
+    
+    def not_billed_samples(self) -> List[dict]:
+        """Sampled not-billed rows per reason, most frequent reason first"""
+        return [
+            {"reason": reason, "count": stratum["count"],
+             "rows": [dict(zip(DATA_HEADERS, row)) for row in stratum["rows"]]}
+            for reason, stratum in sorted(self.reasons.items(), key=lambda item: -item[1]["count"])
+        ]
+
+
+def _row_sinks(*sinks) -> list:
+    """Objects offered every written Data row through add(row), skipping None"""
+    return [sink for sink in sinks if sink is not None]
+
 
 class GeneralReconciliationGenerator:
     """Generates General Reconciliation Excel file with Data and Summary sheets"""
@@ -21,7 +120,8 @@ class GeneralReconciliationGenerator:
         self.date_format = self.config.get("dateFormat", "MM-dd-yyyy")
     
     def generate(self, encounters: List[Encounter], billing_results: List[BillingResult], 
-                 output_path: str, execution_date: str = None) -> str:
+                 output_path: str, execution_date: str = None,
+                 preview: PreviewBuffer = None, row_store=None) -> str:
         """
         Generate General Reconciliation Excel file
         
@@ -30,11 +130,14 @@ class GeneralReconciliationGenerator:
             billing_results: List of billing results (same order as encounters)
             output_path: Path to output file
             execution_date: Execution date (defaults to today)
+            preview: Buffer offered every Data row as it is written
+            row_store: ResultRowWriter receiving every Data row as it is written
         """
         if not execution_date:
             execution_date = datetime.now().strftime("%m-%d-%Y")
         
         # Create workbook
+        from openpyxl import Workbook
         wb = Workbook()
         
         # Remove default sheet
@@ -42,7 +145,7 @@ class GeneralReconciliationGenerator:
             wb.remove(wb["Sheet"])
         
         # Create Data sheet
-        self._create_data_sheet(wb, encounters, billing_results)
+        self._create_data_sheet(wb, encounters, billing_results, _row_sinks(preview, row_store))
         
         # Create Summary sheet
         self._create_summary_sheet(wb, encounters, billing_results)
@@ -50,12 +153,10 @@ class GeneralReconciliationGenerator:
         # Save file (use /tmp if original path is read-only)
         actual_output_path = output_path
         try:
-            wb.save(output_path)
+            atomic_save_workbook(wb, output_path)
         except (OSError, PermissionError):
             # If we can't write to the original path (read-only filesystem),
             # save to /tmp instead
-            import tempfile
-            import os
             temp_dir = tempfile.gettempdir()
             filename = os.path.basename(output_path)
             temp_path = os.path.join(temp_dir, filename)
@@ -69,22 +170,15 @@ class GeneralReconciliationGenerator:
         # Return the actual path where file was saved
         return actual_output_path
     
-    def _create_data_sheet(self, wb: Workbook, encounters: List[Encounter], 
-                          billing_results: List[BillingResult]) -> None:
+    def _create_data_sheet(self, wb: "Workbook", encounters: List[Encounter], 
+                          billing_results: List[BillingResult],
+                          row_sinks: list = ()) -> None:
         """Create Data sheet with all encounters and billing status"""
         ws = wb.create_sheet("Data", 0)
         
-        # Headers
-        headers = [
-            "Patient Name", "DOB", "Date of Service", "Type of Care", "Type of Visit",
-            "Facility", "Room", "Assessment", "CPT", "Chief Complaint", 
-            "Visit Type", "Servicing Provider", "Supervising Provider", 
-            "Time", "Code Status", "Observation", "Encounter Status", 
-            "Status Aux", "Export Date", "Billed", "Reason for not billed"
-        ]
-        
         # Write header row with formatting
-        ws.append(headers)
+        from openpyxl.styles import Font, PatternFill
+        ws.append(DATA_HEADERS)
         for cell in ws[1]:
             cell.font = Font(bold=True)
             cell.fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
@@ -94,36 +188,10 @@ class GeneralReconciliationGenerator:
         
         # Write data rows
         for encounter in encounters:
-            key = encounter.generate_key()
-            result = billing_map.get(key)
-            
-            billed = "Yes" if result and result.success else "No"
-            reason = result.reason if result and not result.success else ""
-            
-            row = [
-                encounter.patient_name,
-                encounter.dob,
-                encounter.date_of_service,
-                encounter.type_of_care,
-                encounter.type_of_visit,
-                encounter.facility,
-                encounter.room,
-                encounter.assessment,
-                encounter.cpt,
-                encounter.chief_complaint,
-                encounter.visit_type,
-                encounter.servicing_provider,
-                encounter.supervising_provider,
-                encounter.time,
-                encounter.code_status,
-                encounter.observation,
-                encounter.encounter_status,
-                encounter.status_aux,
-                encounter.export_date,
-                billed,
-                reason
-            ]
+            row = self._data_row(encounter, billing_map)
             ws.append(row)
+            for sink in row_sinks:
+                sink.add(row)
         
         # Auto-size columns
         for column in ws.columns:
@@ -138,14 +206,14 @@ class GeneralReconciliationGenerator:
             adjusted_width = min(max_length + 2, 50)
             ws.column_dimensions[column_letter].width = adjusted_width
     
-    def _create_summary_sheet(self, wb: Workbook, encounters: List[Encounter], 
+    def _create_summary_sheet(self, wb: "Workbook", encounters: List[Encounter], 
                              billing_results: List[BillingResult]) -> None:
         """Create Summary sheet with aggregated statistics"""
         ws = wb.create_sheet("Summary", 1)
         
         # Headers
-        headers = ["Date", "Facility", "Provider", "Type of Care", "PRM Billing", "CPTs"]
-        ws.append(headers)
+        from openpyxl.styles import Font, PatternFill
+        ws.append(SUMMARY_HEADERS)
         for cell in ws[1]:
             cell.font = Font(bold=True)
             cell.fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
@@ -158,15 +226,7 @@ class GeneralReconciliationGenerator:
         
         # Write summary rows
         for item in summary:
-            row = [
-                item["date"],
-                item["facility"],
-                item["provider"],
-                item["type_of_care"],
-                item["prm_billing"],
-                item["cpts"]
-            ]
-            ws.append(row)
+            ws.append(self._summary_row(item))
         
         # Auto-size columns
         for column in ws.columns:
@@ -189,7 +249,17 @@ class GeneralReconciliationGenerator:
         """
         # Group by key
         groups = {}
+        self._accumulate_summary(groups, encounters, billing_map)
+        
+        # Convert to list and sort by date
+        summary = list(groups.values())
+        summary.sort(key=lambda x: x["date"])
         
+        return summary
+    
+    @staticmethod
+    def _accumulate_summary(groups: dict, encounters: List[Encounter], billing_map: dict) -> None:
+        """Add successfully billed encounters to the summary groups in place"""
         for encounter in encounters:
             key = encounter.generate_key()
             result = billing_map.get(key)
@@ -218,9 +288,146 @@ class GeneralReconciliationGenerator:
             
             groups[group_key]["prm_billing"] += 1
             groups[group_key]["cpts"] += 1  # Assuming 1 CPT per encounter
+    
+    @staticmethod
+    def _data_row(encounter: Encounter, billing_map: dict) -> list:
+        """Build a Data sheet row for an encounter"""
+        result = billing_map.get(encounter.generate_key())
         
-        # Convert to list and sort by date
-        summary = list(groups.values())
-        summary.sort(key=lambda x: x["date"])
+        billed = "Yes" if result and result.success else "No"
+        reason = result.reason if result and not result.success else ""
         
-        return summary
+        return [
+            encounter.patient_name,
+            encounter.dob,
+            encounter.date_of_service,
+            encounter.type_of_care,
+            encounter.type_of_visit,
+            encounter.facility,
+            encounter.room,
+            encounter.assessment,
+            encounter.cpt,
+            encounter.chief_complaint,
+            encounter.visit_type,
+            encounter.servicing_provider,
+            encounter.supervising_provider,
+            encounter.time,
+            encounter.code_status,
+            encounter.observation,
+            encounter.encounter_status,
+            encounter.status_aux,
+            encounter.export_date,
+            billed,
+            reason
+        ]
+    
+    @staticmethod
+    def _summary_row(item: dict) -> list:
+        """Build a Summary sheet row from an aggregate group"""
+        return [
+            item["date"],
+            item["facility"],
+            item["provider"],
+            item["type_of_care"],
+            item["prm_billing"],
+            item["cpts"]
+        ]
+    
+    def open_stream(self, output_path: str, preview: PreviewBuffer = None,
+                    row_store=None) -> "StreamingReconciliationWriter":
+        """
+        Open a streaming writer for the General Reconciliation file
+        
+        Rows are written chunk by chunk to a write-only workbook; only the
+        Summary aggregates (and the bounded preview) are kept in memory.
+        """
+        return StreamingReconciliationWriter(self, output_path, preview, row_store)
+
+
+class StreamingReconciliationWriter:
+    """
+    Writes the General Reconciliation file incrementally
+    
+    Usage:
+        writer = generator.open_stream(path)
+        writer.write_rows(encounters, billing_results)  # once per chunk
+        actual_path = writer.close()
+    
+    The write-only workbook buffers Data rows on disk, so memory stays bounded
+    by the chunk size. Data sheet column widths cannot be sized from content in
+    write-only mode and are set from the headers instead.
+    """
+    
+    DATA_COLUMN_WIDTH = 18
+    
+    def __init__(self, generator: GeneralReconciliationGenerator, output_path: str,
+                 preview: PreviewBuffer = None, row_store=None):
+        """Create the write-only workbook and Data sheet header"""
+        self.generator = generator
+        self.output_path = output_path
+        self.row_sinks = _row_sinks(preview, row_store)
+        self.rows_written = 0
+        self._groups = {}
+        
+        from openpyxl import Workbook
+        from openpyxl.utils import get_column_letter
+        self.wb = Workbook(write_only=True)
+        self.data_ws = self.wb.create_sheet("Data")
+        for idx, header in enumerate(DATA_HEADERS, start=1):
+            width = min(max(len(header), self.DATA_COLUMN_WIDTH) + 2, 50)
+            self.data_ws.column_dimensions[get_column_letter(idx)].width = width
+        self.data_ws.append(self._header_cells(self.data_ws, DATA_HEADERS))
+    
+    def write_rows(self, encounters: List[Encounter], billing_results: List[BillingResult]) -> None:
+        """Append a chunk of encounters to the Data sheet and update Summary aggregates"""
+        billing_map = {result.encounter_key: result for result in billing_results}
+        
+        for encounter in encounters:
+            row = self.generator._data_row(encounter, billing_map)
+            self.data_ws.append(row)
+            for sink in self.row_sinks:
+                sink.add(row)
+        
+        self.generator._accumulate_summary(self._groups, encounters, billing_map)
+        self.rows_written += len(encounters)
+    
+    def close(self) -> str:
+        """
+        Write the Summary sheet and save the workbook
+        
+        Returns:
+            Actual path where the file was saved (may be /tmp if read-only)
+        """
+        summary = sorted(self._groups.values(), key=lambda x: x["date"])
+        rows = [self.generator._summary_row(item) for item in summary]
+        
+        from openpyxl.utils import get_column_letter
+        ws = self.wb.create_sheet("Summary")
+        for idx, header in enumerate(SUMMARY_HEADERS):
+            max_length = max([len(header)] + [len(str(row[idx])) for row in rows])
+            ws.column_dimensions[get_column_letter(idx + 1)].width = min(max_length + 2, 30)
+        ws.append(self._header_cells(ws, SUMMARY_HEADERS))
+        for row in rows:
+            ws.append(row)
+        
+        # Save file (use /tmp if original path is read-only)
+        temp_path = os.path.join(tempfile.gettempdir(), os.path.basename(self.output_path))
+        actual_output_path = atomic_save_workbook(self.wb, self.output_path, fallback_path=temp_path)
+        if actual_output_path != self.output_path:
+            logger.warning(f"Cannot write to {self.output_path}, saved to {temp_path} instead")
+        
+        logger.info(f"Generated General Reconciliation file: {actual_output_path} ({self.rows_written} rows, streamed)")
+        return actual_output_path
+    
+    @staticmethod
+    def _header_cells(ws, headers: List[str]) -> List["WriteOnlyCell"]:
+        """Build bold, shaded header cells for a write-only sheet"""
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill
+        cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+            cells.append(cell)
+        return cells
@@ -0,0 +1,273 @@
+"""
+Result Rows - Indexed, queryable store of a run's General Reconciliation rows
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from .models import Encounter, BillingResult
+from .reconciliation_generator import DATA_HEADERS, GeneralReconciliationGenerator
+import base64
+import json
+import os
+import re
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Column name for every Data sheet header, e.g. "Reason for not billed" -> reason_for_not_billed
+COLUMNS = [re.sub(r"[^0-9a-z]+", "_", header.lower()).strip("_") for header in DATA_HEADERS]
+_HEADER_BY_COLUMN = dict(zip(COLUMNS, DATA_HEADERS))
+
+# Filters accepted by ResultRows.query: name -> SQL condition
+FILTERS = {
+    "billed": "billed = ?",
+    "reason": "reason_for_not_billed = ?",
+    "facility": "facility = ?",
+    "provider": "servicing_provider = ?",
+    "date_from": "dos_iso >= ?",
+    "date_to": "dos_iso <= ?",
+}
+
+# Columns with a (column, id) index, used for filtering and keyset pagination
+INDEXED_COLUMNS = ["billed", "reason_for_not_billed", "facility", "servicing_provider", "dos_iso"]
+
+_FLUSH_ROWS = 5000
+
+
+@lru_cache(maxsize=4096)
+def _iso_date(value: str) -> str:
+    """Normalized YYYY-MM-DD date of service (dates repeat heavily, so cached)"""
+    return Encounter._normalize_date(value)
+
+
+def _sql_value(value):
+    """Store blanks as '' and anything sqlite3 cannot bind as text"""
+    if value is None:
+        return ""
+    if isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+class ResultRowWriter:
+    """
+    Builds the row store of a run while its Data sheet is written
+
+    Rows are inserted in batches into a temporary database with journaling
+    off; close() adds the indexes and renames it into place, so readers never
+    see a partial store. Usage:
+
+        writer = ResultRowWriter(path)
+        orchestrator.run(input_file, row_store=writer)
+        writer.close()
+    """
+
+    def __init__(self, db_path: str):
+        """Create the temporary database next to db_path"""
+        self.db_path = db_path
+        self.rows_written = 0
+        self._temp_path = f"{db_path}.tmp-{os.getpid()}"
+        self._pending = []
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+        self._conn = sqlite3.connect(self._temp_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = OFF")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.execute(
+            f"CREATE TABLE rows (id INTEGER PRIMARY KEY, {', '.join(COLUMNS)}, dos_iso TEXT)"
+        )
+        self._insert = (
+            f"INSERT INTO rows ({', '.join(COLUMNS)}, dos_iso) "
+            f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})"
+        )
+        self._dos_index = DATA_HEADERS.index("Date of Service")
+
+    def add(self, row: list) -> None:
+        """Add a Data sheet row (DATA_HEADERS order)"""
+        values = [_sql_value(value) for value in row]
+        values.append(_iso_date(str(values[self._dos_index])))
+        self._pending.append(values)
+        self.rows_written += 1
+        if len(self._pending) >= _FLUSH_ROWS:
+            self._flush()
+
+    def fill(self, encounters: List[Encounter], billing_results: List[BillingResult]) -> None:
+        """Add rows for encounters that are not being written to a workbook (dry run)"""
+        billing_map = {result.encounter_key: result for result in billing_results}
+        for encounter in encounters:
+            self.add(GeneralReconciliationGenerator._data_row(encounter, billing_map))
+
+    def add_workbook(self, file_path: str) -> None:
+        """Add the rows of an existing General Reconciliation file (runs served from the run cache)"""
+        from openpyxl import load_workbook
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = wb["Data"].iter_rows(values_only=True)
+            next(rows, None)  # Header
+            for row in rows:
+                if any(cell is not None for cell in row):
+                    self.add(list(row[:len(DATA_HEADERS)]))
+        finally:
+            wb.close()
+
+    def close(self) -> str:
+        """Index the rows and move the store into place; returns its path"""
+        self._flush()
+        for column in INDEXED_COLUMNS:
+            self._conn.execute(f"CREATE INDEX ix_{column} ON rows ({column}, id)")
+        self._conn.commit()
+        self._conn.close()
+        os.replace(self._temp_path, self.db_path)
+        logger.info(f"Stored {self.rows_written} result rows in {self.db_path}")
+        return self.db_path
+
+    def abort(self) -> None:
+        """Discard the store"""
+        self._conn.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._conn.executemany(self._insert, self._pending)
+            self._pending = []
+
+
+class ResultRows:
+    """
+    Read side of a run's row store
+
+    Pages are fetched with keyset (cursor) pagination on (sort column, id),
+    so every page costs the same however deep the reader has scrolled.
+    """
+
+    def __init__(self, db_path: str):
+        """Open the store read-only"""
+        self.db_path = db_path
+        self._conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def query(self, filters: dict = None, sort: str = None, descending: bool = False,
+              cursor: str = None, limit: int = 100) -> Tuple[List[dict], Optional[str]]:
+        """
+        Return one page of rows and the cursor of the next page
+
+        Args:
+            filters: Values for FILTERS keys (blank values are ignored)
+            sort: Column (see COLUMNS) or Data sheet header to sort by;
+                date_of_service sorts chronologically. Defaults to file order.
+            descending: Sort descending
+            cursor: next_cursor of the previous page
+            limit: Page size
+
+        Returns:
+            Tuple of (rows keyed by Data sheet header, next cursor or None)
+
+        Raises:
+            ValueError: Unknown filter or sort column, or malformed cursor
+        """
+        sort_column = self._sort_column(sort)
+        where, params = self._where(filters)
+
+        if cursor:
+            last_value, last_id = self._decode_cursor(cursor)
+            op = "<" if descending else ">"
+            if sort_column == "id":
+                where.append(f"id {op} ?")
+                params.append(last_id)
+            else:
+                where.append(f"({sort_column} {op} ? OR ({sort_column} = ? AND id {op} ?))")
+                params.extend([last_value, last_value, last_id])
+
+        direction = "DESC" if descending else "ASC"
+        order = f"id {direction}" if sort_column == "id" else f"{sort_column} {direction}, id {direction}"
+        sql = (
+            f"SELECT id, {', '.join(COLUMNS)}, dos_iso FROM rows"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + f" ORDER BY {order} LIMIT ?"
+        )
+        records = self._conn.execute(sql, params + [limit + 1]).fetchall()
+
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            last = records[-1]
+            sort_value = None
+            if sort_column == "dos_iso":
+                sort_value = last[-1]
+            elif sort_column != "id":
+                sort_value = last[1 + COLUMNS.index(sort_column)]
+            next_cursor = self._encode_cursor(sort_value, last[0])
+
+        rows = [dict(zip(DATA_HEADERS, record[1:1 + len(COLUMNS)])) for record in records]
+        return rows, next_cursor
+
+    def count(self, filters: dict = None) -> int:
+        """Number of rows matching filters"""
+        where, params = self._where(filters)
+        sql = "SELECT COUNT(*) FROM rows" + (f" WHERE {' AND '.join(where)}" if where else "")
+        return self._conn.execute(sql, params).fetchone()[0]
+
+    def facets(self) -> dict:
+        """Distinct values with row counts for the billed, reason, facility and provider filters"""
+        facets = {}
+        for name, column in (("billed", "billed"), ("reason", "reason_for_not_billed"),
+                             ("facility", "facility"), ("provider", "servicing_provider")):
+            facets[name] = [
+                {"value": value, "count": count}
+                for value, count in self._conn.execute(
+                    f"SELECT {column}, COUNT(*) FROM rows WHERE {column} != '' "
+                    f"GROUP BY {column} ORDER BY {column}"
+                )
+            ]
+        dates = self._conn.execute("SELECT MIN(dos_iso), MAX(dos_iso) FROM rows WHERE dos_iso != ''").fetchone()
+        facets["date_range"] = {"min": dates[0], "max": dates[1]}
+        return facets
+
+    @staticmethod
+    def _where(filters: dict) -> Tuple[list, list]:
+        """SQL conditions and parameters for filters"""
+        where, params = [], []
+        for name, value in (filters or {}).items():
+            if name not in FILTERS:
+                raise ValueError(f"Unknown filter: {name}")
+            if value in (None, ""):
+                continue
+            where.append(FILTERS[name])
+            params.append(value)
+        return where, params
+
+    @staticmethod
+    def _sort_column(sort: str) -> str:
+        """Map a sort column or header name to a database column"""
+        if not sort:
+            return "id"
+        column = re.sub(r"[^0-9a-z]+", "_", sort.lower()).strip("_")
+        if column == "date_of_service":
+            return "dos_iso"
+        if column not in _HEADER_BY_COLUMN:
+            raise ValueError(f"Unknown sort column: {sort}")
+        return column
+
+    @staticmethod
+    def _encode_cursor(sort_value, row_id: int) -> str:
+        return base64.urlsafe_b64encode(json.dumps([sort_value, row_id]).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[object, int]:
+        try:
+            sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return sort_value, int(row_id)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,242 @@
+"""
+Row Index - Fingerprints of the previous export's rows for delta ingestion
+"""
+
+from contextlib import closing
+from typing import Callable, Dict, Iterable, List, Optional
+from .models import Encounter, BillingResult
+import os
+import sqlite3
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keys per lookup query, below SQLite's default limit of bound parameters
+LOOKUP_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    config_hash TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    committed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rows (
+    generation INTEGER NOT NULL,
+    encounter_key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    billed INTEGER NOT NULL,
+    reason TEXT,
+    claim_id TEXT,
+    PRIMARY KEY (generation, encounter_key)
+) WITHOUT ROWID;
+"""
+
+
+class RowIndex:
+    """
+    Compact per-row index of the last processed export
+
+    Stores, per encounter key, the row fingerprint, billed (1/0), reason and
+    claim_id in a SQLite database, so a run looks up the keys of each chunk
+    instead of loading the whole previous export into memory. Every run writes
+    its rows as a new generation, which replaces the previous one only when
+    the run commits. Generations are tagged with the configuration hash so
+    results produced under different settings or billing rules are never reused.
+    """
+
+    def __init__(self, index_path: str):
+        """Initialize index stored at index_path"""
+        self.index_path = index_path
+
+    def begin(self, config_hash: str, fresh: bool = False) -> "RowIndexGeneration":
+        """
+        Start the current run's generation of the index
+
+        Args:
+            config_hash: Hash of the configuration and billing rules
+            fresh: Ignore the previous generation (every row is new)
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        conn = sqlite3.connect(self.index_path, timeout=30.0)
+        try:
+            with conn:
+                conn.executescript(_SCHEMA)
+                row = conn.execute(
+                    "SELECT id, config_hash FROM generations WHERE committed = 1 ORDER BY id DESC LIMIT 1"
+                ).fetchone()
+                generation = conn.execute(
+                    "INSERT INTO generations (config_hash, created_at) VALUES (?, ?)", (config_hash, time.time())
+                ).lastrowid
+        except Exception:
+            conn.close()
+            raise
+
+        previous = None
+        if row and row[1] != config_hash:
+            logger.info("Row index was built under a different configuration, evaluating all rows")
+        elif row and not fresh:
+            previous = row[0]
+        return RowIndexGeneration(conn, previous, generation)
+
+
+class RowIndexGeneration:
+    """One run's view of the row index: lookups in the previous generation, writes to its own"""
+
+    def __init__(self, conn: sqlite3.Connection, previous: Optional[int], generation: int):
+        """Initialize with an open connection and the generation ids"""
+        self._conn = conn
+        self.previous = previous
+        self.generation = generation
+        self.committed = False
+
+    def lookup(self, keys: Iterable[str]) -> Dict[str, tuple]:
+        """Return the previous generation's (fingerprint, billed, reason, claim_id) of the given keys"""
+        if self.previous is None:
+            return {}
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[start:start + LOOKUP_BATCH]
+            cursor = self._conn.execute(
+                "SELECT encounter_key, fingerprint, billed, reason, claim_id FROM rows "
+                f"WHERE generation = ? AND encounter_key IN ({', '.join('?' * len(batch))})",
+                [self.previous, *batch]
+            )
+            for key, fingerprint, billed, reason, claim_id in cursor:
+                found[key] = (fingerprint, billed, reason, claim_id)
+        return found
+
+    def add(self, entries: List[tuple]) -> None:
+        """Store (encounter_key, fingerprint, billed, reason, claim_id) rows of the current run"""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows (generation, encounter_key, fingerprint, billed, reason, claim_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.generation, *entry) for entry in entries]
+            )
+
+    def vanished_count(self) -> int:
+        """Rows of the previous generation missing from the current one"""
+        if self.previous is None:
+            return 0
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM rows AS prev WHERE prev.generation = ? AND NOT EXISTS "
+            "(SELECT 1 FROM rows AS cur WHERE cur.generation = ? AND cur.encounter_key = prev.encounter_key)",
+            (self.previous, self.generation)
+        ).fetchone()[0]
+
+    def commit(self) -> None:
+        """
+        Make the current run's rows the index for the next run
+
+        Older generations (including those left by failed runs) are dropped.
+        If a run that started later has already committed, its index is kept.
+        """
+        try:
+            with self._conn:
+                newer = self._conn.execute(
+                    "SELECT 1 FROM generations WHERE committed = 1 AND id > ?", (self.generation,)
+                ).fetchone()
+                if newer:
+                    return
+                self._conn.execute("UPDATE generations SET committed = 1 WHERE id = ?", (self.generation,))
+                self._conn.execute("DELETE FROM rows WHERE generation < ?", (self.generation,))
+                self._conn.execute("DELETE FROM generations WHERE id < ?", (self.generation,))
+            self.committed = True
+        except sqlite3.Error as e:
+            logger.warning(f"Cannot write row index: {e}")
+
+    def close(self) -> None:
+        """Drop the current run's rows unless committed, and close the connection"""
+        with closing(self._conn):
+            if self.committed:
+                return
+            try:
+                with self._conn:
+                    self._conn.execute("DELETE FROM rows WHERE generation = ?", (self.generation,))
+                    self._conn.execute("DELETE FROM generations WHERE id = ?", (self.generation,))
+            except sqlite3.Error as e:
+                logger.warning(f"Cannot clean up row index: {e}")
+
+
+class RowDiff:
+    """
+    Row-level diff of the current export against the previous one
+
+    Rows whose encounter key and fingerprint are both unchanged keep their
+    previous billing result; new and changed rows are evaluated. The current
+    run's rows are written to its index generation as they pass through, so
+    the diff can be fed chunk by chunk.
+    """
+
+    def __init__(self, index: RowIndexGeneration):
+        """Initialize diff against the previous generation of the row index"""
+        self.index = index
+        self.new_count = 0
+        self.changed_count = 0
+        self.unchanged_count = 0
+
+    def evaluate(self, encounters: List[Encounter],
+                 batch_evaluate: Callable[[List[Encounter]], List[BillingResult]]) -> List[BillingResult]:
+        """
+        Return billing results for encounters, evaluating only new or changed rows
+
+        Args:
+            encounters: Encounters of the current export (or chunk)
+            batch_evaluate: Evaluator for the rows that need a fresh result
+
+        Returns:
+            Billing results in the same order as encounters
+        """
+        results: List[Optional[BillingResult]] = [None] * len(encounters)
+        fingerprints = [(encounter.generate_key(), encounter.row_fingerprint()) for encounter in encounters]
+        previous = self.index.lookup(key for key, _ in fingerprints)
+        pending = []
+
+        for idx, (key, fingerprint) in enumerate(fingerprints):
+            prior = previous.get(key)
+            if prior is None:
+                self.new_count += 1
+                pending.append(idx)
+            elif prior[0] != fingerprint:
+                self.changed_count += 1
+                pending.append(idx)
+            else:
+                self.unchanged_count += 1
+                results[idx] = BillingResult(
+                    encounter_key=key,
+                    success=bool(prior[1]),
+                    reason=prior[2],
+                    claim_id=prior[3]
+                )
+
+        if pending:
+            evaluated = batch_evaluate([encounters[idx] for idx in pending])
+            for idx, result in zip(pending, evaluated):
+                results[idx] = result
+
+        self.index.add([
+            (key, fingerprint, int(result.success), result.reason, result.claim_id)
+            for (key, fingerprint), result in zip(fingerprints, results)
+        ])
+        return results
+
+    @property
+    def evaluated_count(self) -> int:
+        """Rows sent to billing evaluation"""
+        return self.new_count + self.changed_count
+
+    @property
+    def vanished_count(self) -> int:
+        """Rows of the previous export missing from the current one"""
+        return self.index.vanished_count()
+
+    def commit(self) -> None:
+        """Store the current rows as the next run's index"""
+        self.index.commit()
+
+    def close(self) -> None:
+        """Release the index (the current rows are dropped unless committed)"""
+        self.index.close()
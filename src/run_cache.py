@@ -0,0 +1,103 @@
+"""
+Run Result Cache - Reuses the results of identical reconciliation runs
+"""
+
+from typing import Optional, Tuple
+from .models import ExecutionSummary
+from .file_utils import atomic_write_json
+import hashlib
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RunResultCache:
+    """
+    Cache of completed runs keyed by an input/ledger/config fingerprint
+
+    An entry is stored after each run under the fingerprint of:
+    - the SHA-256 of the input file bytes
+    - the ledger version the run left behind
+    - the configuration (and rule set) hash
+    - the execution date (output file names and ledger dates depend on it)
+
+    Re-running the same input on the same day against a ledger that nobody has
+    written since would reproduce exactly the same outputs, so the stored
+    summary and output paths are returned instead. Entries whose output files
+    have since been replaced or removed are treated as misses.
+    """
+
+    def __init__(self, folder_path: str):
+        """Initialize cache stored in folder_path"""
+        self.folder_path = folder_path
+
+    @staticmethod
+    def fingerprint(input_hash: str, ledger_version: int, config_hash: str, execution_date: str) -> str:
+        """Combine the run inputs into a cache key"""
+        key = f"{input_hash}:{ledger_version}:{config_hash}:{execution_date}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, fingerprint: str) -> Optional[Tuple[ExecutionSummary, dict]]:
+        """
+        Look up a cached run
+
+        Returns:
+            Tuple of (ExecutionSummary, output_files_dict), or None on a miss
+        """
+        try:
+            with open(self._entry_path(fingerprint), 'r') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable run cache entry {fingerprint}: {e}")
+            return None
+
+        for path, stat in entry.get("file_stats", {}).items():
+            try:
+                current = os.stat(path)
+            except OSError:
+                return None
+            if current.st_size != stat["size"] or current.st_mtime != stat["mtime"]:
+                return None
+
+        try:
+            summary = ExecutionSummary(**entry["summary"])
+        except TypeError as e:
+            # Written by a version with other summary fields
+            logger.warning(f"Ignoring outdated run cache entry {fingerprint}: {e}")
+            return None
+        return summary, entry["output_files"]
+
+    def put(self, fingerprint: str, summary: ExecutionSummary, output_files: dict) -> None:
+        """Store a completed run"""
+        file_stats = {}
+        for path in self._paths(output_files):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                file_stats[path] = {"size": stat.st_size, "mtime": stat.st_mtime}
+
+        try:
+            os.makedirs(self.folder_path, exist_ok=True)
+            atomic_write_json(self._entry_path(fingerprint), {
+                "summary": summary.to_dict(),
+                "output_files": output_files,
+                "file_stats": file_stats
+            })
+        except (OSError, PermissionError) as e:
+            logger.warning(f"Cannot write run cache entry: {e}")
+
+    @staticmethod
+    def _paths(output_files: dict):
+        """Yield every output path, including nested groups (e.g. per-date files)"""
+        for value in output_files.values():
+            if isinstance(value, dict):
+                yield from (path for path in value.values() if path)
+            elif value:
+                yield value
+
+    def _entry_path(self, fingerprint: str) -> str:
+        """Return the file path of a cache entry"""
+        return os.path.join(self.folder_path, f"{fingerprint}.json")
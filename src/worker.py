@@ -0,0 +1,142 @@
+"""
+Reconciliation Worker - Drains the job queue with a ReconciliationOrchestrator
+"""
+
+from typing import Optional
+from .config import configure_logging
+from .job_queue import JobQueue
+from .orchestrator import ReconciliationOrchestrator
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Orchestrator.run options a job may set
+RUN_OPTIONS = ("streaming", "force", "dry_run", "partition_by_date")
+
+
+class ReconciliationWorker:
+    """
+    Pulls jobs from a JobQueue and runs them
+
+    One orchestrator is kept per worker, so the resident ledger cache and
+    configuration are reused across jobs. While a job runs, a heartbeat thread
+    renews its lease every third of the lease duration. Retried jobs resume
+    from the checkpoint of the failed attempt.
+    """
+
+    def __init__(self, queue: JobQueue, config_path: str = "config.json",
+                 worker_id: str = None, poll_interval: float = 1.0):
+        """Initialize worker"""
+        self.queue = queue
+        self.config_path = config_path
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_interval = poll_interval
+        self._orchestrator: Optional[ReconciliationOrchestrator] = None
+
+    @property
+    def orchestrator(self) -> ReconciliationOrchestrator:
+        """Create the orchestrator on first use"""
+        if self._orchestrator is None:
+            self._orchestrator = ReconciliationOrchestrator(self.config_path)
+        return self._orchestrator
+
+    def run(self, max_jobs: int = None, exit_when_empty: bool = False) -> int:
+        """
+        Process jobs until stopped
+
+        Args:
+            max_jobs: Stop after this many jobs
+            exit_when_empty: Stop when no job is runnable instead of polling
+
+        Returns:
+            Number of jobs processed
+        """
+        processed = 0
+        logger.info(f"Worker {self.worker_id} started")
+        while max_jobs is None or processed < max_jobs:
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                if exit_when_empty:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.process(job)
+            processed += 1
+        logger.info(f"Worker {self.worker_id} stopped after {processed} jobs")
+        return processed
+
+    def process(self, job: dict) -> bool:
+        """
+        Run one claimed job and record its outcome
+
+        Returns:
+            True if the job succeeded
+        """
+        job_id = job["id"]
+        logger.info(f"Worker {self.worker_id} running job {job_id} (attempt {job['attempts']}): {job['input_file']}")
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, stop), daemon=True)
+        heartbeat.start()
+
+        try:
+            options = {k: v for k, v in job["options"].items() if k in RUN_OPTIONS}
+            summary, output_files = self.orchestrator.run(
+                job["input_file"], resume=job["attempts"] > 1, **options
+            )
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            stop.set()
+            heartbeat.join()
+            self.queue.fail(job_id, self.worker_id, str(e))
+            return False
+
+        stop.set()
+        heartbeat.join()
+        return self.queue.complete(job_id, self.worker_id, {
+            "summary": summary.to_dict(),
+            "output_files": output_files
+        })
+
+    def _heartbeat(self, job_id: str, stop: threading.Event) -> None:
+        """Renew the job lease until stopped"""
+        interval = self.queue.lease_seconds / 3
+        while not stop.wait(interval):
+            if not self.queue.heartbeat(job_id, self.worker_id):
+                logger.warning(f"Worker {self.worker_id} lost the lease of job {job_id}")
+                return
+
+
+def _worker_process(db_path: str, lease_seconds: float, max_attempts: int, config_path: str,
+                    poll_interval: float, exit_when_empty: bool) -> None:
+    """Entry point of a pooled worker process"""
+    configure_logging(config_path)
+    queue = JobQueue(db_path, lease_seconds, max_attempts)
+    ReconciliationWorker(queue, config_path, poll_interval=poll_interval).run(exit_when_empty=exit_when_empty)
+
+
+def run_worker_pool(queue: JobQueue, config_path: str, processes: int,
+                    poll_interval: float = 1.0, exit_when_empty: bool = False) -> None:
+    """Run a pool of worker processes against the same queue and wait for them"""
+    workers = [
+        multiprocessing.Process(
+            target=_worker_process,
+            args=(queue.db_path, queue.lease_seconds, queue.max_attempts, config_path,
+                  poll_interval, exit_when_empty)
+        )
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+        raise
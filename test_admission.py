@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test admission control and background job execution of the web application
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.metrics import MetricsRegistry
+from web.admission import AdmissionController, AdmissionRejected
+from web.jobs import JobManager, QUEUED, SUCCEEDED, FAILED
+
+TIMEOUT = 10.0
+
+
+def wait_for(condition, timeout=TIMEOUT):
+    """Poll condition until it holds, failing after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out (deadlock?)"
+        time.sleep(0.01)
+
+
+def test_slots_granted_in_arrival_order():
+    """Waiting jobs start first come, first served as slots free up"""
+    admission = AdmissionController(max_running=1, max_queued=10)
+    started = []
+    for job_id in ['a', 'b', 'c']:
+        admission.admit(job_id, start=lambda job_id=job_id: started.append(job_id))
+
+    assert started == ['a']
+    assert admission.position('b') == 1 and admission.position('c') == 2
+    admission.release('a')
+    assert started == ['a', 'b']
+    admission.release('b')
+    admission.release('c')
+    assert started == ['a', 'b', 'c']
+    assert admission.stats()['running'] == 0
+
+
+def test_full_queue_rejects():
+    """Submissions beyond max_queued waiting runs are rejected with a retry hint"""
+    metrics = MetricsRegistry()
+    admission = AdmissionController(max_running=1, max_queued=1, retry_after=7, metrics=metrics)
+    admission.admit('running', start=lambda: None)
+    admission.admit('waiting', start=lambda: None)
+
+    try:
+        admission.admit('rejected', start=lambda: None)
+        assert False, "Expected AdmissionRejected"
+    except AdmissionRejected as e:
+        assert e.retry_after == 7
+    assert 'admission_rejected_runs_total 1' in metrics.render()
+
+    # Withdrawing a waiting job makes room again
+    admission.release('waiting')
+    admission.admit('retried', start=lambda: None)
+
+
+def test_memory_budget_holds_back_large_runs():
+    """A run that does not fit in the memory left waits, and blocks those behind it"""
+    admission = AdmissionController(max_running=3, max_queued=10, memory_budget_bytes=100)
+    started = []
+    for job_id, estimate in [('a', 60), ('b', 60), ('c', 10)]:
+        admission.admit(job_id, estimate, start=lambda job_id=job_id: started.append(job_id))
+
+    assert started == ['a']
+    admission.release('a')
+    assert started == ['a', 'b', 'c']
+
+    # A run larger than the whole budget still runs, alone
+    admission.release('b')
+    admission.release('c')
+    admission.admit('huge', 500, start=lambda: started.append('huge'))
+    assert started[-1] == 'huge'
+
+
+def test_job_manager_never_deadlocks():
+    """Concurrent submissions to a small pool all finish, each submitter's jobs in order"""
+    admission = AdmissionController(max_running=2, max_queued=200)
+    jobs = JobManager(max_workers=2, admission=admission)
+    order = []
+    order_lock = threading.Lock()
+
+    def work(submitter, n, progress=None):
+        with order_lock:
+            order.append((submitter, n))
+        time.sleep(0.002)
+
+    def submit_all(submitter):
+        for n in range(20):
+            jobs.submit(f'job-{submitter}-{n}', work, submitter, n)
+
+    submitters = [threading.Thread(target=submit_all, args=(submitter,)) for submitter in range(8)]
+    for thread in submitters:
+        thread.start()
+    for thread in submitters:
+        thread.join()
+    job_ids = [f'job-{submitter}-{n}' for submitter in range(8) for n in range(20)]
+    wait_for(lambda: all(jobs.get(job_id)['status'] == SUCCEEDED for job_id in job_ids))
+
+    for submitter in range(8):
+        assert [n for s, n in order if s == submitter] == list(range(20))
+    assert admission.stats()['queued'] == admission.stats()['running'] == 0
+
+
+def test_waiting_jobs_hold_no_threads():
+    """Jobs waiting for a slot are queued with a position and do not occupy the pool"""
+    admission = AdmissionController(max_running=1, max_queued=5)
+    jobs = JobManager(max_workers=1, admission=admission)
+    release = threading.Event()
+
+    jobs.submit('blocking', lambda progress=None: release.wait(TIMEOUT))
+    waiting = jobs.submit('waiting', lambda progress=None: 'done')
+    assert waiting['status'] == QUEUED and waiting['queue_position'] == 1
+
+    release.set()
+    wait_for(lambda: jobs.get('waiting')['status'] == SUCCEEDED)
+    assert jobs.get('waiting')['result'] == 'done'
+
+
+def test_rejected_submission_leaves_no_job():
+    """A rejected submission is not recorded as a job"""
+    admission = AdmissionController(max_running=1, max_queued=0)
+    jobs = JobManager(max_workers=1, admission=admission)
+    release = threading.Event()
+    jobs.submit('running', lambda progress=None: release.wait(TIMEOUT))
+
+    try:
+        jobs.submit('rejected', lambda progress=None: None)
+        assert False, "Expected AdmissionRejected"
+    except AdmissionRejected:
+        pass
+    assert jobs.get('rejected') is None
+    release.set()
+
+
+def test_failed_job_releases_its_slot():
+    """A job that raises still frees its slot for the next one"""
+    admission = AdmissionController(max_running=1, max_queued=5)
+    jobs = JobManager(max_workers=1, admission=admission)
+
+    def fail(progress=None):
+        raise RuntimeError('boom')
+
+    jobs.submit('failing', fail)
+    jobs.submit('next', lambda progress=None: 'ok')
+    wait_for(lambda: jobs.get('next')['status'] == SUCCEEDED)
+    assert jobs.get('failing')['status'] == FAILED and jobs.get('failing')['error'] == 'boom'
+
+
+def test_synchronous_mode_runs_inline():
+    """With synchronous=True the job has finished when submit() returns"""
+    jobs = JobManager(synchronous=True, admission=AdmissionController(max_running=1))
+    assert jobs.submit('inline', lambda progress=None: 42)['result'] == 42
+
+
+TESTS = [
+    test_slots_granted_in_arrival_order,
+    test_full_queue_rejects,
+    test_memory_budget_holds_back_large_runs,
+    test_job_manager_never_deadlocks,
+    test_waiting_jobs_hold_no_threads,
+    test_rejected_submission_leaves_no_job,
+    test_failed_job_releases_its_slot,
+    test_synchronous_mode_runs_inline,
+]
+
+if __name__ == '__main__':
+    print("Testing Admission Control")
+    print("="*60)
+
+    results = {}
+    for test in TESTS:
+        try:
+            test()
+            results[test.__name__] = "PASS"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            results[test.__name__] = "FAIL"
+
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    print("="*60)
+    sys.exit(0 if all(result == "PASS" for result in results.values()) else 1)
@@ -9,8 +9,11 @@ import os
 # Add src to path
 sys.path.insert(0, os.path.abspath('.'))
 
+from src.config import configure_logging
 from src.orchestrator import ReconciliationOrchestrator
 
+configure_logging("config.json")
+
 def test_sample_file(filename):
     """Test processing a sample file"""
     print(f"\n{'='*60}")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test resuming an interrupted run from its billing checkpoint
+"""
+
+import sys
+import os
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.config import configure_logging
+from src.checkpoint import RunCheckpoint
+from src.file_parser import ExcelFileParser
+from src.mock_ebs import MockEBS
+
+configure_logging(level="WARNING")
+
+CHUNK_SIZE = 40
+
+
+class Interrupted(Exception):
+    """Stands in for a crash in the middle of a run"""
+
+
+def load_encounters():
+    """Encounters of the large sample file"""
+    encounters, _ = ExcelFileParser({}).parse_file(os.path.join("data/input", "sample_large.xlsx"))
+    return encounters
+
+
+def interrupted_run(path, encounters, chunks_before_crash):
+    """Evaluate with checkpointing and crash after chunks_before_crash chunks"""
+    mock_ebs = MockEBS()
+    checkpoint = RunCheckpoint(path, CHUNK_SIZE)
+    checkpoint.open(mock_ebs, resume=False)
+    calls = [0]
+
+    def crashing_evaluate(chunk):
+        if calls[0] == chunks_before_crash:
+            raise Interrupted()
+        calls[0] += 1
+        return mock_ebs.batch_evaluate(chunk)
+
+    try:
+        checkpoint.wrap(crashing_evaluate, mock_ebs)(encounters)
+        assert False, "Expected the run to be interrupted"
+    except Interrupted:
+        pass
+
+
+def resumed_run(path, encounters):
+    """Resume from the checkpoint, returning (results, rows evaluated, checkpoint)"""
+    mock_ebs = MockEBS()
+    checkpoint = RunCheckpoint(path, CHUNK_SIZE)
+    checkpoint.open(mock_ebs, resume=True)
+    evaluated = [0]
+
+    def counting_evaluate(chunk):
+        evaluated[0] += len(chunk)
+        return mock_ebs.batch_evaluate(chunk)
+
+    return checkpoint.wrap(counting_evaluate, mock_ebs)(encounters), evaluated[0], checkpoint
+
+
+def as_tuples(results):
+    """Comparable form of billing results, claim IDs included"""
+    return [(r.encounter_key, r.success, r.reason, r.claim_id) for r in results]
+
+
+def test_resume_evaluates_only_remaining_rows():
+    """A resumed run reuses checkpointed results and matches an uninterrupted run"""
+    encounters = load_encounters()
+    expected = as_tuples(MockEBS().batch_evaluate(encounters))
+    path = os.path.join(tempfile.mkdtemp(), 'run.jsonl')
+
+    interrupted_run(path, encounters, chunks_before_crash=2)
+    results, evaluated, checkpoint = resumed_run(path, encounters)
+
+    assert checkpoint.restored_used == 2 * CHUNK_SIZE
+    assert evaluated == len(encounters) - 2 * CHUNK_SIZE
+    assert as_tuples(results) == expected
+
+    checkpoint.complete()
+    assert not os.path.exists(path)
+
+
+def test_truncated_last_line_is_ignored():
+    """A checkpoint cut off mid-write resumes from its last complete chunk"""
+    encounters = load_encounters()
+    expected = as_tuples(MockEBS().batch_evaluate(encounters))
+    path = os.path.join(tempfile.mkdtemp(), 'run.jsonl')
+
+    interrupted_run(path, encounters, chunks_before_crash=3)
+    with open(path, 'r') as f:
+        lines = f.readlines()
+    with open(path, 'w') as f:
+        f.writelines(lines[:2])
+        f.write(lines[2][:len(lines[2]) // 2])
+
+    results, evaluated, checkpoint = resumed_run(path, encounters)
+    assert checkpoint.restored_used == 2 * CHUNK_SIZE
+    assert evaluated == len(encounters) - 2 * CHUNK_SIZE
+    assert as_tuples(results) == expected
+
+
+def test_fresh_run_discards_old_checkpoint():
+    """Without resume, results of an earlier interrupted run are not reused"""
+    encounters = load_encounters()
+    path = os.path.join(tempfile.mkdtemp(), 'run.jsonl')
+    interrupted_run(path, encounters, chunks_before_crash=1)
+
+    mock_ebs = MockEBS()
+    checkpoint = RunCheckpoint(path, CHUNK_SIZE)
+    checkpoint.open(mock_ebs, resume=False)
+    checkpoint.wrap(mock_ebs.batch_evaluate, mock_ebs)(encounters)
+    assert checkpoint.restored_used == 0
+
+
+TESTS = [
+    test_resume_evaluates_only_remaining_rows,
+    test_truncated_last_line_is_ignored,
+    test_fresh_run_discards_old_checkpoint,
+]
+
+if __name__ == '__main__':
+    print("Testing Run Checkpoints")
+    print("="*60)
+
+    results = {}
+    for test in TESTS:
+        try:
+            test()
+            results[test.__name__] = "PASS"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            results[test.__name__] = "FAIL"
+
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    print("="*60)
+    sys.exit(0 if all(result == "PASS" for result in results.values()) else 1)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite job queue: leases, heartbeats and expiry
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.job_queue import JobQueue, QUEUED, RUNNING, SUCCEEDED, FAILED
+
+LEASE_SECONDS = 0.3
+
+
+def make_queue(max_attempts=3):
+    """Queue in a fresh temporary folder"""
+    folder = tempfile.mkdtemp()
+    return JobQueue(os.path.join(folder, 'jobs.sqlite3'), lease_seconds=LEASE_SECONDS, max_attempts=max_attempts)
+
+
+def test_claim_leases_each_job_once():
+    """Two workers never claim the same job, and jobs come out oldest first"""
+    queue = make_queue()
+    first = queue.enqueue('a.xlsx')
+    second = queue.enqueue('b.xlsx')
+
+    job_a = queue.claim('worker-1')
+    job_b = queue.claim('worker-2')
+    assert (job_a['id'], job_b['id']) == (first, second)
+    assert job_a['status'] == RUNNING and job_a['lease_owner'] == 'worker-1' and job_a['attempts'] == 1
+    assert queue.claim('worker-3') is None
+
+
+def test_heartbeat_keeps_lease():
+    """A job whose lease is renewed is not handed to another worker"""
+    queue = make_queue()
+    job_id = queue.enqueue('a.xlsx')
+    queue.claim('worker-1')
+
+    for _ in range(3):
+        time.sleep(LEASE_SECONDS / 2)
+        assert queue.heartbeat(job_id, 'worker-1')
+    assert queue.claim('worker-2') is None
+    assert queue.complete(job_id, 'worker-1', {'billed': 1})
+    assert queue.get(job_id)['status'] == SUCCEEDED
+    assert queue.get(job_id)['result'] == {'billed': 1}
+
+
+def test_expired_lease_is_reclaimed():
+    """A job whose worker stops heartbeating is retried by another worker"""
+    queue = make_queue()
+    job_id = queue.enqueue('a.xlsx')
+    queue.claim('worker-1')
+
+    time.sleep(LEASE_SECONDS * 1.5)
+    job = queue.claim('worker-2')
+    assert job['id'] == job_id and job['lease_owner'] == 'worker-2' and job['attempts'] == 2
+
+    # The first worker lost the lease: its heartbeat and result are refused
+    assert not queue.heartbeat(job_id, 'worker-1')
+    assert not queue.complete(job_id, 'worker-1', {})
+    assert queue.complete(job_id, 'worker-2', {})
+
+
+def test_expired_final_attempt_fails():
+    """A job whose lease expires on its last attempt is failed, not retried"""
+    queue = make_queue(max_attempts=1)
+    job_id = queue.enqueue('a.xlsx')
+    queue.claim('worker-1')
+
+    time.sleep(LEASE_SECONDS * 1.5)
+    assert queue.claim('worker-2') is None
+    job = queue.get(job_id)
+    assert job['status'] == FAILED and 'Lease expired' in job['error']
+
+
+def test_fail_requeues_until_attempts_run_out():
+    """fail() puts the job back in the queue while attempts remain"""
+    queue = make_queue(max_attempts=2)
+    job_id = queue.enqueue('a.xlsx')
+
+    queue.claim('worker-1')
+    assert queue.fail(job_id, 'worker-1', 'boom')
+    assert queue.get(job_id)['status'] == QUEUED
+
+    queue.claim('worker-1')
+    assert queue.fail(job_id, 'worker-1', 'boom again')
+    job = queue.get(job_id)
+    assert job['status'] == FAILED and job['error'] == 'boom again'
+    assert queue.counts() == {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 1}
+
+
+TESTS = [
+    test_claim_leases_each_job_once,
+    test_heartbeat_keeps_lease,
+    test_expired_lease_is_reclaimed,
+    test_expired_final_attempt_fails,
+    test_fail_requeues_until_attempts_run_out,
+]
+
+if __name__ == '__main__':
+    print("Testing Job Queue")
+    print("="*60)
+
+    results = {}
+    for test in TESTS:
+        try:
+            test()
+            results[test.__name__] = "PASS"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            results[test.__name__] = "FAIL"
+
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    print("="*60)
+    sys.exit(0 if all(result == "PASS" for result in results.values()) else 1)
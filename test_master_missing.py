@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test concurrent Master Missing ledger updates (version check and re-merge)
+"""
+
+import sys
+import os
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.config import configure_logging
+from src.master_missing_manager import MasterMissingManager, LedgerChange
+from src.models import MasterMissingRecord
+
+configure_logging(level="WARNING")
+
+EXECUTION_DATE = "01-15-2025"
+
+
+def make_manager(folder, **config):
+    """Manager writing its ledger to folder"""
+    return MasterMissingManager({"folderPath": folder, **config})
+
+
+def record_for(name, date_of_service, reason="Missing diagnosis code"):
+    """Ledger record of a not-billed encounter, keyed the way the ledger keys stored rows"""
+    record = MasterMissingRecord(
+        patient_name=name, dob="01-01-1950", date_of_service=date_of_service,
+        type_of_care="SNF", type_of_visit="Follow-up", facility="Facility A",
+        last_attempt_to_process=EXECUTION_DATE, reason_for_not_billed=reason
+    )
+    record.encounter_key = MasterMissingManager._ledger_key(record)
+    return record
+
+
+def missing(name, date_of_service="01-10-2025", reason="Missing diagnosis code"):
+    """Ledger change adding (or updating) a not-billed encounter"""
+    record = record_for(name, date_of_service, reason)
+    return LedgerChange(record.encounter_key, date_of_service, record)
+
+
+def billed(name, date_of_service="01-10-2025"):
+    """Ledger change removing an encounter that is now billed"""
+    return LedgerChange(record_for(name, date_of_service).encounter_key, date_of_service, None)
+
+
+def apply(manager, delta):
+    """Apply delta the way a run does"""
+    output_path = os.path.join(manager.folder_path, f"Master Missing to {EXECUTION_DATE}.xlsx")
+    return manager.apply_results(delta, EXECUTION_DATE, output_path)
+
+
+def ledger(manager):
+    """Patient names currently in the ledger, read back from disk"""
+    if manager.partitioned:
+        records = manager.partition_store.load_all()
+    else:
+        manager.clear_cache()
+        records = manager.load_previous_file()
+    return {record.patient_name for record in records.values()}
+
+
+def write_during_merge(manager, other, delta, times=1):
+    """Make other commit delta right after manager loads the ledger, times times"""
+    merge = manager._merge
+    remaining = [times]
+
+    def merge_then_conflict(*args, **kwargs):
+        result = merge(*args, **kwargs)
+        if remaining[0] > 0:
+            remaining[0] -= 1
+            apply(other, delta)
+        return result
+
+    manager._merge = merge_then_conflict
+
+
+def test_conflicting_write_is_remerged():
+    """A run whose ledger changed underneath it re-merges instead of overwriting"""
+    folder = tempfile.mkdtemp()
+    first, second = make_manager(folder), make_manager(folder)
+    apply(first, [missing("A"), missing("B")])
+
+    # While the first run merges, another run adds C and bills B
+    write_during_merge(first, second, [missing("C"), billed("B")])
+    _, stats = apply(first, [missing("D")])
+
+    assert stats["retries"] == 1
+    assert ledger(first) == {"A", "C", "D"}
+    assert stats["version"] == first.current_version() == 3
+
+
+def test_persistent_contention_merges_under_lock():
+    """After max_merge_retries conflicts the final merge holds the lock and cannot lose writes"""
+    folder = tempfile.mkdtemp()
+    first, second = make_manager(folder, maxMergeRetries=1), make_manager(folder)
+    apply(first, [missing("A")])
+
+    write_during_merge(first, second, [missing("B")], times=2)
+    _, stats = apply(first, [missing("D")])
+
+    assert stats["retries"] == 2
+    assert ledger(first) == {"A", "B", "D"}
+
+
+def test_partitioned_conflict_is_remerged():
+    """Partitioned ledgers get the same compare-and-swap protection"""
+    folder = tempfile.mkdtemp()
+    first = make_manager(folder, partitioned=True)
+    second = make_manager(folder, partitioned=True)
+    apply(first, [missing("A", "01-10-2025"), missing("B", "02-10-2025")])
+
+    write_during_merge(first, second, [missing("C", "01-12-2025"), billed("B", "02-10-2025")])
+    _, stats = apply(first, [missing("D", "01-20-2025")])
+
+    assert stats["retries"] == 1
+    assert ledger(first) == {"A", "C", "D"}
+    assert first.partition_store.list_partitions() == ["2025-01"]
+
+
+def test_update_keeps_first_seen_fields():
+    """A re-merged update only refreshes the last attempt and reason"""
+    folder = tempfile.mkdtemp()
+    first, second = make_manager(folder), make_manager(folder)
+    apply(first, [missing("A", reason="Missing CPT")])
+
+    write_during_merge(first, second, [missing("B")])
+    updated, stats = apply(first, [missing("A", reason="Missing diagnosis code")])
+
+    assert stats["updated"] == 1 and stats["added"] == 0
+    assert updated[record_for("A", "01-10-2025").encounter_key].reason_for_not_billed == "Missing diagnosis code"
+    assert ledger(first) == {"A", "B"}
+
+
+TESTS = [
+    test_conflicting_write_is_remerged,
+    test_persistent_contention_merges_under_lock,
+    test_partitioned_conflict_is_remerged,
+    test_update_keeps_first_seen_fields,
+]
+
+if __name__ == '__main__':
+    print("Testing Master Missing Ledger Concurrency")
+    print("="*60)
+
+    results = {}
+    for test in TESTS:
+        try:
+            test()
+            results[test.__name__] = "PASS"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            results[test.__name__] = "FAIL"
+
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    print("="*60)
+    sys.exit(0 if all(result == "PASS" for result in results.values()) else 1)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test the results preview built while the reconciliation file is written
+"""
+
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.config import configure_logging
+from src.file_parser import ExcelFileParser
+from src.mock_ebs import MockEBS
+from src.reconciliation_generator import DATA_HEADERS, PreviewBuffer
+
+configure_logging(level="WARNING")
+
+REASONS = ["Missing diagnosis code", "Missing CPT code", "Invalid facility"]
+
+
+def make_row(n):
+    """Data sheet row; every second row is not billed, cycling through REASONS"""
+    values = dict.fromkeys(DATA_HEADERS, "")
+    values["Patient Name"] = f"Patient {n:03d}"
+    values["Billed"] = "Yes" if n % 2 else "No"
+    values["Reason for not billed"] = "" if n % 2 else REASONS[(n // 2) % len(REASONS)]
+    return [values[header] for header in DATA_HEADERS]
+
+
+def test_counts_include_rows_in_the_head():
+    """Not-billed rows among the first max_rows are counted and sampled too"""
+    preview = PreviewBuffer(max_rows=5, samples_per_reason=2)
+    rows = [make_row(n) for n in range(30)]
+    for row in rows:
+        preview.add(row)
+
+    samples = preview.not_billed_samples()
+    not_billed = [row for row in rows if row[DATA_HEADERS.index("Billed")] == "No"]
+    assert len(preview.rows) == 5
+    assert sum(sample["count"] for sample in samples) == len(not_billed) == 15
+    assert {sample["reason"]: sample["count"] for sample in samples} == dict.fromkeys(REASONS, 5)
+    assert all(len(sample["rows"]) == 2 for sample in samples)
+
+    # The first not-billed row is both in the head and the first sample of its reason
+    first = samples[[sample["reason"] for sample in samples].index(REASONS[0])]["rows"][0]
+    assert first["Patient Name"] == "Patient 000" == preview.preview_rows()[0]["Patient Name"]
+
+
+def test_fill_counts_match_not_billed_total():
+    """Filled from a run's results, the reason counts add up to the not-billed total"""
+    encounters, _ = ExcelFileParser({}).parse_file(os.path.join("data/input", "sample_mixed.xlsx"))
+    results = MockEBS().batch_evaluate(encounters)
+    not_billed = sum(1 for result in results if not result.success)
+
+    preview = PreviewBuffer()
+    assert len(encounters) > preview.max_rows
+    preview.fill(encounters, results)
+
+    assert not_billed > 0
+    assert sum(sample["count"] for sample in preview.not_billed_samples()) == not_billed
+    assert len(preview.rows) == preview.max_rows
+
+
+def test_reasons_beyond_max_reasons_are_not_tracked():
+    """At most max_reasons reasons are kept"""
+    preview = PreviewBuffer(max_rows=0, max_reasons=2)
+    for n in range(6):
+        values = dict.fromkeys(DATA_HEADERS, "")
+        values["Billed"] = "No"
+        values["Reason for not billed"] = f"Reason {n % 3}"
+        preview.add([values[header] for header in DATA_HEADERS])
+
+    assert [sample["reason"] for sample in preview.not_billed_samples()] == ["Reason 0", "Reason 1"]
+
+
+TESTS = [
+    test_counts_include_rows_in_the_head,
+    test_fill_counts_match_not_billed_total,
+    test_reasons_beyond_max_reasons_are_not_tracked,
+]
+
+if __name__ == '__main__':
+    print("Testing Results Preview")
+    print("="*60)
+
+    results = {}
+    for test in TESTS:
+        try:
+            test()
+            results[test.__name__] = "PASS"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            results[test.__name__] = "FAIL"
+
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    print("="*60)
+    sys.exit(0 if all(result == "PASS" for result in results.values()) else 1)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test the per-job result row store: cursor pagination, sorting and filters
+"""
+
+import sys
+import os
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.reconciliation_generator import DATA_HEADERS
+from src.result_rows import ResultRowWriter, ResultRows
+
+ROW_COUNT = 57
+FACILITIES = ["Facility A", "Facility B", "Facility C"]
+
+
+def make_row(n):
+    """Data sheet row; every third row is not billed, dates of service repeat"""
+    values = dict.fromkeys(DATA_HEADERS, "")
+    values.update({
+        "Patient Name": f"Patient {n:03d}",
+        "DOB": "01-01-1950",
+        "Date of Service": f"{(n % 12) + 1:02d}-{(n % 5) + 1:02d}-2024",
+        "Facility": FACILITIES[(n // 2) % 3],
+        "Servicing Provider": f"Dr. {n % 4}",
+        "Billed": "No" if n % 3 == 0 else "Yes",
+        "Reason for not billed": "Missing diagnosis code" if n % 3 == 0 else "",
+    })
+    return [values[header] for header in DATA_HEADERS]
+
+
+def build_store():
+    """Row store holding ROW_COUNT rows"""
+    writer = ResultRowWriter(os.path.join(tempfile.mkdtemp(), 'rows.sqlite3'))
+    for n in range(ROW_COUNT):
+        writer.add(make_row(n))
+    return ResultRows(writer.close())
+
+
+def read_all(rows, limit, **query):
+    """Follow next_cursor to the end, returning every row and the page sizes"""
+    collected, pages, cursor = [], [], None
+    while True:
+        page, cursor = rows.query(cursor=cursor, limit=limit, **query)
+        collected.extend(page)
+        pages.append(len(page))
+        if cursor is None:
+            return collected, pages
+
+
+def test_pages_cover_every_row_once():
+    """Pages in file order return each row exactly once, ending without a cursor"""
+    with build_store() as rows:
+        collected, pages = read_all(rows, 10)
+    assert [row["Patient Name"] for row in collected] == [f"Patient {n:03d}" for n in range(ROW_COUNT)]
+    assert pages == [10, 10, 10, 10, 10, 7]
+
+
+def test_sorted_pages_with_ties():
+    """Sorting on a column with many equal values neither skips nor repeats rows"""
+    with build_store() as rows:
+        for descending in (False, True):
+            collected, _ = read_all(rows, 7, sort="Facility", descending=descending)
+            names = [row["Patient Name"] for row in collected]
+            assert len(names) == len(set(names)) == ROW_COUNT
+            facilities = [row["Facility"] for row in collected]
+            assert facilities == sorted(facilities, reverse=descending)
+
+
+def test_date_of_service_sorts_chronologically():
+    """Date of service sorts by date, not by its MM-dd-yyyy text"""
+    with build_store() as rows:
+        collected, _ = read_all(rows, 9, sort="date_of_service")
+    dates = [row["Date of Service"] for row in collected]
+    assert dates == sorted(dates, key=lambda value: (value[6:], value[:2], value[3:5]))
+
+
+def test_filters_apply_to_every_page():
+    """Filtered pagination returns only matching rows and agrees with count()"""
+    filters = {"billed": "No", "facility": "Facility A"}
+    expected = [n for n in range(ROW_COUNT) if n % 3 == 0 and (n // 2) % 3 == 0]
+    with build_store() as rows:
+        collected, _ = read_all(rows, 4, filters=filters)
+        assert rows.count(filters) == len(expected)
+        assert rows.count({"date_from": "2024-06-01", "date_to": "2024-06-30"}) == sum(
+            1 for n in range(ROW_COUNT) if (n % 12) + 1 == 6
+        )
+    assert [row["Patient Name"] for row in collected] == [f"Patient {n:03d}" for n in expected]
+
+
+def test_invalid_input_is_rejected():
+    """Unknown filters and sort columns and malformed cursors raise ValueError"""
+    with build_store() as rows:
+        for query in ({"filters": {"color": "red"}}, {"sort": "Shoe Size"}, {"cursor": "not-a-cursor"}):
+            try:
+                rows.query(**query)
+                assert False, f"Expected ValueError for {query}"
+            except ValueError:
+                pass
+
+
+TESTS = [
+    test_pages_cover_every_row_once,
+    test_sorted_pages_with_ties,
+    test_date_of_service_sorts_chronologically,
+    test_filters_apply_to_every_page,
+    test_invalid_input_is_rejected,
+]
+
+if __name__ == '__main__':
+    print("Testing Result Row Store")
+    print("="*60)
+
+    results = {}
+    for test in TESTS:
+        try:
+            test()
+            results[test.__name__] = "PASS"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            results[test.__name__] = "FAIL"
+
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    print("="*60)
+    sys.exit(0 if all(result == "PASS" for result in results.values()) else 1)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Test the web application's results stores: LRU eviction, spillover, TTL expiry and sharing
+"""
+
+import sys
+import os
+import json
+import sqlite3
+import tempfile
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.abspath('.'))
+
+from web import results_store as results_store_module
+from web.results_store import ResultsStore, SQLiteResultsStore, create_results_store
+
+TTL = 100
+
+
+class FakeClock:
+    """Stands in for the time module of the store, advanced by hand"""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def with_clock(test):
+    """Run test with a fake clock installed in the results store module"""
+    def wrapper():
+        clock = FakeClock()
+        results_store_module.time = clock
+        try:
+            test(clock)
+        finally:
+            results_store_module.time = time
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+
+def job_results(n, padding=0):
+    """Results of job n, padded to make them larger"""
+    return {'job': n, 'padding': 'x' * padding}
+
+
+def spilled(folder):
+    """Job IDs currently spilled to folder"""
+    return sorted(name[:-len('.json')] for name in os.listdir(folder) if name.endswith('.json'))
+
+
+def test_evicts_least_recently_used_by_count():
+    """Beyond max_entries the least recently used entry goes first"""
+    store = ResultsStore(max_entries=3)
+    for job_id in ['a', 'b', 'c']:
+        store[job_id] = job_results(job_id)
+    store.get('a')
+    store['d'] = job_results('d')
+
+    assert 'b' not in store
+    assert all(job_id in store for job_id in ['a', 'c', 'd'])
+    assert len(store) == 3
+
+
+def test_evicts_by_bytes():
+    """Beyond max_bytes entries are evicted until the rest fit, keeping at least one"""
+    size = len(json.dumps(job_results('a', 1000)))
+    store = ResultsStore(max_entries=100, max_bytes=3 * size)
+    for job_id in ['a', 'b', 'c', 'd']:
+        store[job_id] = job_results(job_id, 1000)
+
+    assert store.stats() == {'entries': 3, 'bytes': 3 * size}
+    assert 'a' not in store
+
+    store['huge'] = job_results('huge', 10 * size)
+    assert len(store) == 1 and store['huge']['job'] == 'huge'
+
+
+def test_spilled_entries_reload():
+    """Evicted entries spill to disk and come back on access, spilling another in turn"""
+    folder = tempfile.mkdtemp()
+    store = ResultsStore(max_entries=2, spill_folder=folder)
+    for job_id in ['a', 'b', 'c']:
+        store[job_id] = job_results(job_id)
+    assert spilled(folder) == ['a']
+
+    assert store['a'] == job_results('a')
+    assert spilled(folder) == ['b']
+    assert store.stats()['entries'] == 2
+
+
+def test_reloaded_entry_is_kept_over_budget():
+    """An entry reloaded from disk stays in memory even if it alone exceeds max_bytes"""
+    folder = tempfile.mkdtemp()
+    size = len(json.dumps(job_results('a', 1000)))
+    store = ResultsStore(max_entries=100, max_bytes=2 * size, spill_folder=folder)
+    store['big'] = job_results('big', 5 * size)
+    store['a'] = job_results('a', 1000)
+    store['b'] = job_results('b', 1000)
+    assert spilled(folder) == ['big']
+
+    assert store['big']['job'] == 'big'
+    assert spilled(folder) == ['a', 'b']
+    assert store.stats()['entries'] == 1
+
+
+@with_clock
+def test_entries_expire_in_memory(clock):
+    """Entries older than ttl_seconds are gone, as are expired deduplication keys"""
+    store = ResultsStore(ttl_seconds=TTL)
+    store['a'] = job_results('a')
+    store.index_job('key', 'a')
+    clock.advance(TTL - 1)
+    assert 'a' in store and store.find_job('key') == 'a'
+
+    clock.advance(2)
+    assert store.get('a') is None and len(store) == 0
+    assert store.find_job('key') is None
+
+
+@with_clock
+def test_entries_expire_on_disk(clock):
+    """Spilled entries expire too, whether read back or purged"""
+    folder = tempfile.mkdtemp()
+    store = ResultsStore(max_entries=1, ttl_seconds=TTL, spill_folder=folder)
+    store['a'] = job_results('a')
+    store['b'] = job_results('b')
+    store['c'] = job_results('c')
+    assert spilled(folder) == ['a', 'b']
+
+    clock.advance(TTL + 1)
+    assert store.get('a') is None
+    assert spilled(folder) == ['b']
+
+    # The periodic purge removes spill files by their modification time (set to stored_at)
+    clock.advance(store.DISK_PURGE_INTERVAL)
+    store['d'] = job_results('d')
+    assert spilled(folder) == []
+    assert 'b' not in store and 'c' not in store
+
+
+def test_unsafe_job_ids_never_touch_disk():
+    """Job IDs that are not safe file names are neither spilled nor loaded"""
+    parent = tempfile.mkdtemp()
+    folder = os.path.join(parent, 'spill')
+    os.makedirs(folder)
+    with open(os.path.join(parent, 'outside.json'), 'w') as f:
+        json.dump({'stored_at': time.time(), 'results': {'job': 'outside'}}, f)
+
+    store = ResultsStore(max_entries=1, spill_folder=folder)
+    assert store.get('../outside') is None
+
+    store['../escape'] = job_results('escape')
+    store['a' * 65] = job_results('long')
+    store['safe-id'] = job_results('safe')
+    assert spilled(folder) == []
+    assert sorted(os.listdir(parent)) == ['outside.json', 'spill']
+    assert '../escape' not in store
+
+
+def sqlite_store():
+    """SQLite store in a fresh temporary folder"""
+    return SQLiteResultsStore(os.path.join(tempfile.mkdtemp(), 'results.sqlite3'), ttl_seconds=TTL)
+
+
+def test_sqlite_store_is_shared():
+    """Results, status and deduplication keys written by one store are read by another"""
+    writer = sqlite_store()
+    reader = SQLiteResultsStore(writer.db_path, ttl_seconds=TTL)
+    writer['job-1'] = job_results('job-1')
+    writer.set_status('job-1', {'status': 'succeeded'})
+    writer.index_job('key', 'job-1')
+
+    assert reader['job-1'] == job_results('job-1')
+    assert reader.get_status('job-1') == {'status': 'succeeded'}
+    assert reader.find_job('key') == 'job-1'
+    assert 'job-2' not in reader and reader.get_status('job-2') is None
+
+
+@with_clock
+def test_sqlite_upsert_restarts_ttl(clock):
+    """Writing results or status refreshes stored_at, so a long job's results do not expire early"""
+    store = sqlite_store()
+    store.set_status('job-1', {'status': 'running'})
+    clock.advance(TTL - 1)
+    store['job-1'] = job_results('job-1')
+    store.set_status('job-1', {'status': 'succeeded'})
+
+    clock.advance(TTL - 1)
+    assert store['job-1'] == job_results('job-1')
+    assert store.get_status('job-1') == {'status': 'succeeded'}
+
+    clock.advance(2)
+    assert 'job-1' not in store and store.get_status('job-1') is None
+
+
+@with_clock
+def test_sqlite_expired_rows_are_purged(clock):
+    """Expired rows and deduplication keys are deleted on a later write"""
+    store = sqlite_store()
+    store['old'] = job_results('old')
+    store.index_job('old-key', 'old')
+    clock.advance(TTL + store.PURGE_INTERVAL)
+    assert store.find_job('old-key') is None
+
+    store['new'] = job_results('new')
+    with sqlite3.connect(store.db_path) as conn:
+        assert conn.execute('SELECT job_id FROM results').fetchall() == [('new',)]
+        assert conn.execute('SELECT COUNT(*) FROM job_keys').fetchone()[0] == 0
+
+
+def test_backend_selected_by_config():
+    """web.resultsStore.backend picks the store"""
+    root = tempfile.mkdtemp()
+    assert isinstance(create_results_store({}, root), ResultsStore)
+    store = create_results_store({'backend': 'sqlite', 'databasePath': 'results.sqlite3'}, root)
+    assert isinstance(store, SQLiteResultsStore)
+    assert store.db_path == os.path.join(root, 'results.sqlite3')
+
+
+TESTS = [
+    test_evicts_least_recently_used_by_count,
+    test_evicts_by_bytes,
+    test_spilled_entries_reload,
+    test_reloaded_entry_is_kept_over_budget,
+    test_entries_expire_in_memory,
+    test_entries_expire_on_disk,
+    test_unsafe_job_ids_never_touch_disk,
+    test_sqlite_store_is_shared,
+    test_sqlite_upsert_restarts_ttl,
+    test_sqlite_expired_rows_are_purged,
+    test_backend_selected_by_config,
+]
+
+if __name__ == '__main__':
+    print("Testing Results Store")
+    print("="*60)
+
+    results = {}
+    for test in TESTS:
+        try:
+            test()
+            results[test.__name__] = "PASS"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            results[test.__name__] = "FAIL"
+
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    print("="*60)
+    sys.exit(0 if all(result == "PASS" for result in results.values()) else 1)
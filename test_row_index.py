@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test delta ingestion against the row index of the previous export
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+from dataclasses import replace
+
+# Add src to path
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.config import configure_logging
+from src.file_parser import ExcelFileParser
+from src.mock_ebs import MockEBS
+from src import row_index
+from src.row_index import RowIndex, RowDiff
+
+configure_logging(level="WARNING")
+
+CONFIG_HASH = "config-a"
+
+
+def load_encounters():
+    """Encounters of the large sample file, one per encounter key"""
+    encounters, _ = ExcelFileParser({}).parse_file(os.path.join("data/input", "sample_large.xlsx"))
+    unique = {}
+    for encounter in encounters:
+        unique.setdefault(encounter.generate_key(), encounter)
+    return list(unique.values())
+
+
+def run(index, encounters, config_hash=CONFIG_HASH, commit=True, fresh=False):
+    """Diff encounters against the index, returning (diff, results, rows evaluated)"""
+    mock_ebs = MockEBS()
+    evaluated = [0]
+
+    def counting_evaluate(chunk):
+        evaluated[0] += len(chunk)
+        return mock_ebs.batch_evaluate(chunk)
+
+    diff = RowDiff(index.begin(config_hash, fresh=fresh))
+    try:
+        results = diff.evaluate(encounters, counting_evaluate)
+        vanished = diff.vanished_count
+        if commit:
+            diff.commit()
+    finally:
+        diff.close()
+    return diff, results, evaluated[0], vanished
+
+
+def index_rows(index):
+    """(generations, rows) stored in the index database"""
+    with sqlite3.connect(index.index_path) as conn:
+        return (
+            conn.execute("SELECT COUNT(*) FROM generations").fetchone()[0],
+            conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0],
+        )
+
+
+def test_second_generation_evaluates_only_new_and_changed_rows():
+    """Unchanged rows reuse their result; changed, new and vanished rows are counted"""
+    encounters = load_encounters()
+    index = RowIndex(os.path.join(tempfile.mkdtemp(), 'rows.sqlite3'))
+    first, _, evaluated, _ = run(index, encounters)
+    assert first.new_count == evaluated == len(encounters)
+
+    # 10 rows edited in place, 5 rows removed, 3 rows renamed (a new key each)
+    current = [replace(e, chief_complaint=e.chief_complaint + " (edited)") for e in encounters[:10]]
+    current += [replace(e, patient_name=e.patient_name + " Jr") for e in encounters[10:13]]
+    current += encounters[18:]
+
+    # A small lookup batch makes the lookups span several IN queries
+    batch = row_index.LOOKUP_BATCH
+    row_index.LOOKUP_BATCH = 7
+    try:
+        second, results, evaluated, vanished = run(index, current)
+    finally:
+        row_index.LOOKUP_BATCH = batch
+
+    assert second.changed_count == 10
+    assert second.new_count == 3
+    assert second.unchanged_count == len(encounters) - 18
+    assert evaluated == second.evaluated_count == 13
+    assert vanished == 5 + 3
+
+    expected = MockEBS().batch_evaluate(current)
+    assert [(r.encounter_key, r.success, r.reason) for r in results] == \
+        [(r.encounter_key, r.success, r.reason) for r in expected]
+    assert index_rows(index) == (1, len(current))
+
+
+def test_uncommitted_generation_is_dropped_on_close():
+    """A run that does not commit leaves the previous generation as the index"""
+    encounters = load_encounters()
+    index = RowIndex(os.path.join(tempfile.mkdtemp(), 'rows.sqlite3'))
+    run(index, encounters)
+
+    edited = [replace(e, chief_complaint="Changed") for e in encounters]
+    failed, _, evaluated, _ = run(index, edited, commit=False)
+    assert failed.changed_count == evaluated == len(encounters)
+    assert index_rows(index) == (1, len(encounters))
+
+    third, _, evaluated, _ = run(index, encounters)
+    assert third.unchanged_count == len(encounters) and evaluated == 0
+
+
+def test_config_change_evaluates_every_row():
+    """A different configuration hash, or fresh=True, ignores the previous generation"""
+    encounters = load_encounters()
+    index = RowIndex(os.path.join(tempfile.mkdtemp(), 'rows.sqlite3'))
+    run(index, encounters)
+
+    reconfigured, _, evaluated, vanished = run(index, encounters, config_hash="config-b")
+    assert reconfigured.new_count == evaluated == len(encounters)
+    assert vanished == 0
+
+    fresh, _, evaluated, _ = run(index, encounters, config_hash="config-b", fresh=True)
+    assert fresh.new_count == evaluated == len(encounters)
+
+    again, _, evaluated, _ = run(index, encounters, config_hash="config-b")
+    assert again.unchanged_count == len(encounters) and evaluated == 0
+
+
+TESTS = [
+    test_second_generation_evaluates_only_new_and_changed_rows,
+    test_uncommitted_generation_is_dropped_on_close,
+    test_config_change_evaluates_every_row,
+]
+
+if __name__ == '__main__':
+    print("Testing Row Index")
+    print("="*60)
+
+    results = {}
+    for test in TESTS:
+        try:
+            test()
+            results[test.__name__] = "PASS"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            results[test.__name__] = "FAIL"
+
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    print("="*60)
+    sys.exit(0 if all(result == "PASS" for result in results.values()) else 1)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test serving repeated runs from the run result cache
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+from datetime import datetime
+
+# Add src to path
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.config import configure_logging
+from src.mock_ebs import MockEBS
+from src import orchestrator as orchestrator_module
+from src.orchestrator import ReconciliationOrchestrator
+
+configure_logging(level="WARNING")
+
+
+def make_workspace():
+    """Temporary folder with a config.json writing every output inside it"""
+    folder = tempfile.mkdtemp()
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    config["output"]["folderPath"] = "output"
+    config["masterMissing"]["folderPath"] = "output"
+    write_config(folder, config)
+    for name in ("sample_mixed.xlsx", "sample_missing_dx.xlsx"):
+        shutil.copy(os.path.join("data/input", name), folder)
+    return folder
+
+
+def write_config(folder, config):
+    """Write config.json into folder"""
+    with open(os.path.join(folder, "config.json"), "w") as f:
+        json.dump(config, f)
+
+
+def run(folder, input_name="sample_mixed.xlsx", **options):
+    """Run the orchestrator of folder, returning (summary, rows evaluated)"""
+    orchestrator = ReconciliationOrchestrator(os.path.join(folder, "config.json"))
+    batch_evaluate = MockEBS.batch_evaluate
+    evaluated = [0]
+
+    def counting_evaluate(self, encounters):
+        evaluated[0] += len(encounters)
+        return batch_evaluate(self, encounters)
+
+    MockEBS.batch_evaluate = counting_evaluate
+    try:
+        summary, _ = orchestrator.run(os.path.join(folder, input_name), **options)
+    finally:
+        MockEBS.batch_evaluate = batch_evaluate
+    return summary, evaluated[0]
+
+
+def run_on(folder, day, **options):
+    """Run with the execution date set to day"""
+    real_datetime = orchestrator_module.datetime
+
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls.combine(day, datetime.now().time())
+
+    orchestrator_module.datetime = FixedDatetime
+    try:
+        return run(folder, **options)
+    finally:
+        orchestrator_module.datetime = real_datetime
+
+
+def test_identical_rerun_is_served_from_cache():
+    """Same input, ledger version, configuration and date: no evaluation"""
+    folder = make_workspace()
+    first, evaluated = run(folder)
+    assert not first.cache_hit and evaluated == first.total_encounters == 25
+
+    second, evaluated = run(folder)
+    assert second.cache_hit and evaluated == 0
+    assert (second.billed_count, second.not_billed_count) == (first.billed_count, first.not_billed_count)
+
+    forced, evaluated = run(folder, force=True)
+    assert not forced.cache_hit and evaluated == 25
+
+
+def test_each_key_part_invalidates():
+    """A different input, ledger version, configuration or date is a miss"""
+    folder = make_workspace()
+    run(folder)
+
+    # Input: another file
+    summary, evaluated = run(folder, "sample_missing_dx.xlsx")
+    assert not summary.cache_hit and evaluated == summary.total_encounters
+    run(folder)
+    assert run(folder)[0].cache_hit
+
+    # Ledger version: another writer committed to the ledger, the outputs are untouched
+    ReconciliationOrchestrator(os.path.join(folder, "config.json")).master_missing_mgr._bump_version()
+    summary, evaluated = run(folder)
+    assert not summary.cache_hit and evaluated == 25
+    assert run(folder)[0].cache_hit
+
+    # Configuration: any setting (here the chunk size) changes the config hash
+    with open(os.path.join(folder, "config.json"), "r") as f:
+        config = json.load(f)
+    config["processing"]["chunkSize"] = 1000
+    write_config(folder, config)
+    summary, evaluated = run(folder)
+    assert not summary.cache_hit and evaluated == 25
+    assert run(folder)[0].cache_hit
+
+    # Execution date: output names and ledger dates depend on it
+    summary, evaluated = run_on(folder, datetime(2030, 1, 2).date())
+    assert not summary.cache_hit and evaluated == 25
+    assert run_on(folder, datetime(2030, 1, 2).date())[0].cache_hit
+
+
+def test_dry_run_is_never_served_for_a_real_run():
+    """A dry run neither reads nor fills the cache"""
+    folder = make_workspace()
+    dry, evaluated = run(folder, dry_run=True)
+    assert dry.dry_run and not dry.cache_hit and evaluated == 25
+
+    real, evaluated = run(folder)
+    assert not real.cache_hit and not real.dry_run and evaluated == 25
+    assert os.path.exists(real.general_reconciliation_file)
+
+    # A dry run after the real one is not served from the cache either
+    dry, evaluated = run(folder, dry_run=True)
+    assert dry.dry_run and not dry.cache_hit and evaluated == 25
+
+
+def test_replaced_output_is_a_miss():
+    """A cached run whose output file was removed is recomputed"""
+    folder = make_workspace()
+    first, _ = run(folder)
+    os.remove(first.general_reconciliation_file)
+
+    summary, evaluated = run(folder)
+    assert not summary.cache_hit and evaluated == 25
+    assert os.path.exists(summary.general_reconciliation_file)
+
+
+TESTS = [
+    test_identical_rerun_is_served_from_cache,
+    test_each_key_part_invalidates,
+    test_dry_run_is_never_served_for_a_real_run,
+    test_replaced_output_is_a_miss,
+]
+
+if __name__ == '__main__':
+    print("Testing Run Result Cache")
+    print("="*60)
+
+    results = {}
+    for test in TESTS:
+        try:
+            test()
+            results[test.__name__] = "PASS"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            results[test.__name__] = "FAIL"
+
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    print("="*60)
+    sys.exit(0 if all(result == "PASS" for result in results.values()) else 1)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Test the web application's uploads, upload deduplication and conditional, ranged and compressed downloads
+"""
+
+import sys
+import os
+import gzip
+import hashlib
+import io
+import json
+import tempfile
+import threading
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.config import configure_logging
+
+# Before importing the app, which configures logging from config.json otherwise
+configure_logging(level="WARNING")
+
+from web import app as webapp
+from web.admission import AdmissionController
+from web.jobs import JobManager, SUCCEEDED
+from web.results_store import ResultsStore
+from web.uploads import SpooledUpload
+from src.orchestrator import ReconciliationOrchestrator
+
+TIMEOUT = 10.0
+SAMPLE = os.path.join("data/input", "sample_mixed.xlsx")
+
+
+def wait_for(condition, timeout=TIMEOUT):
+    """Poll condition until it holds, failing after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+def isolated_app():
+    """Point the app at a fresh workspace, results store and job manager; returns a test client"""
+    folder = tempfile.mkdtemp()
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    config["output"]["folderPath"] = "output"
+    config["masterMissing"]["folderPath"] = "output"
+    with open(os.path.join(folder, "config.json"), "w") as f:
+        json.dump(config, f)
+
+    webapp.orchestrator = ReconciliationOrchestrator(os.path.join(folder, "config.json"))
+    webapp.results_store = ResultsStore()
+    webapp.job_manager = JobManager(
+        max_workers=2, status_store=webapp.results_store,
+        admission=AdmissionController(max_running=2, max_queued=8)
+    )
+    webapp.ROW_STORE_FOLDER = os.path.join(folder, "rows")
+    webapp.PROFILE_FOLDER = os.path.join(folder, "profiles")
+    return webapp.app.test_client()
+
+
+def upload(client, path=SAMPLE, **form):
+    """Upload a workbook with optional form fields, returning the response"""
+    with open(path, "rb") as f:
+        content = f.read()
+    return client.post("/api/upload", data={"file": (io.BytesIO(content), os.path.basename(path)), **form},
+                       content_type="multipart/form-data")
+
+
+def hold_runs():
+    """Make the orchestrator's runs wait until the returned event is set"""
+    release = threading.Event()
+    run = webapp.orchestrator.run
+
+    def held_run(*args, **kwargs):
+        release.wait(TIMEOUT)
+        return run(*args, **kwargs)
+
+    webapp.orchestrator.run = held_run
+    return release
+
+
+def finished_job(client):
+    """Upload the sample, wait for its job and return the job_id"""
+    job_id = upload(client).get_json()["job_id"]
+    wait_for(lambda: webapp.job_manager.get(job_id)["status"] == SUCCEEDED)
+    return job_id
+
+
+def test_duplicate_upload_attaches_then_replays():
+    """A duplicate joins the running job (202), and once it succeeded gets its results (200)"""
+    client = isolated_app()
+    release = hold_runs()
+
+    first = upload(client)
+    assert first.status_code == 202
+    job_id = first.get_json()["job_id"]
+
+    attached = upload(client)
+    assert attached.status_code == 202
+    assert attached.get_json()["job_id"] == job_id and attached.get_json()["deduplicated"]
+
+    release.set()
+    wait_for(lambda: webapp.job_manager.get(job_id)["status"] == SUCCEEDED)
+
+    replayed = upload(client)
+    assert replayed.status_code == 200
+    body = replayed.get_json()
+    assert body["job_id"] == job_id and body["deduplicated"]
+    assert body["results"]["summary"]["total_encounters"] == 25
+
+    forced = upload(client, force="true")
+    assert forced.status_code == 202
+    forced_id = forced.get_json()["job_id"]
+    assert forced_id != job_id
+    wait_for(lambda: webapp.job_manager.get(forced_id)["status"] == SUCCEEDED)
+
+
+def test_download_is_conditional_and_ranged():
+    """Downloads carry a strong ETag, answer If-None-Match with 304 and Range with 206"""
+    client = isolated_app()
+    job_id = finished_job(client)
+    url = f"/api/download/reconciliation?job_id={job_id}"
+
+    full = client.get(url)
+    assert full.status_code == 200
+    etag = full.headers["ETag"]
+    assert etag == f'"{webapp.results_store[job_id]["artifacts"]["reconciliation"]["sha256"]}"'
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+    partial = client.get(url, headers={"Range": "bytes=0-99"})
+    assert partial.status_code == 206
+    assert partial.headers["Content-Range"] == f"bytes 0-99/{len(full.data)}"
+    assert partial.data == full.data[:100]
+
+
+def test_gzip_only_when_accepted():
+    """Text outputs are served gzip-encoded only to clients that accept it"""
+    client = isolated_app()
+    folder = tempfile.mkdtemp()
+    csv_path = os.path.join(folder, "reconciliation.csv")
+    content = "".join(f"Patient {n},Facility A,Yes\n" for n in range(500)).encode()
+    with open(csv_path, "wb") as f:
+        f.write(content)
+    # A job stored before the artifact index existed: registered (and compressed) on first download
+    webapp.results_store["legacy-job"] = {"output_files": {"general_reconciliation": csv_path}}
+    url = "/api/download/reconciliation?job_id=legacy-job"
+
+    plain = client.get(url)
+    assert plain.status_code == 200 and "Content-Encoding" not in plain.headers
+    assert plain.data == content
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.data) == content
+    assert compressed.headers["ETag"] != plain.headers["ETag"]
+
+    refused = client.get(url, headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "Content-Encoding" not in refused.headers and refused.data == content
+
+
+def test_regenerated_output_is_gone():
+    """A download whose file was overwritten by a later run answers 410, not the new file"""
+    client = isolated_app()
+    job_id = finished_job(client)
+    path = webapp.results_store[job_id]["artifacts"]["reconciliation"]["path"]
+    with open(path, "ab") as f:
+        f.write(b"regenerated")
+
+    response = client.get(f"/api/download/reconciliation?job_id={job_id}")
+    assert response.status_code == 410 and not response.get_json()["success"]
+
+
+def test_upload_spills_past_max_size():
+    """An upload is hashed as it is written and reported spilled once it outgrows max_size"""
+    upload = SpooledUpload(max_size=100)
+    upload.write(b"x" * 100)
+    assert not upload.spilled
+    upload.write(b"x")
+    assert upload.spilled and upload.size == 101
+    assert upload.sha256 == hashlib.sha256(b"x" * 101).hexdigest()
+
+    upload.seek(0)
+    assert upload.read() == b"x" * 101
+    upload.close()
+
+
+TESTS = [
+    test_duplicate_upload_attaches_then_replays,
+    test_download_is_conditional_and_ranged,
+    test_gzip_only_when_accepted,
+    test_regenerated_output_is_gone,
+    test_upload_spills_past_max_size,
+]
+
+if __name__ == '__main__':
+    print("Testing Web Application")
+    print("="*60)
+
+    results = {}
+    for test in TESTS:
+        try:
+            test()
+            results[test.__name__] = "PASS"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            results[test.__name__] = "FAIL"
+
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    print("="*60)
+    sys.exit(0 if all(result == "PASS" for result in results.values()) else 1)
@@ -0,0 +1,184 @@
+"""
+Admission control for reconciliation runs in the web application
+"""
+
+from collections import OrderedDict
+import os
+import threading
+import time
+
+
+class AdmissionRejected(Exception):
+    """Raised when the wait queue is full; retry_after is a hint in seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_run_memory(input_file, bytes_per_input_byte=20, base_bytes=64 * 1024 * 1024):
+    """
+    Rough peak memory of a run from the size of its input workbook
+
+    input_file is a path or a SpooledUpload. XLSX files are compressed, and
+    every parsed row becomes an Encounter plus its billing result and output
+    row, so memory grows with a multiple of the file size on top of a fixed base.
+    """
+    size = getattr(input_file, 'size', None)
+    if size is None:
+        try:
+            size = os.path.getsize(input_file)
+        except (OSError, TypeError):
+            size = 0
+    return base_bytes + size * bytes_per_input_byte
+
+
+class _WaitingJob:
+    """A job admitted to the queue but not granted a run slot yet"""
+
+    __slots__ = ('memory_estimate', 'admitted_at', 'start', 'granted')
+
+    def __init__(self, memory_estimate, start):
+        self.memory_estimate = memory_estimate
+        self.admitted_at = time.monotonic()
+        self.start = start
+        self.granted = threading.Event()
+
+
+class AdmissionController:
+    """
+    Limits how many runs execute at once and how many may wait for a slot
+
+    Jobs are admitted on submission with a memory estimate and are granted a
+    run slot in arrival order, once a slot is free and the estimate fits in
+    what is left of the memory budget (a run larger than the whole budget
+    runs alone). Granting a slot calls the job's start callback, which hands
+    it to the executor, so a waiting job never holds a run thread. When
+    max_queued jobs are already waiting, admit() raises AdmissionRejected.
+
+    Usage (see JobManager):
+        admission.admit(job_id, memory_estimate, start=lambda: executor.submit(run))
+        ...                                   # in run(), once done:
+        admission.release(job_id)
+
+    Callers that run inline pass no start callback and block in
+    acquire(job_id) until the slot is granted.
+
+    Queue depth, running runs, reserved memory, rejections and wait time are
+    reported to an optional MetricsRegistry.
+    """
+
+    def __init__(self, max_running=2, max_queued=8, memory_budget_bytes=None, retry_after=30, metrics=None):
+        """Initialize controller"""
+        self.max_running = max(1, max_running)
+        self.max_queued = max(0, max_queued)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.retry_after = retry_after
+        self.metrics = metrics
+        self._waiting = OrderedDict()  # job_id -> _WaitingJob
+        self._running = {}  # job_id -> memory estimate
+        self._lock = threading.Lock()
+        self._publish()
+
+    def admit(self, job_id, memory_estimate=0, start=None):
+        """
+        Queue a job for a run slot
+
+        start() is called (outside the controller's lock) as soon as the slot
+        is granted, possibly before admit() returns.
+
+        Returns:
+            1-based position in the wait queue at admission
+
+        Raises:
+            AdmissionRejected: max_queued jobs are already waiting
+        """
+        with self._lock:
+            if len(self._waiting) >= self.max_queued and not self._has_free_slot():
+                if self.metrics:
+                    self.metrics.increment('admission_rejected_runs')
+                raise AdmissionRejected(
+                    f"Server busy: {len(self._running)} runs in progress and {len(self._waiting)} waiting",
+                    self.retry_after
+                )
+            self._waiting[job_id] = _WaitingJob(memory_estimate, start)
+            position = len(self._waiting)
+            granted = self._grant()
+        self._start(granted)
+        return position
+
+    def acquire(self, job_id):
+        """Block until an admitted job without a start callback is granted its slot"""
+        with self._lock:
+            waiting = self._waiting.get(job_id)
+        if waiting is not None:
+            waiting.granted.wait()
+
+    def release(self, job_id):
+        """Free the slot and memory of a started job, or withdraw a waiting one"""
+        with self._lock:
+            self._running.pop(job_id, None)
+            self._waiting.pop(job_id, None)
+            granted = self._grant()
+        self._start(granted)
+
+    def position(self, job_id):
+        """1-based position of a waiting job, or None if it is not waiting"""
+        with self._lock:
+            for position, waiting_id in enumerate(self._waiting, 1):
+                if waiting_id == job_id:
+                    return position
+        return None
+
+    def stats(self):
+        """Current queue depth, running runs and reserved memory"""
+        with self._lock:
+            return {
+                'queued': len(self._waiting),
+                'running': len(self._running),
+                'reserved_memory_bytes': sum(self._running.values()),
+                'max_running': self.max_running,
+                'max_queued': self.max_queued
+            }
+
+    def _has_free_slot(self):
+        """Whether a newly admitted job could start right away (caller holds the lock)"""
+        return not self._waiting and len(self._running) < self.max_running
+
+    def _fits(self, waiting):
+        """Whether a waiting job fits in the free slots and memory (caller holds the lock)"""
+        if len(self._running) >= self.max_running:
+            return False
+        if self.memory_budget_bytes is None or not self._running:
+            return True
+        return sum(self._running.values()) + waiting.memory_estimate <= self.memory_budget_bytes
+
+    def _grant(self):
+        """Move the jobs at the head of the queue that fit to running (caller holds the lock)"""
+        granted = []
+        while self._waiting:
+            job_id, waiting = next(iter(self._waiting.items()))
+            if not self._fits(waiting):
+                break
+            del self._waiting[job_id]
+            self._running[job_id] = waiting.memory_estimate
+            waiting.granted.set()
+            granted.append(waiting)
+        self._publish()
+        return granted
+
+    def _start(self, granted):
+        """Record the wait time of granted jobs and start them"""
+        for waiting in granted:
+            if self.metrics:
+                self.metrics.observe('admission_wait_seconds', time.monotonic() - waiting.admitted_at)
+            if waiting.start:
+                waiting.start()
+
+    def _publish(self):
+        """Report queue gauges (caller holds the lock)"""
+        if self.metrics is None:
+            return
+        self.metrics.set_gauge('admission_queued_runs', len(self._waiting))
+        self.metrics.set_gauge('admission_running_runs', len(self._running))
+        self.metrics.set_gauge('admission_reserved_memory_bytes', sum(self._running.values()))
@@ -3,17 +3,34 @@ Flask Web Application for ICE Reconciliation Mock System
 """
 
 from flask import Flask, render_template, request, jsonify, send_file, session
+import hmac
+import json
 import os
+import shutil
 import uuid
 from datetime import datetime
+from functools import partial
+from itertools import islice
 from werkzeug.utils import secure_filename
 import sys
+import threading
+import time
 
 # Add parent directory to path to import src modules
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, PROJECT_ROOT)
 
-from src.orchestrator import ReconciliationOrchestrator
+from src.config import configure_logging, load_config
+from src.reconciliation_generator import PreviewBuffer
+from src.result_rows import ResultRowWriter, ResultRows
+from src.metrics import MetricsRegistry
+from web.admission import AdmissionController, AdmissionRejected, estimate_run_memory
+from web.jobs import JobManager, QUEUED, RUNNING, SUCCEEDED
+from web.results_store import create_results_store
+from web.previews import FileKeyedCache, read_sheet_preview
+from web.uploads import SpooledUpload, SpooledUploadRequest
+from web.artifacts import artifact_is_current, register_artifact, send_artifact
+from web.profiling import RunProfiler
 
 # Initialize Flask with explicit paths for Vercel
 template_dir = os.path.join(PROJECT_ROOT, 'web', 'templates')
@@ -24,6 +41,9 @@ app = Flask(__name__,
             static_folder=static_dir,
             static_url_path='/static')
 app.secret_key = 'ice-reconciliation-secret-key-change-in-production'
+app.request_class = SpooledUploadRequest
+
+STARTED_AT = time.monotonic()
 
 # Configuration
 UPLOAD_FOLDER = os.path.join(PROJECT_ROOT, 'data', 'input', 'uploads')
@@ -38,22 +58,102 @@ except Exception:
 
 # Initialize orchestrator with absolute path to config
 # Defer initialization to avoid read-only filesystem issues at import time
+# One orchestrator is shared by all request and job threads: it only holds configuration,
+# and every run creates its own state (claim counter, metrics, checkpoint)
 CONFIG_PATH = os.path.join(PROJECT_ROOT, 'config.json')
 orchestrator = None
+orchestrator_lock = threading.Lock()
 
 def get_orchestrator():
-    """Lazy initialization of orchestrator"""
+    """Lazy initialization of orchestrator (imported here so cold starts and /healthz skip it)"""
     global orchestrator
     if orchestrator is None:
-        try:
-            orchestrator = ReconciliationOrchestrator(CONFIG_PATH)
-        except Exception as e:
-            print(f"Warning: Failed to initialize orchestrator: {e}")
-            # Return None - routes will handle this
+        with orchestrator_lock:
+            if orchestrator is None:
+                try:
+                    from src.orchestrator import ReconciliationOrchestrator
+                    orchestrator = ReconciliationOrchestrator(CONFIG_PATH)
+                except Exception as e:
+                    print(f"Warning: Failed to initialize orchestrator: {e}")
+                    # Return None - routes will handle this
     return orchestrator
 
-# Store results in memory (in production, use Redis or database)
-results_store = {}
+# Per-stage run metrics aggregated across runs, exposed at /metrics
+metrics_registry = MetricsRegistry()
+
+
+def load_web_config():
+    """Read the "web" section of config.json (the parsed file is reused by the orchestrator)"""
+    try:
+        return load_config(CONFIG_PATH).get('web', {})
+    except Exception:
+        return {}
+
+
+# This module is the WSGI entry point (run.py, api/index.py, gunicorn web.app:app)
+configure_logging(CONFIG_PATH)
+web_config = load_web_config()
+
+# Uploads are parsed from a spooled buffer (memory up to spoolMaxBytes, then a temp file)
+# and only copied to UPLOAD_FOLDER when archiving is enabled
+uploads_config = web_config.get('uploads', {})
+SpooledUploadRequest.spool_max_size = uploads_config.get('spoolMaxBytes', 8 * 1024 * 1024)
+
+# Job results: bounded in memory per process (LRU entries spill to disk), or shared
+# by all worker processes through SQLite (web.resultsStore.backend = "sqlite")
+results_store = create_results_store(web_config.get('resultsStore', {}), PROJECT_ROOT)
+
+# Downloadable outputs: file type -> output_files key. Their location, size and content hash
+# are registered in the job's artifact index (served with ETags, Range and optional gzip)
+DOWNLOAD_FILE_TYPES = {
+    'reconciliation': 'general_reconciliation',
+    'master_missing': 'master_missing'
+}
+artifacts_config = web_config.get('artifacts', {})
+
+# Per-job row stores browsed through /api/results/<job_id>/rows
+ROW_STORE_FOLDER = os.path.join(PROJECT_ROOT, web_config.get('rowStore', {}).get('folderPath', 'data/output/.rows'))
+ROW_PAGE_LIMIT = 1000
+
+# Opt-in cProfile of runs: every run (web.profiling.enabled), or runs requested with an
+# X-Profile-Token header matching web.profiling.adminToken. Disabled runs call orch.run directly
+profiling_config = web_config.get('profiling', {})
+PROFILE_FOLDER = os.path.join(PROJECT_ROOT, profiling_config.get('folderPath', 'data/output/.profiles'))
+PROFILE_FORMATS = ('pstats', 'collapsed')
+
+# Sample listing and sample previews, reloaded when the file or directory changes
+preview_cache = FileKeyedCache()
+
+SAMPLE_DESCRIPTIONS = {
+    'sample_complete.xlsx': 'All complete encounters (20 encounters)',
+    'sample_missing_dx.xlsx': 'Missing DX codes (15 encounters, 10 missing DX)',
+    'sample_missing_cpt.xlsx': 'Missing CPT codes (15 encounters, 8 missing CPT)',
+    'sample_mixed.xlsx': 'Mixed scenarios (25 encounters)',
+    'sample_multiple_dates.xlsx': 'Multiple dates (30 encounters, 3 dates)',
+    'sample_large.xlsx': 'Large file (150 encounters)'
+}
+
+# Serializes the duplicate check and submission of uploads within this process
+dedup_lock = threading.Lock()
+
+# At most maxRunningRuns reconciliations run at once, within a memory budget estimated from
+# input sizes; up to maxQueuedRuns wait for a slot and further submissions get a 429
+admission_config = web_config.get('admission', {})
+admission = AdmissionController(
+    max_running=admission_config.get('maxRunningRuns', web_config.get('workerThreads', 2)),
+    max_queued=admission_config.get('maxQueuedRuns', 8),
+    memory_budget_bytes=admission_config.get('memoryBudgetBytes'),
+    retry_after=admission_config.get('retryAfterSeconds', 30),
+    metrics=metrics_registry
+)
+
+# Reconciliations run on a background executor; serverless hosts (Vercel) run them inline
+job_manager = JobManager(
+    max_workers=max(web_config.get('workerThreads', 2), admission.max_running),
+    synchronous=bool(os.environ.get('VERCEL')) or not web_config.get('asyncProcessing', True),
+    status_store=results_store,
+    admission=admission
+)
 
 
 def allowed_file(filename):
@@ -62,65 +162,34 @@ def allowed_file(filename):
 
 
 def get_preview_data(reconciliation_file_path, max_rows=20):
-    """Extract preview data from reconciliation file"""
+    """
+    Read preview rows back from a reconciliation file
+    
+    Fallback for jobs without an in-memory preview (e.g. served from the run
+    cache); reads only the header and the first max_rows rows.
+    """
     from openpyxl import load_workbook
     preview_data = []
     
-    if not reconciliation_file_path:
-        print(f"ERROR: No reconciliation file path provided")
+    if not reconciliation_file_path or not os.path.exists(reconciliation_file_path):
+        print(f"ERROR: Reconciliation file not found: {reconciliation_file_path}")
         return preview_data
     
-    print(f"DEBUG get_preview_data: Attempting to read from: {reconciliation_file_path}")
-    print(f"DEBUG get_preview_data: File exists: {os.path.exists(reconciliation_file_path)}")
-    
     try:
-        if not os.path.exists(reconciliation_file_path):
-            print(f"ERROR: Reconciliation file not found: {reconciliation_file_path}")
-            # Try to find file in /tmp if original path doesn't exist
-            import tempfile
-            filename = os.path.basename(reconciliation_file_path)
-            temp_path = os.path.join(tempfile.gettempdir(), filename)
-            if os.path.exists(temp_path):
-                print(f"DEBUG: Found file in /tmp: {temp_path}")
-                reconciliation_file_path = temp_path
-            else:
-                print(f"ERROR: File not found in /tmp either: {temp_path}")
-                return preview_data
-        
-        print(f"DEBUG: Loading workbook from: {reconciliation_file_path}")
         wb = load_workbook(reconciliation_file_path, read_only=True, data_only=True)
-        
-        if 'Data' not in wb.sheetnames:
-            print(f"ERROR: 'Data' sheet not found. Available sheets: {wb.sheetnames}")
-            wb.close()
-            return preview_data
-        
-        ws = wb['Data']
-        rows = list(ws.iter_rows(values_only=True))
-        print(f"DEBUG: Total rows in sheet: {len(rows)}")
-        
-        if not rows:
-            print(f"WARNING: No rows found in Data sheet")
+        try:
+            if 'Data' not in wb.sheetnames:
+                print(f"ERROR: 'Data' sheet not found. Available sheets: {wb.sheetnames}")
+                return preview_data
+            
+            rows = wb['Data'].iter_rows(values_only=True)
+            headers = next(rows, None) or []
+            for row in islice(rows, max_rows):
+                if row and any(cell is not None for cell in row):  # Skip completely empty rows
+                    preview_data.append(dict(zip(headers, row)))
+        finally:
             wb.close()
-            return preview_data
-        
-        headers = rows[0] if rows else []
-        print(f"DEBUG: Headers: {headers[:5]}...")  # Print first 5 headers
-        
-        # Get first max_rows of data (skip header)
-        data_rows = rows[1:max_rows+1]
-        print(f"DEBUG: Processing {len(data_rows)} data rows")
-        
-        for idx, row in enumerate(data_rows):
-            if row and any(cell is not None for cell in row):  # Skip completely empty rows
-                try:
-                    row_dict = dict(zip(headers, row))
-                    preview_data.append(row_dict)
-                except Exception as e:
-                    print(f"WARNING: Error processing row {idx}: {e}")
-        
-        wb.close()
-        print(f"SUCCESS: Loaded {len(preview_data)} preview rows from {reconciliation_file_path}")
+        print(f"DEBUG: Loaded {len(preview_data)} preview rows from {reconciliation_file_path}")
         
     except Exception as e:
         print(f"ERROR reading preview data from {reconciliation_file_path}: {e}")
@@ -130,12 +199,264 @@ def get_preview_data(reconciliation_file_path, max_rows=20):
     return preview_data
 
 
+def is_truthy(value):
+    """Interpret a request flag ("true", "1", "yes" or a JSON boolean)"""
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def export_master_missing_on_demand(job_id, results):
+    """Export the full partitioned Master Missing ledger for a job that did not write one"""
+    orch = get_orchestrator()
+    if orch is None or not orch.master_missing_mgr.partitioned:
+        return None
+    
+    file_path = orch.export_master_missing()
+    results['output_files']['master_missing'] = file_path
+    print(f"DEBUG: Exported full Master Missing ledger on demand: {file_path}")
+    return file_path
+
+
+def run_reconciliation_job(job_id, input_file, options, progress=None, profile=False):
+    """
+    Background job: run the reconciliation and store its results under job_id
+    
+    input_file is a path, or a detached SpooledUpload that is released when the run ends.
+    With profile, the run is profiled and the profile stored with the results.
+    """
+    orch = get_orchestrator()
+    preview = PreviewBuffer(max_rows=20)
+    row_store = ResultRowWriter(row_store_path(job_id))
+    profiler = RunProfiler() if profile else None
+    run = partial(profiler.call, orch.run) if profiler else orch.run
+    try:
+        summary, output_files = run(
+            input_file, progress=progress, preview=preview, row_store=row_store,
+            input_sha256=getattr(input_file, 'sha256', None), **options
+        )
+        reconciliation_file = output_files.get('general_reconciliation')
+        if summary.cache_hit and reconciliation_file and os.path.exists(reconciliation_file):
+            row_store.add_workbook(reconciliation_file)
+        row_store.close()
+    except Exception:
+        row_store.abort()
+        raise
+    finally:
+        if isinstance(input_file, SpooledUpload):
+            input_file.release()
+    metrics_registry.observe_run(summary)
+    
+    # The run updated the ledger: a repeat upload is checked against the new version
+    if isinstance(input_file, SpooledUpload) and not summary.dry_run:
+        results_store.index_job(
+            upload_dedup_key(input_file.sha256, summary.master_missing_version, orch, dry_run=False), job_id
+        )
+    
+    # The preview is filled while the file is written; cached runs read it back lazily
+    if preview.rows:
+        preview_data = preview.preview_rows()
+    else:
+        preview_data = get_preview_data(output_files.get('general_reconciliation'))
+    print(f"DEBUG: Preview data: {len(preview_data)} rows")
+    
+    # Register the outputs for download
+    artifacts = {}
+    for file_type, output_key in DOWNLOAD_FILE_TYPES.items():
+        artifact = register_artifact(output_files.get(output_key), precompress=artifacts_config.get('precompress', True))
+        if artifact:
+            artifacts[file_type] = artifact
+    
+    # Profile of the run, downloadable from /api/results/<job_id>/profile
+    profile_info = None
+    if profiler:
+        profile_info = profiler.save(PROFILE_FOLDER, job_id, top=profiling_config.get('topFunctions', 20))
+        if profile_info is None:
+            print(f"Warning: Job {job_id} was not profiled: {profiler.error}")
+        else:
+            for profile_format in PROFILE_FORMATS:
+                artifact = register_artifact(profile_info.pop(profile_format), precompress=True)
+                if artifact:
+                    artifacts[f'profile_{profile_format}'] = artifact
+            print(f"DEBUG: Profiled job {job_id}: {profile_info['total_seconds']}s")
+    
+    # Store results
+    results_store[job_id] = {
+        'summary': summary.to_dict(),
+        'output_files': output_files,
+        'artifacts': artifacts,
+        'preview_data': preview_data,
+        'not_billed_samples': preview.not_billed_samples(),
+        'rows_available': True,
+        'profile': profile_info,
+        'timestamp': datetime.now().isoformat()
+    }
+    print(f"DEBUG: Stored results for job {job_id}, preview_data length: {len(preview_data)}")
+    
+    return {
+        'summary': summary.to_dict(),
+        'output_files': output_files
+    }
+
+
+def archive_upload(upload, filename):
+    """Persist a copy of an upload in UPLOAD_FOLDER; returns its path, or None if not writable"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    file_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
+    try:
+        upload.seek(0)
+        with open(file_path, 'wb') as f:
+            shutil.copyfileobj(upload, f)
+    except OSError as e:
+        print(f"Warning: Cannot archive upload {filename}: {e}")
+        return None
+    return file_path
+
+
+def row_store_path(job_id):
+    """Path of a job's row store"""
+    return os.path.join(ROW_STORE_FOLDER, f'{job_id}.sqlite3')
+
+
+def purge_job_files():
+    """Delete row stores and profiles older than the results TTL"""
+    ttl_seconds = web_config.get('resultsStore', {}).get('ttlSeconds', 24 * 3600)
+    for folder in (ROW_STORE_FOLDER, PROFILE_FOLDER):
+        try:
+            for filename in os.listdir(folder):
+                path = os.path.join(folder, filename)
+                if datetime.now().timestamp() - os.path.getmtime(path) > ttl_seconds:
+                    os.remove(path)
+        except OSError:
+            pass
+
+
+def is_profiling_admin():
+    """Whether the request carries the profiling admin token"""
+    token = profiling_config.get('adminToken')
+    header = request.headers.get('X-Profile-Token')
+    return bool(token and header) and hmac.compare_digest(header.encode(), token.encode())
+
+
+def profiling_requested():
+    """Whether the run submitted by this request is profiled"""
+    return bool(profiling_config.get('enabled', False)) or is_profiling_admin()
+
+
+def submit_job(input_file, options, job_id=None):
+    """
+    Queue a reconciliation job and return the 202 response with its job_id
+    
+    Returns a 429 response with Retry-After when the admission queue is full.
+    """
+    purge_job_files()
+    job_id = job_id or str(uuid.uuid4())
+    profile = profiling_requested()
+    memory_estimate = estimate_run_memory(
+        input_file,
+        bytes_per_input_byte=admission_config.get('memoryPerInputByte', 20),
+        base_bytes=admission_config.get('baseRunMemoryBytes', 64 * 1024 * 1024)
+    )
+    try:
+        job = job_manager.submit(
+            job_id, run_reconciliation_job, job_id, input_file, options,
+            memory_estimate=memory_estimate, profile=profile
+        )
+    except AdmissionRejected as e:
+        print(f"DEBUG: Rejected job {job_id}: {e}")
+        if isinstance(input_file, SpooledUpload):
+            input_file.release()
+        response = jsonify({
+            'success': False,
+            'error': str(e),
+            'retry_after': e.retry_after,
+            'queue': admission.stats()
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    
+    # Store job_id in session
+    session['job_id'] = job_id
+    
+    response = {
+        'success': True,
+        'job_id': job_id,
+        'status': job['status'],
+        'memory_estimate_bytes': memory_estimate,
+        'status_url': f'/api/jobs/{job_id}',
+        'events_url': f'/api/jobs/{job_id}/events'
+    }
+    if job.get('queue_position'):
+        response['queue_position'] = job['queue_position']
+    if profile:
+        response['profiled'] = True
+    return jsonify(response), 202
+
+
+def upload_dedup_key(sha256, ledger_version, orch, dry_run):
+    """Key of an upload's content processed against a ledger version and configuration"""
+    return f"upload:{sha256}:{ledger_version}:{orch.config_hash}:{'dry-run' if dry_run else 'run'}"
+
+
+def find_duplicate_job(key):
+    """Return (job_id, status) of a queued, running or succeeded job indexed under key, or None"""
+    job_id = results_store.find_job(key)
+    if job_id is None:
+        return None
+    job = job_manager.get(job_id)
+    if job and job['status'] in (QUEUED, RUNNING):
+        return job_id, job['status']
+    if job_id in results_store:
+        return job_id, SUCCEEDED
+    return None
+
+
+def duplicate_job_response(job_id, status):
+    """Answer an upload with the job that already handles the same content"""
+    print(f"DEBUG: Upload matches job {job_id} ({status}), not processing it again")
+    session['job_id'] = job_id
+    response = {
+        'success': True,
+        'job_id': job_id,
+        'status': status,
+        'deduplicated': True,
+        'status_url': f'/api/jobs/{job_id}',
+        'events_url': f'/api/jobs/{job_id}/events'
+    }
+    if status == SUCCEEDED:
+        response['results'] = results_store.get(job_id)
+        return jsonify(response), 200
+    return jsonify(response), 202
+
+
 @app.route('/')
 def index():
     """Upload page"""
     return render_template('index.html')
 
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness check; never initializes the orchestrator or loads openpyxl"""
+    return jsonify({
+        'status': 'ok',
+        'orchestrator_loaded': orchestrator is not None,
+        'uptime_seconds': round(time.monotonic() - STARTED_AT, 3)
+    })
+
+
+def list_sample_files(sample_dir):
+    """List sample files with descriptions"""
+    files = [
+        f for f in os.listdir(sample_dir)
+        if f.startswith('sample_') and f.endswith('.xlsx')
+    ]
+    return [
+        {'filename': filename, 'description': SAMPLE_DESCRIPTIONS.get(filename, filename)}
+        for filename in sorted(files)
+    ]
+
+
 @app.route('/api/sample-files', methods=['GET'])
 def get_sample_files():
     """Get list of available sample files"""
@@ -148,27 +469,7 @@ def get_sample_files():
                 'error': f'Sample directory not found: {sample_dir}'
             }), 404
             
-        files = [
-            f for f in os.listdir(sample_dir)
-            if f.startswith('sample_') and f.endswith('.xlsx')
-        ]
-        
-        # Create file info with descriptions
-        file_info = []
-        descriptions = {
-            'sample_complete.xlsx': 'All complete encounters (20 encounters)',
-            'sample_missing_dx.xlsx': 'Missing DX codes (15 encounters, 10 missing DX)',
-            'sample_missing_cpt.xlsx': 'Missing CPT codes (15 encounters, 8 missing CPT)',
-            'sample_mixed.xlsx': 'Mixed scenarios (25 encounters)',
-            'sample_multiple_dates.xlsx': 'Multiple dates (30 encounters, 3 dates)',
-            'sample_large.xlsx': 'Large file (150 encounters)'
-        }
-        
-        for filename in sorted(files):
-            file_info.append({
-                'filename': filename,
-                'description': descriptions.get(filename, filename)
-            })
+        file_info = preview_cache.get_or_load(sample_dir, list_sample_files)
         
         return jsonify({
             'success': True,
@@ -205,36 +506,20 @@ def preview_sample():
                 'error': 'Sample file not found'
             }), 404
         
-        # Read raw data from Excel file (first 20 rows)
-        from openpyxl import load_workbook
-        wb = load_workbook(file_path, read_only=True, data_only=True)
-        ws = wb.active
-        
-        rows = list(ws.iter_rows(values_only=True))
-        if not rows:
+        # Read raw data from Excel file (first 20 rows, cached until the file changes)
+        preview = preview_cache.get_or_load(file_path, read_sheet_preview)
+        if preview is None:
             return jsonify({
                 'success': False,
                 'error': 'File is empty'
             }), 400
         
-        headers = rows[0]
-        max_preview_rows = 20
-        
-        # Convert rows to list of dicts
-        preview_data = []
-        for row in rows[1:max_preview_rows+1]:
-            preview_data.append(dict(zip(headers, row)))
-        
-        total_rows = len(rows) - 1  # Exclude header
-        
-        wb.close()
-        
         return jsonify({
             'success': True,
-            'preview_data': preview_data,
-            'total_rows': total_rows,
-            'showing_rows': len(preview_data),
-            'headers': list(headers)
+            'preview_data': preview['preview_data'],
+            'total_rows': preview['total_rows'],
+            'showing_rows': len(preview['preview_data']),
+            'headers': preview['headers']
         })
     
     except Exception as e:
@@ -246,7 +531,7 @@ def preview_sample():
 
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
-    """Handle file upload and process"""
+    """Handle file upload and queue processing"""
     try:
         # Check if file was uploaded
         if 'file' not in request.files:
@@ -269,12 +554,18 @@ def upload_file():
                 'error': 'Only .xlsx files are allowed'
             }), 400
         
-        # Save file
+        # The upload was received into a spooled, hashed buffer; the job parses it from there
         filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"{timestamp}_{filename}"
-        file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-        file.save(file_path)
+        upload = file.stream
+        if not isinstance(upload, SpooledUpload):
+            upload = SpooledUpload(SpooledUploadRequest.spool_max_size)
+            shutil.copyfileobj(file.stream, upload)
+        upload.name = filename
+        print(f"DEBUG: Received upload {filename}: {upload.size} bytes, sha256 {upload.sha256[:12]}"
+              f"{' (spilled to disk)' if upload.spilled else ''}")
+        
+        if uploads_config.get('archive', False):
+            archive_upload(upload, filename)
         
         # Get orchestrator (lazy initialization)
         orch = get_orchestrator()
@@ -284,42 +575,24 @@ def upload_file():
                 'error': 'Orchestrator not initialized. Check server logs.'
             }), 500
         
-        # Process file
-        job_id = str(uuid.uuid4())
-        summary, output_files = orch.run(file_path)
-        
-        # Get preview data - use the path from output_files (which has the actual /tmp path)
-        reconciliation_file_path = output_files.get('general_reconciliation')
-        print(f"DEBUG: Summary general_reconciliation_file: {summary.general_reconciliation_file}")
-        print(f"DEBUG: Output files general_reconciliation: {reconciliation_file_path}")
-        print(f"DEBUG: Getting preview data from: {reconciliation_file_path}")
-        
-        if not reconciliation_file_path:
-            print(f"ERROR: No reconciliation file path in output_files!")
-            reconciliation_file_path = summary.general_reconciliation_file
-            print(f"DEBUG: Using summary path instead: {reconciliation_file_path}")
-        
-        preview_data = get_preview_data(reconciliation_file_path)
-        print(f"DEBUG: Preview data loaded: {len(preview_data)} rows")
-        
-        # Store results
-        results_store[job_id] = {
-            'summary': summary.to_dict(),
-            'output_files': output_files,
-            'preview_data': preview_data,
-            'timestamp': datetime.now().isoformat()
+        # Process file in the background (force=true recomputes even if the same input was
+        # already processed, dry_run=true returns the summary only without writing any files)
+        options = {
+            'force': is_truthy(request.form.get('force')),
+            'dry_run': is_truthy(request.form.get('dry_run'))
         }
-        print(f"DEBUG: Stored results for job {job_id}, preview_data length: {len(preview_data)}")
         
-        # Store job_id in session
-        session['job_id'] = job_id
-        
-        return jsonify({
-            'success': True,
-            'job_id': job_id,
-            'summary': summary.to_dict(),
-            'output_files': output_files
-        })
+        # The same content against the same ledger and configuration is answered by the job
+        # that already processed it, or is still processing it (force=true starts a new one)
+        key = upload_dedup_key(upload.sha256, orch.master_missing_mgr.current_version(), orch, options['dry_run'])
+        with dedup_lock:
+            # A profiled run is always run, not answered by an earlier unprofiled job
+            duplicate = None if options['force'] or profiling_requested() else find_duplicate_job(key)
+            if duplicate is None:
+                job_id = str(uuid.uuid4())
+                results_store.index_job(key, job_id)
+                return submit_job(upload.detach(), options, job_id=job_id)
+        return duplicate_job_response(*duplicate)
     
     except Exception as e:
         return jsonify({
@@ -330,7 +603,7 @@ def upload_file():
 
 @app.route('/api/process-sample', methods=['POST'])
 def process_sample():
-    """Process a sample file"""
+    """Queue processing of a sample file"""
     try:
         data = request.get_json()
         sample_name = data.get('sample_name')
@@ -357,41 +630,11 @@ def process_sample():
                 'error': 'Orchestrator not initialized. Check server logs.'
             }), 500
         
-        # Process file
-        job_id = str(uuid.uuid4())
-        summary, output_files = orch.run(file_path)
-        
-        # Get preview data - use the path from output_files (which has the actual /tmp path)
-        reconciliation_file_path = output_files.get('general_reconciliation')
-        print(f"DEBUG: Summary general_reconciliation_file: {summary.general_reconciliation_file}")
-        print(f"DEBUG: Output files general_reconciliation: {reconciliation_file_path}")
-        print(f"DEBUG: Getting preview data from: {reconciliation_file_path}")
-        
-        if not reconciliation_file_path:
-            print(f"ERROR: No reconciliation file path in output_files!")
-            reconciliation_file_path = summary.general_reconciliation_file
-            print(f"DEBUG: Using summary path instead: {reconciliation_file_path}")
-        
-        preview_data = get_preview_data(reconciliation_file_path)
-        print(f"DEBUG: Preview data loaded: {len(preview_data)} rows")
-        
-        # Store results
-        results_store[job_id] = {
-            'summary': summary.to_dict(),
-            'output_files': output_files,
-            'preview_data': preview_data,
-            'timestamp': datetime.now().isoformat()
-        }
-        print(f"DEBUG: Stored results for job {job_id}, preview_data length: {len(preview_data)}")
-        
-        # Store job_id in session
-        session['job_id'] = job_id
-        
-        return jsonify({
-            'success': True,
-            'job_id': job_id,
-            'summary': summary.to_dict(),
-            'output_files': output_files
+        # Process file in the background (force=true recomputes even if the same input was
+        # already processed, dry_run=true returns the summary only without writing any files)
+        return submit_job(file_path, {
+            'force': is_truthy(data.get('force')),
+            'dry_run': is_truthy(data.get('dry_run'))
         })
     
     except Exception as e:
@@ -401,10 +644,51 @@ def process_sample():
         }), 500
 
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get status and stage progress of a job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-Sent Events stream of job status and stage progress"""
+    if job_manager.get(job_id) is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+    
+    def stream():
+        for job in job_manager.watch(job_id):
+            if job is None:
+                yield ': keep-alive\n\n'
+                continue
+            event = 'progress' if job['status'] in ('queued', 'running') else job['status']
+            yield f"event: {event}\ndata: {json.dumps(job)}\n\n"
+    
+    return app.response_class(
+        stream(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/results/<job_id>', methods=['GET'])
 def get_results(job_id):
     """Get results for a job"""
-    if job_id not in results_store:
+    results = results_store.get(job_id)
+    if results is None:
         return jsonify({
             'success': False,
             'error': 'Job not found'
@@ -412,69 +696,104 @@ def get_results(job_id):
     
     return jsonify({
         'success': True,
-        'results': results_store[job_id]
+        'results': results
     })
 
 
+@app.route('/api/results/<job_id>/rows', methods=['GET'])
+def get_result_rows(job_id):
+    """
+    Page through a job's reconciliation rows
+    
+    Query parameters: billed, reason, facility, provider, date_from and
+    date_to (YYYY-MM-DD) filters, sort (column), order (asc/desc), limit and
+    cursor (next_cursor of the previous page). The first page (no cursor)
+    also returns the total matching rows and the filter facets.
+    """
+    if job_id not in results_store or not os.path.exists(row_store_path(job_id)):
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+    
+    filters = {name: request.args.get(name) for name in ('billed', 'reason', 'facility', 'provider',
+                                                          'date_from', 'date_to')}
+    cursor = request.args.get('cursor')
+    try:
+        limit = max(1, min(int(request.args.get('limit', 100)), ROW_PAGE_LIMIT))
+        with ResultRows(row_store_path(job_id)) as rows:
+            page, next_cursor = rows.query(
+                filters,
+                sort=request.args.get('sort'),
+                descending=request.args.get('order', 'asc').lower() == 'desc',
+                cursor=cursor,
+                limit=limit
+            )
+            response = {
+                'success': True,
+                'rows': page,
+                'next_cursor': next_cursor
+            }
+            if not cursor:
+                response['total'] = rows.count(filters)
+                response['facets'] = rows.facets()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    return jsonify(response)
+
+
+@app.route('/api/results/<job_id>/profile', methods=['GET'])
+def download_profile(job_id):
+    """
+    Download the profile of a profiled job
+    
+    format=pstats (default; load with pstats.Stats) or format=collapsed
+    (collapsed stacks for flamegraph.pl / speedscope). Requires the
+    X-Profile-Token header when web.profiling.adminToken is set.
+    """
+    if profiling_config.get('adminToken') and not is_profiling_admin():
+        return jsonify({
+            'success': False,
+            'error': 'Profiling token required'
+        }), 403
+    
+    profile_format = request.args.get('format', 'pstats')
+    if profile_format not in PROFILE_FORMATS:
+        return jsonify({
+            'success': False,
+            'error': f"Invalid format, use one of: {', '.join(PROFILE_FORMATS)}"
+        }), 400
+    
+    results = results_store.get(job_id)
+    artifact = (results or {}).get('artifacts', {}).get(f'profile_{profile_format}')
+    if artifact is None or not artifact_is_current(artifact):
+        return jsonify({
+            'success': False,
+            'error': 'No profile available for this job'
+        }), 404
+    
+    return send_artifact(artifact, accept_gzip=request.accept_encodings['gzip'] > 0)
+
+
 @app.route('/api/download/<file_type>', methods=['GET'])
 def download_file(file_type):
     """Download output file"""
     try:
-        # Try to get job_id from query parameter first, then session
+        # Get job_id from query parameter first, then session
         job_id = request.args.get('job_id') or session.get('job_id')
+        results = results_store.get(job_id) if job_id else None
         
-        if not job_id or job_id not in results_store:
-            # If no session, try to use the latest job
-            if results_store:
-                job_id = list(results_store.keys())[-1]
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': 'No results available'
-                }), 404
-        
-        results = results_store[job_id]
-        output_files = results.get('output_files', {})
-        
-        if file_type == 'reconciliation':
-            file_path = output_files.get('general_reconciliation')
-        elif file_type == 'master_missing':
-            file_path = output_files.get('master_missing')
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'Invalid file type'
-            }), 400
-        
-        if not file_path:
+        if results is None:
             return jsonify({
                 'success': False,
-                'error': f'File path not found for {file_type}'
+                'error': 'No results available'
             }), 404
         
-        print(f"DEBUG download: Looking for file at: {file_path}")
-        print(f"DEBUG download: File exists: {os.path.exists(file_path)}")
-        
-        # If file doesn't exist at original path, try /tmp
-        if not os.path.exists(file_path):
-            import tempfile
-            filename = os.path.basename(file_path)
-            temp_path = os.path.join(tempfile.gettempdir(), filename)
-            print(f"DEBUG download: Trying /tmp path: {temp_path}")
-            if os.path.exists(temp_path):
-                file_path = temp_path
-                print(f"DEBUG download: Found file in /tmp: {temp_path}")
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': f'File not found: {file_path} or {temp_path}'
-                }), 404
-        
-        return send_file(
-            file_path,
-            as_attachment=True,
-            download_name=os.path.basename(file_path)
-        )
+        return serve_output_file(job_id, results, file_type)
     
     except Exception as e:
         return jsonify({
@@ -487,54 +806,14 @@ def download_file(file_type):
 def download_file_by_job(job_id, file_type):
     """Download output file by job ID"""
     try:
-        if job_id not in results_store:
+        results = results_store.get(job_id)
+        if results is None:
             return jsonify({
                 'success': False,
                 'error': 'Job not found'
             }), 404
         
-        results = results_store[job_id]
-        output_files = results.get('output_files', {})
-        
-        if file_type == 'reconciliation':
-            file_path = output_files.get('general_reconciliation')
-        elif file_type == 'master_missing':
-            file_path = output_files.get('master_missing')
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'Invalid file type'
-            }), 400
-        
-        if not file_path:
-            return jsonify({
-                'success': False,
-                'error': f'File path not found for {file_type}'
-            }), 404
-        
-        print(f"DEBUG download: Looking for file at: {file_path}")
-        print(f"DEBUG download: File exists: {os.path.exists(file_path)}")
-        
-        # If file doesn't exist at original path, try /tmp
-        if not os.path.exists(file_path):
-            import tempfile
-            filename = os.path.basename(file_path)
-            temp_path = os.path.join(tempfile.gettempdir(), filename)
-            print(f"DEBUG download: Trying /tmp path: {temp_path}")
-            if os.path.exists(temp_path):
-                file_path = temp_path
-                print(f"DEBUG download: Found file in /tmp: {temp_path}")
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': f'File not found: {file_path} or {temp_path}'
-                }), 404
-        
-        return send_file(
-            file_path,
-            as_attachment=True,
-            download_name=os.path.basename(file_path)
-        )
+        return serve_output_file(job_id, results, file_type)
     
     except Exception as e:
         return jsonify({
@@ -543,16 +822,69 @@ def download_file_by_job(job_id, file_type):
         }), 500
 
 
+def serve_output_file(job_id, results, file_type):
+    """
+    Serve a job's output file from its artifact index
+    
+    Jobs stored before the index existed are registered on first download.
+    A registered file whose content changed since (overwritten by a later
+    run) is not served under the old job: the request gets 410 Gone.
+    """
+    if file_type not in DOWNLOAD_FILE_TYPES:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid file type'
+        }), 400
+    
+    artifacts = results.setdefault('artifacts', {})
+    artifact = artifacts.get(file_type)
+    if artifact is not None and not os.path.exists(artifact['path']):
+        return jsonify({
+            'success': False,
+            'error': f'File not found for {file_type}'
+        }), 404
+    if artifact is not None and not artifact_is_current(artifact):
+        print(f"DEBUG download: {file_type} of job {job_id} was regenerated since it was registered")
+        return jsonify({
+            'success': False,
+            'error': f'Output was regenerated by a later run, re-run to download {file_type}'
+        }), 410
+    
+    if artifact is None:
+        file_path = results.get('output_files', {}).get(DOWNLOAD_FILE_TYPES[file_type])
+        if not file_path and file_type == 'master_missing':
+            file_path = export_master_missing_on_demand(job_id, results)
+        artifact = register_artifact(file_path, precompress=artifacts_config.get('precompress', True))
+        if artifact is None:
+            return jsonify({
+                'success': False,
+                'error': f'File not found for {file_type}'
+            }), 404
+        artifacts[file_type] = artifact
+        results_store[job_id] = results
+    
+    return send_artifact(artifact, accept_gzip=request.accept_encodings['gzip'] > 0)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text-format metrics for reconciliation runs"""
+    return app.response_class(
+        metrics_registry.render(),
+        mimetype='text/plain; version=0.0.4'
+    )
+
+
 @app.route('/results')
 def results_page():
     """Results display page"""
     job_id = session.get('job_id')
+    results = results_store.get(job_id) if job_id else None
     
-    if not job_id or job_id not in results_store:
+    if results is None:
         return render_template('results.html', error='No results available')
     
-    results = results_store[job_id]
-    return render_template('results.html', results=results)
+    return render_template('results.html', results=results, job_id=job_id)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,116 @@
+"""
+Artifact index and download serving for the web application
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+
+from flask import send_file
+
+from src.file_utils import file_sha256, match_permissions
+
+CONTENT_TYPES = {
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.csv': 'text/csv',
+    '.ndjson': 'application/x-ndjson',
+    '.json': 'application/json',
+    '.txt': 'text/plain',
+    '.collapsed': 'text/plain',
+}
+
+# Text outputs worth a pre-built gzip variant (XLSX files are already deflated)
+COMPRESSIBLE_EXTENSIONS = {'.csv', '.ndjson', '.json', '.txt', '.collapsed'}
+
+
+def register_artifact(file_path, precompress=False):
+    """
+    Describe a generated file for serving
+
+    Records its location, size, mtime, content type and SHA-256 (used as a
+    strong ETag). With precompress, text outputs also get a gzip variant
+    written next to them.
+
+    Returns:
+        Artifact dictionary, or None if the file does not exist
+    """
+    try:
+        stat = os.stat(file_path)
+    except (OSError, TypeError):
+        return None
+
+    extension = os.path.splitext(file_path)[1].lower()
+    artifact = {
+        'path': file_path,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': file_sha256(file_path),
+        'content_type': CONTENT_TYPES.get(extension, 'application/octet-stream'),
+        'variants': {}
+    }
+
+    if precompress and extension in COMPRESSIBLE_EXTENSIONS:
+        variant_path = f'{file_path}.gz'
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.gz', dir=os.path.dirname(file_path))
+            with open(file_path, 'rb') as src, os.fdopen(fd, 'wb') as raw, \
+                    gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as dst:
+                shutil.copyfileobj(src, dst)
+            match_permissions(temp_path, file_path)
+            os.replace(temp_path, variant_path)
+            artifact['variants']['gzip'] = {
+                'path': variant_path,
+                'size': os.path.getsize(variant_path),
+                'sha256': file_sha256(variant_path)
+            }
+        except OSError as e:
+            print(f"Warning: Cannot write compressed variant of {file_path}: {e}")
+
+    return artifact
+
+
+def artifact_is_current(artifact):
+    """
+    Whether the file is still the one that was registered
+
+    Same size and mtime is taken as unchanged; otherwise the content hash
+    decides, so a file that was only touched stays current (its recorded
+    mtime is refreshed).
+    """
+    try:
+        stat = os.stat(artifact['path'])
+    except OSError:
+        return False
+    if stat.st_size == artifact['size'] and stat.st_mtime == artifact['mtime']:
+        return True
+    if stat.st_size != artifact['size'] or file_sha256(artifact['path']) != artifact['sha256']:
+        return False
+    artifact['mtime'] = stat.st_mtime
+    return True
+
+
+def send_artifact(artifact, accept_gzip=False):
+    """
+    Serve an artifact as an attachment
+
+    Responses carry the content hash as a strong ETag, answer If-None-Match
+    with 304 and byte-range requests with 206. The gzip variant is served
+    when present and accepted.
+    """
+    variant = artifact['variants'].get('gzip') if accept_gzip else None
+    source = variant or artifact
+
+    response = send_file(
+        source['path'],
+        mimetype=artifact['content_type'],
+        as_attachment=True,
+        download_name=os.path.basename(artifact['path']),
+        etag=source['sha256'],
+        conditional=True
+    )
+    if variant:
+        response.headers['Content-Encoding'] = 'gzip'
+    if artifact['variants']:
+        response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,250 @@
+"""
+Background job execution for the web application
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import threading
+import time
+import traceback
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class JobManager:
+    """
+    Runs reconciliation jobs on a background thread pool
+
+    Each job keeps its status, the latest progress of every stage and a
+    sequence number that increases on every change, so watchers (status
+    polling and the Server-Sent Events stream) only ever see bounded state.
+    With synchronous=True jobs run inside submit(), for serverless hosts that
+    stop background threads once the response is sent.
+
+    With a shared status_store (see SQLiteResultsStore), snapshots are also
+    published there - progress at most every PUBLISH_INTERVAL seconds - so
+    other worker processes can answer status requests for jobs they did not run.
+
+    With an AdmissionController, submit() is rejected (AdmissionRejected) when
+    its wait queue is full, and jobs are only handed to the thread pool once
+    granted a run slot; queued snapshots then carry their queue_position.
+    """
+
+    PUBLISH_INTERVAL = 1.0
+
+    def __init__(self, max_workers=2, synchronous=False, max_finished=1000, status_store=None, admission=None):
+        """Initialize job manager"""
+        self.synchronous = synchronous
+        self.admission = admission
+        self.max_finished = max_finished
+        self.status_store = status_store
+        self._published_at = {}
+        self._executor = None if synchronous else ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='reconciliation'
+        )
+        self._jobs = {}
+        self._cond = threading.Condition()
+
+    def submit(self, job_id, fn, *args, memory_estimate=0, **kwargs):
+        """
+        Queue fn(*args, progress=callback, **kwargs) as job job_id
+
+        fn's return value becomes the job result. memory_estimate (bytes) is
+        what the job reserves from the admission memory budget while it runs.
+
+        Raises:
+            AdmissionRejected: The admission wait queue is full
+        """
+        with self._cond:
+            self._prune()
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': QUEUED,
+                'progress': {},
+                'result': None,
+                'error': None,
+                'created_at': datetime.now().isoformat(),
+                'finished_at': None,
+                'memory_estimate_bytes': memory_estimate,
+                'seq': 0
+            }
+
+        if self.synchronous:
+            if self.admission:
+                self._admit(job_id, memory_estimate)
+                self.admission.acquire(job_id)
+            self._run(job_id, fn, args, kwargs)
+        elif self.admission:
+            # The executor only receives a job once it holds a run slot, so
+            # waiting jobs never occupy pool threads
+            self._admit(job_id, memory_estimate, start=lambda: self._start(job_id, fn, args, kwargs))
+        else:
+            self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """Return a snapshot of a job, or None if unknown"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            snapshot = self._snapshot(job) if job else None
+        if snapshot:
+            return self._with_position(snapshot)
+        return self.status_store.get_status(job_id) if self.status_store else None
+
+    def watch(self, job_id, timeout=15.0):
+        """
+        Yield job snapshots as they change until the job finishes
+
+        Yields None when nothing changed for timeout seconds (keep-alive).
+        """
+        with self._cond:
+            local = job_id in self._jobs
+        if not local:
+            yield from self._watch_shared(job_id, timeout)
+            return
+
+        last_seq = -1
+        while True:
+            with self._cond:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return
+                if job['seq'] == last_seq:
+                    self._cond.wait(timeout)
+                    job = self._jobs.get(job_id)
+                    if job is None:
+                        return
+                if job['seq'] == last_seq:
+                    snapshot = None
+                else:
+                    last_seq = job['seq']
+                    snapshot = self._snapshot(job)
+
+            yield self._with_position(snapshot) if snapshot else None
+            if snapshot and snapshot['status'] in (SUCCEEDED, FAILED):
+                return
+
+    def _watch_shared(self, job_id, timeout):
+        """Follow a job run by another process by polling the shared status store"""
+        if self.status_store is None:
+            return
+        last_seq = -1
+        idle_since = time.monotonic()
+        while True:
+            snapshot = self.status_store.get_status(job_id)
+            if snapshot is None:
+                return
+            if snapshot['seq'] != last_seq:
+                last_seq = snapshot['seq']
+                idle_since = time.monotonic()
+                yield snapshot
+                if snapshot['status'] in (SUCCEEDED, FAILED):
+                    return
+            elif time.monotonic() - idle_since >= timeout:
+                idle_since = time.monotonic()
+                yield None
+            time.sleep(self.PUBLISH_INTERVAL)
+
+    def _admit(self, job_id, memory_estimate, start=None):
+        """Queue a job for a run slot, forgetting it again if admission is rejected"""
+        try:
+            self.admission.admit(job_id, memory_estimate, start=start)
+        except Exception:
+            with self._cond:
+                self._jobs.pop(job_id, None)
+            raise
+
+    def _start(self, job_id, fn, args, kwargs):
+        """Hand a job that was granted a run slot to the executor"""
+        try:
+            self._executor.submit(self._run, job_id, fn, args, kwargs)
+        except RuntimeError as e:  # Executor shut down
+            self._update(job_id, status=FAILED, error=str(e), finished_at=datetime.now().isoformat())
+            self.admission.release(job_id)
+
+    def _run(self, job_id, fn, args, kwargs):
+        """Execute a job and record its outcome"""
+        if self.admission:
+            self._touch_queued()
+        try:
+            self._update(job_id, status=RUNNING)
+            result = fn(*args, progress=lambda stage: self._progress(job_id, stage), **kwargs)
+            self._update(job_id, status=SUCCEEDED, result=result, finished_at=datetime.now().isoformat())
+        except Exception as e:
+            print(f"ERROR: Job {job_id} failed: {e}")
+            traceback.print_exc()
+            self._update(job_id, status=FAILED, error=str(e), finished_at=datetime.now().isoformat())
+        finally:
+            if self.admission:
+                self.admission.release(job_id)
+
+    def _progress(self, job_id, stage):
+        """Record the latest metrics of a stage"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job['progress'][stage['name']] = {
+                'rows_in': stage['rows_in'],
+                'rows_out': stage['rows_out'],
+                'duration_seconds': round(stage['duration_seconds'], 3)
+            }
+            job['seq'] += 1
+            self._cond.notify_all()
+        self._publish(job_id, throttle=True)
+
+    def _update(self, job_id, **fields):
+        """Update job fields and wake up watchers"""
+        with self._cond:
+            job = self._jobs[job_id]
+            job.update(fields)
+            job['seq'] += 1
+            self._cond.notify_all()
+        self._publish(job_id)
+
+    def _with_position(self, snapshot):
+        """Add the admission queue position to a queued job's snapshot"""
+        if self.admission and snapshot['status'] == QUEUED:
+            snapshot['queue_position'] = self.admission.position(snapshot['job_id'])
+        return snapshot
+
+    def _touch_queued(self):
+        """Wake up watchers of queued jobs, whose queue position just moved"""
+        with self._cond:
+            for job in self._jobs.values():
+                if job['status'] == QUEUED:
+                    job['seq'] += 1
+            self._cond.notify_all()
+
+    def _publish(self, job_id, throttle=False):
+        """Write a job's snapshot to the shared status store"""
+        if self.status_store is None:
+            return
+        now = time.monotonic()
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or (throttle and now - self._published_at.get(job_id, 0.0) < self.PUBLISH_INTERVAL):
+                return
+            self._published_at[job_id] = now
+            snapshot = self._snapshot(job)
+        try:
+            self.status_store.set_status(job_id, snapshot)
+        except Exception as e:
+            print(f"Warning: Cannot publish status of job {job_id}: {e}")
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_finished (caller holds the lock)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in (SUCCEEDED, FAILED)]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+            self._published_at.pop(job_id, None)
+
+    @staticmethod
+    def _snapshot(job):
+        """Copy of a job's public state"""
+        snapshot = dict(job)
+        snapshot['progress'] = {name: dict(values) for name, values in job['progress'].items()}
+        return snapshot
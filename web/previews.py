@@ -0,0 +1,78 @@
+"""
+Cached, streaming previews of input files for the web application
+"""
+
+from collections import OrderedDict
+from itertools import islice
+import os
+import threading
+
+
+class FileKeyedCache:
+    """
+    Small LRU cache of values derived from a file or directory
+
+    Entries are keyed on the path and its current mtime and size, so an
+    edited, replaced or (for directories) re-populated path is reloaded
+    on the next access without any explicit invalidation.
+    """
+
+    def __init__(self, max_entries=64):
+        """Initialize cache"""
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # path -> ((mtime_ns, size), value)
+        self._lock = threading.Lock()
+
+    def get_or_load(self, path, loader):
+        """Return the cached value for path, calling loader(path) if missing or stale"""
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        value = loader(path)
+        with self._lock:
+            self._entries[path] = (version, value)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+def read_sheet_preview(file_path, max_rows=20):
+    """
+    Read the header and first max_rows rows of a workbook's active sheet
+
+    Only the rows needed are parsed; the total row count comes from the
+    sheet dimension, falling back to a row scan when it is missing or wrong.
+
+    Returns:
+        Dict with headers, preview_data and total_rows (excluding the header),
+        or None if the sheet is empty
+    """
+    from openpyxl import load_workbook
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        headers = next(rows, None)
+        if headers is None:
+            return None
+
+        preview_data = [dict(zip(headers, row)) for row in islice(rows, max_rows)]
+
+        # Some writers omit the dimension or record only "A1"; scan the rest then
+        total_rows = ws.max_row - 1 if ws.max_row is not None else -1
+        if total_rows < len(preview_data):
+            total_rows = len(preview_data) + sum(1 for _ in rows)
+
+        return {
+            'headers': list(headers),
+            'preview_data': preview_data,
+            'total_rows': total_rows
+        }
+    finally:
+        wb.close()
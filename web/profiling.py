@@ -0,0 +1,134 @@
+"""
+On-demand profiling of reconciliation runs for the web application
+"""
+
+from collections import defaultdict
+import cProfile
+import os
+import pstats
+
+# Stack fragments below this share of the total time are left out of the collapsed file
+MIN_COLLAPSED_SHARE = 1e-4
+MAX_STACK_DEPTH = 128
+
+
+class RunProfiler:
+    """
+    Deterministic (cProfile) profile of one call, saved for download
+
+    Usage:
+        profiler = RunProfiler()
+        summary, output_files = profiler.call(orch.run, input_file, ...)
+        profile = profiler.save(folder, job_id)
+
+    Only the calling thread is profiled. If another profiler is already
+    active, the call runs unprofiled and save() returns None.
+    """
+
+    def __init__(self):
+        """Initialize profiler"""
+        self._profile = None
+        self.error = None
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) under the profiler and return its result"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            self.error = str(e)
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._profile = profile
+
+    def save(self, folder_path, job_id, top=20):
+        """
+        Write <job_id>.pstats and the flamegraph-ready <job_id>.collapsed
+
+        Returns:
+            Dict with both paths and the top functions by cumulative time,
+            or None if nothing was profiled
+        """
+        if self._profile is None:
+            return None
+        os.makedirs(folder_path, exist_ok=True)
+        stats = pstats.Stats(self._profile)
+
+        pstats_path = os.path.join(folder_path, f'{job_id}.pstats')
+        stats.dump_stats(pstats_path)
+
+        collapsed_path = os.path.join(folder_path, f'{job_id}.collapsed')
+        with open(collapsed_path, 'w') as f:
+            for stack, microseconds in sorted(collapsed_stacks(stats).items()):
+                f.write(f'{stack} {microseconds}\n')
+
+        return {
+            'pstats': pstats_path,
+            'collapsed': collapsed_path,
+            'total_seconds': round(stats.total_tt, 3),
+            'top_functions': top_functions(stats, top)
+        }
+
+
+def function_label(func):
+    """Readable name of a pstats function key (filename, line, name)"""
+    filename, line, name = func
+    if filename == '~':
+        return name.replace(';', ':')  # Built-in, e.g. <method 'append' of 'list' objects>
+    return f'{name} ({os.path.basename(filename)}:{line})'.replace(';', ':')
+
+
+def top_functions(stats, limit):
+    """Functions with the highest cumulative time"""
+    rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:limit]
+    return [
+        {
+            'function': function_label(func),
+            'calls': nc,
+            'own_seconds': round(tt, 6),
+            'cumulative_seconds': round(ct, 6)
+        }
+        for func, (cc, nc, tt, ct, callers) in rows
+    ]
+
+
+def collapsed_stacks(stats):
+    """
+    Convert a profile to collapsed stacks ("root;caller;callee microseconds")
+
+    cProfile records caller -> callee edges rather than full stacks, so each
+    function's own time is attributed to a path in proportion to the share of
+    its cumulative time that came through that path, as flameprof-style
+    converters do. Recursive edges are cut, and paths carrying less than
+    MIN_COLLAPSED_SHARE of the total time are dropped.
+    """
+    labels = {func: function_label(func) for func in stats.stats}
+    callees = defaultdict(dict)
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge
+    min_seconds = max(stats.total_tt * MIN_COLLAPSED_SHARE, 1e-6)
+
+    stacks = defaultdict(int)
+
+    def walk(func, path, on_path, scale):
+        own_us = int(stats.stats[func][2] * scale * 1e6)
+        if own_us > 0:
+            stacks[';'.join(path)] += own_us
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge in callees.get(func, {}).items():
+            callee_ct = stats.stats[callee][3]
+            if callee_ct <= 0 or callee in on_path or edge[3] * scale < min_seconds:
+                continue
+            on_path.add(callee)
+            walk(callee, path + [labels[callee]], on_path, scale * edge[3] / callee_ct)
+            on_path.discard(callee)
+
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        if not callers:
+            walk(func, [labels[func]], {func}, 1.0)
+    return stacks
@@ -0,0 +1,338 @@
+"""
+Bounded results store for the web application
+"""
+
+from collections import OrderedDict
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+_JOB_ID_PATTERN = re.compile(r'^[0-9A-Za-z-]{1,64}$')
+
+
+class ResultsStore:
+    """
+    Thread-safe job results store with LRU eviction, TTL expiry and disk spillover
+
+    Results are kept in memory up to max_entries and max_bytes (JSON size),
+    evicting the least recently used entries first. Evicted entries are
+    written to spill_folder as JSON and loaded back on the next access, so
+    results and downloads of older jobs still resolve. Entries older than
+    ttl_seconds expire from both memory and disk.
+
+    Supports the dict operations the routes use: `job_id in store`,
+    `store[job_id]` and `store[job_id] = results`.
+    """
+
+    DISK_PURGE_INTERVAL = 60.0
+
+    def __init__(self, max_entries=200, max_bytes=50 * 1024 * 1024, ttl_seconds=24 * 3600,
+                 spill_folder=None):
+        """Initialize store"""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.spill_folder = spill_folder
+        self._entries = OrderedDict()  # job_id -> (results, size_bytes, stored_at)
+        self._job_keys = OrderedDict()  # dedup key -> (job_id, stored_at)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._last_disk_purge = 0.0
+
+    def __setitem__(self, job_id, results):
+        """Store results for a job, evicting older entries as needed"""
+        size = len(json.dumps(results, default=str))
+        with self._lock:
+            self._remove(job_id)
+            self._entries[job_id] = (results, size, time.time())
+            self._bytes += size
+            self._purge_expired()
+            self._evict()
+
+    def __getitem__(self, job_id):
+        results = self.get(job_id)
+        if results is None:
+            raise KeyError(job_id)
+        return results
+
+    def __contains__(self, job_id):
+        return self.get(job_id) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, job_id, default=None):
+        """Return a job's results from memory or the spill folder, or default"""
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is not None:
+                if self._expired(entry[2]):
+                    self._remove(job_id)
+                    return default
+                self._entries.move_to_end(job_id)
+                return entry[0]
+
+            loaded = self._load_spilled(job_id)
+            if loaded is None:
+                return default
+
+            # Promote back into memory
+            results, stored_at = loaded
+            size = len(json.dumps(results, default=str))
+            self._entries[job_id] = (results, size, stored_at)
+            self._bytes += size
+            self._delete_spilled(job_id)
+            self._evict(keep=job_id)
+            return results
+
+    def find_job(self, key):
+        """Return the job indexed under a deduplication key, or None"""
+        with self._lock:
+            entry = self._job_keys.get(key)
+            if entry is None or self._expired(entry[1]):
+                return None
+            return entry[0]
+
+    def index_job(self, key, job_id):
+        """Index a job under a deduplication key (replacing any previous job)"""
+        with self._lock:
+            self._job_keys[key] = (job_id, time.time())
+            self._job_keys.move_to_end(key)
+            while len(self._job_keys) > 4 * self.max_entries:
+                self._job_keys.popitem(last=False)
+
+    def get_status(self, job_id):
+        """Job status is not shared by the in-process store (see SQLiteResultsStore)"""
+        return None
+
+    def set_status(self, job_id, status):
+        pass
+
+    def stats(self):
+        """Return entry count and size of the in-memory part"""
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes}
+
+    def _evict(self, keep=None):
+        """Spill least recently used entries until within limits (caller holds the lock)"""
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            job_id = next(iter(self._entries))
+            if job_id == keep:
+                self._entries.move_to_end(job_id)
+                job_id = next(iter(self._entries))
+            results, size, stored_at = self._entries.pop(job_id)
+            self._bytes -= size
+            self._spill(job_id, results, stored_at)
+
+    def _purge_expired(self):
+        """Drop expired entries from memory and, periodically, from disk (caller holds the lock)"""
+        for job_id in [job_id for job_id, entry in self._entries.items() if self._expired(entry[2])]:
+            self._remove(job_id)
+
+        now = time.time()
+        if self.spill_folder and now - self._last_disk_purge >= self.DISK_PURGE_INTERVAL:
+            self._last_disk_purge = now
+            try:
+                for filename in os.listdir(self.spill_folder):
+                    path = os.path.join(self.spill_folder, filename)
+                    if filename.endswith('.json') and self._expired(os.path.getmtime(path)):
+                        os.remove(path)
+            except OSError:
+                pass
+
+    def _remove(self, job_id):
+        """Remove a job from memory (caller holds the lock)"""
+        entry = self._entries.pop(job_id, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _expired(self, stored_at):
+        return self.ttl_seconds and time.time() - stored_at > self.ttl_seconds
+
+    def _spill_path(self, job_id):
+        """Return the spill file of a job, or None if the ID is not a safe file name"""
+        if not self.spill_folder or not _JOB_ID_PATTERN.match(job_id):
+            return None
+        return os.path.join(self.spill_folder, f'{job_id}.json')
+
+    def _spill(self, job_id, results, stored_at):
+        """Write an evicted entry to disk (dropped if the folder is not writable)"""
+        path = self._spill_path(job_id)
+        if path is None:
+            return
+        try:
+            os.makedirs(self.spill_folder, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=self.spill_folder)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'stored_at': stored_at, 'results': results}, f, default=str)
+            os.replace(temp_path, path)
+            os.utime(path, (stored_at, stored_at))
+        except OSError as e:
+            print(f"Warning: Cannot spill results of job {job_id}: {e}")
+
+    def _load_spilled(self, job_id):
+        """Load a spilled entry, returning (results, stored_at) or None"""
+        path = self._spill_path(job_id)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(data['stored_at']):
+            self._delete_spilled(job_id)
+            return None
+        return data['results'], data['stored_at']
+
+    def _delete_spilled(self, job_id):
+        path = self._spill_path(job_id)
+        try:
+            if path:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+class SQLiteResultsStore:
+    """
+    Job results and status shared by every web worker process on a node
+
+    Results and job status snapshots are rows keyed by job_id in a SQLite
+    database in WAL mode, so readers in other processes never block the
+    writer. Any gunicorn worker can then serve the status, results and
+    downloads of a job another worker ran. Entries older than ttl_seconds are
+    purged periodically. Offers the same interface as ResultsStore.
+    """
+
+    PURGE_INTERVAL = 60.0
+
+    def __init__(self, db_path, ttl_seconds=24 * 3600):
+        """Initialize store at db_path, creating the schema if needed"""
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._last_purge = 0.0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'job_id TEXT PRIMARY KEY, results TEXT, status TEXT, stored_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS job_keys ('
+                'key TEXT PRIMARY KEY, job_id TEXT NOT NULL, stored_at REAL NOT NULL)'
+            )
+
+    def __setitem__(self, job_id, results):
+        """Store results for a job"""
+        self._upsert(job_id, 'results', json.dumps(results, default=str))
+        self._purge_expired()
+
+    def __getitem__(self, job_id):
+        results = self.get(job_id)
+        if results is None:
+            raise KeyError(job_id)
+        return results
+
+    def __contains__(self, job_id):
+        return self.get(job_id) is not None
+
+    def get(self, job_id, default=None):
+        """Return a job's results, or default"""
+        value = self._select(job_id, 'results')
+        return json.loads(value) if value else default
+
+    def find_job(self, key):
+        """Return the job indexed under a deduplication key, or None"""
+        row = self._connection().execute(
+            'SELECT job_id, stored_at FROM job_keys WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (self.ttl_seconds and time.time() - row[1] > self.ttl_seconds):
+            return None
+        return row[0]
+
+    def index_job(self, key, job_id):
+        """Index a job under a deduplication key (replacing any previous job)"""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO job_keys (key, job_id, stored_at) VALUES (?, ?, ?)',
+                (key, job_id, time.time())
+            )
+
+    def get_status(self, job_id):
+        """Return the latest published status snapshot of a job, or None"""
+        value = self._select(job_id, 'status')
+        return json.loads(value) if value else None
+
+    def set_status(self, job_id, status):
+        """Publish a job status snapshot"""
+        self._upsert(job_id, 'status', json.dumps(status, default=str))
+
+    def _select(self, job_id, column):
+        """Read one column of a job's row, honouring the TTL"""
+        row = self._connection().execute(
+            f'SELECT {column}, stored_at FROM results WHERE job_id = ?', (job_id,)
+        ).fetchone()
+        if row is None or (self.ttl_seconds and time.time() - row[1] > self.ttl_seconds):
+            return None
+        return row[0]
+
+    def _upsert(self, job_id, column, value):
+        """Insert or update one column of a job's row, restarting its TTL"""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                f'INSERT INTO results (job_id, {column}, stored_at) VALUES (?, ?, ?) '
+                f'ON CONFLICT(job_id) DO UPDATE SET {column} = excluded.{column}, stored_at = excluded.stored_at',
+                (job_id, value, time.time())
+            )
+
+    def _purge_expired(self):
+        """Delete expired rows, at most once per PURGE_INTERVAL"""
+        now = time.time()
+        if not self.ttl_seconds or now - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM results WHERE stored_at < ?', (now - self.ttl_seconds,))
+            conn.execute('DELETE FROM job_keys WHERE stored_at < ?', (now - self.ttl_seconds,))
+
+    def _connection(self):
+        """Return this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_path, timeout=30.0)
+            conn.execute('PRAGMA busy_timeout = 30000')
+        return conn
+
+
+def create_results_store(config, project_root):
+    """
+    Build the results store selected by web.resultsStore.backend
+
+    "memory" (default) keeps results per process; "sqlite" shares them
+    between all worker processes on the node.
+    """
+    ttl_seconds = config.get('ttlSeconds', 24 * 3600)
+    if config.get('backend', 'memory') == 'sqlite':
+        return SQLiteResultsStore(
+            os.path.join(project_root, config.get('databasePath', 'data/output/.results/results.sqlite3')),
+            ttl_seconds=ttl_seconds
+        )
+    return ResultsStore(
+        max_entries=config.get('maxEntries', 200),
+        max_bytes=config.get('maxBytes', 50 * 1024 * 1024),
+        ttl_seconds=ttl_seconds,
+        spill_folder=os.path.join(project_root, config.get('spillFolderPath', 'data/output/.results'))
+    )
@@ -24,6 +24,12 @@ document.addEventListener('DOMContentLoaded', function() {
     if (sampleForm) {
         sampleForm.addEventListener('submit', handleSampleProcess);
     }
+
+    // Row browser on the results page
+    const rowBrowser = document.getElementById('rowBrowser');
+    if (rowBrowser) {
+        createRowBrowser(rowBrowser, rowBrowser.dataset.jobId);
+    }
 });
 
 /**
@@ -94,15 +100,20 @@ async function handleFileUpload(e) {
 
         const data = await response.json();
 
-        if (data.success) {
-            showStatus('File processed successfully!', 'success');
-            showProgress(false);
-            
-            // Show results inline
-            displayResults(data);
-        } else {
-            throw new Error(data.error || 'Processing failed');
+        if (!data.success) {
+            throw new Error(jobErrorMessage(response, data));
+        }
+
+        // Processing runs in the background; follow its progress (an identical upload
+        // that was already processed is answered with the finished job right away)
+        if (data.status !== 'succeeded') {
+            await waitForJob(data.job_id);
         }
+        showStatus(data.deduplicated ? 'File already processed, showing its results' : 'File processed successfully!', 'success');
+        showProgress(false);
+        
+        // Show results inline
+        displayResults(data);
     } catch (error) {
         console.error('Error uploading file:', error);
         showStatus(`Error: ${error.message}`, 'error');
@@ -241,15 +252,17 @@ async function handleSampleProcess(e) {
 
         const data = await response.json();
 
-        if (data.success) {
-            showStatus('Sample file processed successfully!', 'success');
-            showProgress(false);
-            
-            // Show results inline
-            displayResults(data);
-        } else {
-            throw new Error(data.error || 'Processing failed');
+        if (!data.success) {
+            throw new Error(jobErrorMessage(response, data));
         }
+
+        // Processing runs in the background; follow its progress
+        await waitForJob(data.job_id);
+        showStatus('Sample file processed successfully!', 'success');
+        showProgress(false);
+        
+        // Show results inline
+        displayResults(data);
     } catch (error) {
         console.error('Error processing sample:', error);
         showStatus(`Error: ${error.message}`, 'error');
@@ -259,6 +272,91 @@ async function handleSampleProcess(e) {
     }
 }
 
+/**
+ * Error message of a rejected upload or sample request (429 when the server is busy)
+ */
+function jobErrorMessage(response, data) {
+    if (response.status === 429 && data.retry_after) {
+        return `${data.error}. Please try again in ${data.retry_after} seconds.`;
+    }
+    return data.error || 'Processing failed';
+}
+
+/**
+ * Wait for a background job to finish, showing stage progress as it arrives.
+ * Uses the Server-Sent Events stream, falling back to polling the status endpoint.
+ */
+function waitForJob(jobId) {
+    return new Promise((resolve, reject) => {
+        const finish = (job) => {
+            if (job.status === 'succeeded') {
+                resolve(job);
+            } else {
+                reject(new Error(job.error || 'Processing failed'));
+            }
+        };
+
+        if (!window.EventSource) {
+            pollJob(jobId, finish, reject);
+            return;
+        }
+
+        const source = new EventSource(`/api/jobs/${jobId}/events`);
+        source.addEventListener('progress', (e) => showJobProgress(JSON.parse(e.data)));
+        ['succeeded', 'failed'].forEach(eventName => {
+            source.addEventListener(eventName, (e) => {
+                source.close();
+                finish(JSON.parse(e.data));
+            });
+        });
+        source.onerror = () => {
+            // Stream dropped (e.g. by a proxy) - continue by polling
+            source.close();
+            pollJob(jobId, finish, reject);
+        };
+    });
+}
+
+/**
+ * Poll job status until the job finishes
+ */
+async function pollJob(jobId, finish, reject) {
+    try {
+        const response = await fetch(`/api/jobs/${jobId}`);
+        const data = await response.json();
+        if (!data.success) {
+            throw new Error(data.error || 'Job not found');
+        }
+        if (data.job.status === 'succeeded' || data.job.status === 'failed') {
+            finish(data.job);
+            return;
+        }
+        showJobProgress(data.job);
+        setTimeout(() => pollJob(jobId, finish, reject), 1000);
+    } catch (error) {
+        reject(error);
+    }
+}
+
+/**
+ * Show rows parsed / evaluated / written for a running job
+ */
+function showJobProgress(job) {
+    if (job.status === 'queued') {
+        const position = job.queue_position ? ` (position ${job.queue_position} in queue)` : '';
+        showStatus(`Waiting for a free worker${position}...`, 'info');
+        return;
+    }
+
+    const progress = job.progress || {};
+    const rows = (stage) => (progress[stage] ? progress[stage].rows_out : 0);
+    const parts = [`${rows('parse')} rows parsed`];
+    if (progress.billing) parts.push(`${rows('billing')} evaluated`);
+    if (progress.reconciliation_write) parts.push(`${rows('reconciliation_write')} written`);
+    if (progress.ledger_write) parts.push('updating Master Missing');
+    showStatus(`Processing: ${parts.join(', ')}...`, 'info');
+}
+
 /**
  * Show status message
  */
@@ -341,8 +439,10 @@ async function displayResults(data) {
         </div>
     `;
     
-    // Build data table
-    if (previewData && previewData.length > 0) {
+    // Build data table: browse every row when the job has a row store
+    if (resultsData.results.rows_available) {
+        createRowBrowser(dataTableContainer, jobId);
+    } else if (previewData && previewData.length > 0) {
         let tableHTML = `
             <div class="table-container">
                 <table class="data-table">
@@ -429,3 +529,191 @@ function downloadFile(fileType) {
         window.location.href = url;
     }
 }
+
+/**
+ * Virtual-scrolling browser over /api/results/<job_id>/rows
+ *
+ * Only the rows in view (plus an overscan) are in the DOM. Pages are fetched
+ * with the server cursor as the reader nears the end of what is loaded, and
+ * filters or a new sort order restart from the first page.
+ */
+const ROW_HEIGHT = 37;
+const ROW_OVERSCAN = 10;
+const ROW_PAGE_SIZE = 200;
+const ROW_COLUMNS = [
+    'Patient Name', 'Date of Service', 'Facility', 'Servicing Provider',
+    'Type of Care', 'CPT', 'Billed', 'Reason for not billed'
+];
+const ROW_FILTERS = [
+    ['billed', 'Billed'],
+    ['reason', 'Reason'],
+    ['facility', 'Facility'],
+    ['provider', 'Provider']
+];
+
+function escapeHtml(value) {
+    return String(value ?? '').replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]);
+}
+
+function createRowBrowser(container, jobId) {
+    const state = {
+        rows: [], cursor: null, done: false, loading: false, total: 0,
+        filters: {}, sort: '', order: 'asc', requestId: 0, facetsLoaded: false
+    };
+
+    container.innerHTML = `
+        <div class="row-filters">
+            ${ROW_FILTERS.map(([name, label]) => `
+                <select data-filter="${name}"><option value="">${label}: all</option></select>
+            `).join('')}
+            <label>From <input type="date" data-filter="date_from"></label>
+            <label>To <input type="date" data-filter="date_to"></label>
+        </div>
+        <div class="table-container virtual-viewport">
+            <table class="data-table virtual-table">
+                <thead>
+                    <tr>${ROW_COLUMNS.map(column => `<th data-sort="${column}">${column}</th>`).join('')}</tr>
+                </thead>
+                <tbody></tbody>
+            </table>
+        </div>
+        <p class="table-footer">Loading rows...</p>
+    `;
+
+    const viewport = container.querySelector('.virtual-viewport');
+    const tbody = container.querySelector('tbody');
+    const footer = container.querySelector('.table-footer');
+
+    container.querySelectorAll('[data-filter]').forEach(input => {
+        input.addEventListener('change', () => {
+            state.filters[input.dataset.filter] = input.value;
+            reset();
+        });
+    });
+    container.querySelectorAll('th[data-sort]').forEach(th => {
+        th.addEventListener('click', () => {
+            if (state.sort === th.dataset.sort) {
+                state.order = state.order === 'asc' ? 'desc' : 'asc';
+            } else {
+                state.sort = th.dataset.sort;
+                state.order = 'asc';
+            }
+            container.querySelectorAll('th[data-sort]').forEach(other => {
+                other.classList.remove('sort-asc', 'sort-desc');
+            });
+            th.classList.add(`sort-${state.order}`);
+            reset();
+        });
+    });
+    viewport.addEventListener('scroll', () => {
+        render();
+        loadMoreIfNeeded();
+    });
+
+    function reset() {
+        state.rows = [];
+        state.cursor = null;
+        state.done = false;
+        state.loading = false;
+        state.requestId += 1;
+        viewport.scrollTop = 0;
+        render();
+        loadPage();
+    }
+
+    async function loadPage() {
+        if (state.loading || state.done) return;
+        state.loading = true;
+        const requestId = state.requestId;
+
+        const params = new URLSearchParams({ limit: ROW_PAGE_SIZE, order: state.order });
+        if (state.sort) params.set('sort', state.sort);
+        Object.entries(state.filters).forEach(([name, value]) => {
+            if (value) params.set(name, value);
+        });
+        if (state.cursor) params.set('cursor', state.cursor);
+
+        try {
+            const response = await fetch(`/api/results/${jobId}/rows?${params}`);
+            const data = await response.json();
+            if (requestId !== state.requestId) return;  // Filters or sort changed meanwhile
+            if (!data.success) throw new Error(data.error || 'Failed to load rows');
+
+            if (data.facets && !state.facetsLoaded) {
+                fillFacets(data.facets);
+                state.facetsLoaded = true;
+            }
+            if (data.total !== undefined) state.total = data.total;
+            state.rows.push(...data.rows);
+            state.cursor = data.next_cursor;
+            state.done = !data.next_cursor;
+        } catch (error) {
+            if (requestId !== state.requestId) return;
+            console.error('Error loading rows:', error);
+            footer.textContent = `Error loading rows: ${error.message}`;
+            state.done = true;
+            return;
+        } finally {
+            if (requestId === state.requestId) state.loading = false;
+        }
+
+        render();
+        loadMoreIfNeeded();
+    }
+
+    function loadMoreIfNeeded() {
+        const loadedBottom = (state.rows.length - ROW_PAGE_SIZE / 2) * ROW_HEIGHT;
+        if (!state.done && viewport.scrollTop + viewport.clientHeight >= loadedBottom) {
+            loadPage();
+        }
+    }
+
+    function render() {
+        const first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - ROW_OVERSCAN);
+        const visible = Math.ceil(viewport.clientHeight / ROW_HEIGHT) + 2 * ROW_OVERSCAN;
+        const last = Math.min(state.rows.length, first + visible);
+
+        const spacer = height => height > 0
+            ? `<tr class="virtual-spacer" style="height: ${height}px"><td colspan="${ROW_COLUMNS.length}"></td></tr>`
+            : '';
+        tbody.innerHTML = spacer(first * ROW_HEIGHT)
+            + state.rows.slice(first, last).map(rowHtml).join('')
+            + spacer((state.rows.length - last) * ROW_HEIGHT);
+
+        footer.textContent = state.rows.length
+            ? `Loaded ${state.rows.length} of ${state.total} matching encounters`
+            : (state.done ? 'No matching encounters' : 'Loading rows...');
+    }
+
+    function rowHtml(row) {
+        const billed = row.Billed === 'Yes';
+        return `
+            <tr class="${billed ? 'success-row' : 'error-row'}">
+                ${ROW_COLUMNS.map(column => column === 'Billed'
+                    ? `<td><span class="badge ${billed ? 'badge-success' : 'badge-error'}">${escapeHtml(row.Billed)}</span></td>`
+                    : `<td title="${escapeHtml(row[column])}">${escapeHtml(row[column]) || '-'}</td>`
+                ).join('')}
+            </tr>
+        `;
+    }
+
+    function fillFacets(facets) {
+        ROW_FILTERS.forEach(([name]) => {
+            const select = container.querySelector(`select[data-filter="${name}"]`);
+            (facets[name] || []).forEach(facet => {
+                const option = document.createElement('option');
+                option.value = facet.value;
+                option.textContent = `${facet.value} (${facet.count})`;
+                select.appendChild(option);
+            });
+        });
+        container.querySelectorAll('input[type="date"]').forEach(input => {
+            if (facets.date_range.min) input.min = facets.date_range.min;
+            if (facets.date_range.max) input.max = facets.date_range.max;
+        });
+    }
+
+    loadPage();
+}
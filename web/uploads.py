@@ -0,0 +1,70 @@
+"""
+Spooled, hashed upload buffers for the web application
+"""
+
+import hashlib
+import tempfile
+
+from flask import Request
+
+
+class SpooledUpload:
+    """
+    Upload buffer that stays in memory up to max_size, then spills to a temp file
+
+    The SHA-256 of the content is computed as the request body is written
+    into it, so no second pass over the upload is needed. A background job
+    takes ownership with detach(); the request teardown then no longer closes
+    it and the job calls release() when done.
+    """
+
+    def __init__(self, max_size, name=''):
+        """Initialize empty buffer"""
+        self.name = name
+        self.size = 0
+        self.max_size = max_size
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_size)
+        self._digest = hashlib.sha256()
+        self._detached = False
+
+    def write(self, data):
+        self._digest.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        # read, seek, tell, ... of the underlying spooled file (used by openpyxl's zipfile)
+        return getattr(self._file, name)
+
+    @property
+    def sha256(self):
+        """Hex digest of everything written so far"""
+        return self._digest.hexdigest()
+
+    @property
+    def spilled(self):
+        """Whether more than max_size bytes were written, so the content moved to disk"""
+        return bool(self.max_size) and self.size > self.max_size
+
+    def detach(self):
+        """Take ownership away from the request (close() becomes a no-op)"""
+        self._detached = True
+        return self
+
+    def close(self):
+        if not self._detached:
+            self._file.close()
+
+    def release(self):
+        """Close a detached buffer"""
+        self._detached = False
+        self._file.close()
+
+
+class SpooledUploadRequest(Request):
+    """Request that receives uploaded files into SpooledUpload buffers"""
+
+    spool_max_size = 8 * 1024 * 1024
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledUpload(self.spool_max_size, filename or '')